@@ -0,0 +1,241 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Measures how fast SolvingRT analyses synthetic lift videos.
+#
+#   python -m benchmarks.run --output bench.json
+#   python -m benchmarks.run --compare before.json after.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import cv2
+from benchmarks import synthetic
+from solvingrt import solve
+
+RESOLUTIONS = [(640, 360), (1280, 720)]
+MEASURES = [["torque"],
+            ["torque", "speed", "angles", "tempo", "time under tension"],
+            ["power"],
+            ["velocity lost"]]
+EXERCISES = {"curl": ("Preacher curl", "biceps"), "squat": ("Squat", "quadriceps")}
+
+
+def _exercise_(path: str, exercise: str, measures: list[str], width: int, height: int) -> solve.Exercise:
+    name, muscle = EXERCISES[exercise]
+    athlete = solve.Athlete(1.80, 90, 0.35, 15 if exercise == "curl" else 100, "left")
+    ex = solve.Exercise(name, muscle, path, athlete, list(measures))
+    ex.video_resize(width, height)
+    ex.headless()
+    return ex
+
+
+def _stage_(name: str, frames: int, seconds: float, **details) -> dict:
+    return {"stage": name, "frames": frames, "seconds": round(seconds, 6),
+            "fps": round(frames / seconds, 2) if seconds > 0 else None, **details}
+
+
+def bench_decode(path: str, width: int, height: int) -> tuple:
+    """
+    :return: The timing of reading and resizing every frame, and the frames
+    """
+    video = cv2.VideoCapture(path)
+    frames = []
+    start = time.perf_counter()
+    while True:
+        success, frame = video.read()
+        if not success:
+            break
+        frames += [cv2.resize(frame, (width, height))]
+    seconds = time.perf_counter() - start
+    video.release()
+    return _stage_("decode", len(frames), seconds), frames
+
+
+def bench_pose(ex: solve.Exercise, frames: list) -> dict:
+    """
+    :return: The timing of MediaPipe alone, on frames that are already decoded. The graph is built and warmed up
+    on the first frame, which isn't timed
+    """
+    ex.pose.find_position(frames[0])
+    found = 0
+    start = time.perf_counter()
+    for frame in frames[1:]:
+        found += len(ex.pose.find_position(frame)) > 0
+    seconds = time.perf_counter() - start
+    return _stage_("pose", len(frames) - 1, seconds, detected=found)
+
+
+def bench_metrics(ex: solve.Exercise, landmarks: list, cache_directory: str) -> list[dict]:
+    """
+    :return: The timings of the measures alone, from the exact landmarks (given through the cache, so that
+    nothing is decoded nor given to MediaPipe), with iter_reps (every frame measured at once, see
+    Measures._Pipeline.measure_all) and with kinematics
+    """
+    ex.use_cache(cache_directory)
+    ex.cache.save(ex.cache.key(ex.video, ex.width, ex.height, ex.pose.settings()), landmarks)
+    start = time.perf_counter()
+    for _ in ex.iter_reps():
+        pass
+    seconds = time.perf_counter() - start
+    stages = [_stage_("metrics", len(landmarks), seconds, reps=ex.results.summary["reps"])]
+    start = time.perf_counter()
+    ex.kinematics()
+    stages += [_stage_("kinematics", len(landmarks), time.perf_counter() - start)]
+    return stages
+
+
+def bench_keypoints(ex: solve.Exercise, positions, fps: int = 30, sets: int = 20) -> dict:
+    """
+    :return: The timing of sets analysed from keypoints (see Exercise.use_keypoints), one after the other, like a
+    server receiving the landmarks found on phones. The first set, which imports and warms up, isn't timed
+    """
+    ex.use_keypoints(positions, fps=fps, width=ex.width, height=ex.height)
+    for _ in ex.iter_reps():
+        pass
+    start = time.perf_counter()
+    for _ in range(sets):
+        ex.use_keypoints(positions, fps=fps, width=ex.width, height=ex.height)
+        for _ in ex.iter_reps():
+            pass
+    seconds = time.perf_counter() - start
+    return _stage_("keypoints", sets * len(positions), seconds, sets=sets,
+                   sets_per_second=round(sets / seconds, 2) if seconds > 0 else None)
+
+
+def bench_full(ex: solve.Exercise, nb_frames: int) -> dict:
+    """
+    :return: The timing of a full headless analysis (decode, MediaPipe and measures)
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        for _ in ex.iter_reps():
+            pass
+    except Exception as e:  # MediaPipe may not find the stick figure, the timing is still meaningful
+        error = f"{type(e).__name__}: {e}"
+    return _stage_("play_video", nb_frames, time.perf_counter() - start, error=error)
+
+
+def run(resolutions: list = None, measures: list = None, exercise: str = "curl", reps: int = 3,
+        full: bool = True) -> dict:
+    """
+    :arg resolutions: List of (width, height)
+    :arg measures: List of lists of measures
+    :arg exercise: "curl" or "squat"
+    :arg reps: Number of reps in the synthetic videos
+    :arg full: Also time full analyses (MediaPipe on every frame, the slowest part)
+
+    :return: The environment and one entry per stage, resolution and measures
+    """
+    resolutions = RESOLUTIONS if resolutions is None else resolutions
+    measures = MEASURES if measures is None else measures
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for width, height in resolutions:
+            path = os.path.join(directory, f"{exercise}_{width}x{height}.avi")
+            positions = synthetic.make_lift(path, exercise, reps, width=width, height=height)
+            landmarks = positions.tolist()
+            resolution = f"{width}x{height}"
+
+            decode, frames = bench_decode(path, width, height)
+            results += [dict(decode, resolution=resolution)]
+            results += [dict(bench_pose(_exercise_(path, exercise, measures[0], width, height), frames),
+                             resolution=resolution)]
+            del frames
+            for combination in measures:
+                for stage in bench_metrics(_exercise_(path, exercise, combination, width, height), landmarks,
+                                           os.path.join(directory, "cache")):
+                    results += [dict(stage, resolution=resolution, measures=combination)]
+                stage = bench_keypoints(_exercise_(path, exercise, combination, width, height), positions)
+                results += [dict(stage, resolution=resolution, measures=combination)]
+                if full:
+                    stage = bench_full(_exercise_(path, exercise, combination, width, height), len(landmarks))
+                    results += [dict(stage, resolution=resolution, measures=combination)]
+    return {"environment": _environment_(), "exercise": exercise, "reps": reps, "results": results}
+
+
+def _environment_() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor(), "cpus": os.cpu_count(), "opencv": cv2.__version__,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def _key_(entry: dict) -> tuple:
+    return entry["stage"], entry["resolution"], ",".join(entry.get("measures", []))
+
+
+def compare(before: dict, after: dict) -> list[str]:
+    """
+    :return: One line per stage found in both files, with the frames per second and the speedup
+    """
+    old = {_key_(entry): entry for entry in before["results"]}
+    lines = [f"{before['environment'].get('commit')} -> {after['environment'].get('commit')}"]
+    for entry in after["results"]:
+        key = _key_(entry)
+        if (key in old) and old[key]["fps"] and entry["fps"]:
+            lines += [f"{key[0]:<11} {key[1]:<10} {key[2]:<55} {old[key]['fps']:>10.1f} -> {entry['fps']:>10.1f} fps"
+                      f"  x{entry['fps'] / old[key]['fps']:.2f}"]
+    return lines
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SolvingRT on synthetic lift videos")
+    parser.add_argument("--output", default="bench_output.json", help="JSON file for the results")
+    parser.add_argument("--exercise", choices=list(EXERCISES), default="curl")
+    parser.add_argument("--reps", type=int, default=3)
+    parser.add_argument("--resolution", action="append", default=None,
+                        help="WIDTHxHEIGHT, can be repeated (default: 640x360 and 1280x720)")
+    parser.add_argument("--no-full", action="store_true", help="Don't time full analyses")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f_before, open(args.compare[1]) as f_after:
+            print("\n".join(compare(json.load(f_before), json.load(f_after))))
+        return
+
+    resolutions = None
+    if args.resolution:
+        resolutions = [tuple(int(n) for n in resolution.lower().split("x")) for resolution in args.resolution]
+    report = run(resolutions, exercise=args.exercise, reps=args.reps, full=not args.no_full)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for entry in report["results"]:
+        sets = f" ({entry['sets_per_second']} sets/s)" if "sets_per_second" in entry else ""
+        print(f"{entry['stage']:<11} {entry['resolution']:<10} {','.join(entry.get('measures', [])):<55} "
+              f"{entry['fps']} fps{sets}")
+
+
+if __name__ == "__main__":
+    main()
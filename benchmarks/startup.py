@@ -0,0 +1,93 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Measures how long importing SolvingRT takes, in a new Python process each time
+#
+#   python -m benchmarks.startup --output startup.json
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# What a script of each kind imports, or does, before its real work starts
+SCENARIOS = {"import solvingrt": "import solvingrt",
+             "read results": "from solvingrt import Results",
+             "math only": "from solvingrt import VectorAnalysis",
+             "create an Exercise": "from solvingrt import Athlete, Exercise\n"
+                                   "Exercise('Curl', 'biceps', 'v.mp4', Athlete(1.8, 80, 0.35, 15, 'left'), ['torque'])",
+             "build MediaPipe": "from solvingrt import Athlete, Exercise\n"
+                                "Exercise('Curl', 'biceps', 'v.mp4', Athlete(1.8, 80, 0.35, 15, 'left'), "
+                                "['torque']).pose.build()"}
+HEAVY_MODULES = ["cv2", "mediapipe", "matplotlib"]
+
+_REPORT = "\nimport sys\nprint(','.join(m for m in {} if m in sys.modules))"
+
+
+def measure(code: str, repeat: int = 5) -> dict:
+    """
+    :arg code: What the new Python process runs
+    :arg repeat: Number of processes started (the median time is kept)
+
+    :return: The median time (s) and the heavy modules that were loaded
+    """
+    seconds = []
+    loaded = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        done = subprocess.run([sys.executable, "-c", code + _REPORT.format(HEAVY_MODULES)],
+                              capture_output=True, text=True, check=True)
+        seconds += [time.perf_counter() - start]
+        loaded = done.stdout.strip().splitlines()[-1] if done.stdout.strip() else ""
+    return {"seconds": round(statistics.median(seconds), 4), "loaded": [m for m in loaded.split(",") if m]}
+
+
+def run(repeat: int = 5) -> dict:
+    """
+    :return: The time taken by each scenario, and by a Python process that does nothing (to compare with)
+    """
+    results = {"python alone": measure("pass", repeat)}
+    for name, code in SCENARIOS.items():
+        results[name] = measure(code, repeat)
+    return results
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Measure the time taken to import SolvingRT")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    for name, result in results.items():
+        print(f"{name:<20} {result['seconds']:>8.3f} s  {', '.join(result['loaded'])}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Synthetic lift videos (a stick figure) with the exact landmarks of every frame, in MediaPipe's 33 points layout
+# https://google.github.io/mediapipe/solutions/pose.html
+
+import argparse
+import math
+import cv2
+import numpy as np
+
+NB_LANDMARKS = 33
+
+# Lines drawn between landmarks
+BONES = [(11, 13), (13, 15), (12, 14), (14, 16), (11, 12), (11, 23), (12, 24), (23, 24),
+         (23, 25), (25, 27), (24, 26), (26, 28), (27, 29), (29, 31), (28, 30), (30, 32)]
+
+
+def _phase_(t: float, concentric: float, eccentric: float, pause: float, concentric_first: bool = True) -> float:
+    """
+    :arg t: Time (s) since the start of the set
+    :arg concentric_first: True if each rep starts with the concentric portion (curl), False if it starts with the
+    eccentric portion (squat, see Exercise._get_muscle_info_)
+
+    :return: How far in the lift the athlete is, 0 at the end of the eccentric portion and 1 at the end of the
+    concentric portion
+    """
+    t = t % (concentric + eccentric + (2 * pause))
+    if not concentric_first:
+        if t < eccentric:
+            return 0.5 + (0.5 * math.cos(math.pi * t / eccentric))
+        t -= eccentric
+        if t < pause:
+            return 0.0
+        t -= pause
+        if t < concentric:
+            return 0.5 - (0.5 * math.cos(math.pi * t / concentric))
+        return 1.0
+    if t < concentric:
+        return 0.5 - (0.5 * math.cos(math.pi * t / concentric))
+    t -= concentric
+    if t < pause:
+        return 1.0
+    t -= pause
+    if t < eccentric:
+        return 0.5 + (0.5 * math.cos(math.pi * t / eccentric))
+    return 0.0
+
+
+def _limb_(start: tuple, reference: tuple, angle: float, length: float) -> tuple:
+    """
+    :arg start: The joint the limb starts from
+    :arg reference: A point such that the angle (reference, start, end) is the joint angle
+    :arg angle: The joint angle (rad). The limb is rotated clockwise (on screen) from the reference
+    :arg length: Length of the limb
+
+    :return: The end of the limb
+    """
+    direction = math.atan2(reference[1] - start[1], reference[0] - start[0]) - angle
+    return start[0] + (length * math.cos(direction)), start[1] + (length * math.sin(direction))
+
+
+def _skeleton_(exercise: str, phase: float) -> dict:
+    """
+    :arg exercise: "curl" or "squat"
+    :arg phase: How far in the lift the athlete is (see _phase_)
+
+    :return: The position of each joint of the near side of the body, in units of the height of the video,
+    with the athlete facing right
+    """
+    if exercise == "squat":
+        # Starts standing (knee at 175°), goes down to the bottom (knee at 90°) and stands up
+        knee_angle = math.radians(90 + (85 * phase))
+        shin_lean = math.radians(25 * (1 - phase))
+        ankle = (0.50, 0.92)
+        knee = (ankle[0] + (0.22 * math.sin(shin_lean)), ankle[1] - (0.22 * math.cos(shin_lean)))
+        hip = _limb_(knee, ankle, -knee_angle, 0.22)
+        shoulder = _limb_(hip, knee, math.radians(70 + (105 * phase)), 0.28)
+        elbow = _limb_(shoulder, hip, -math.radians(20), 0.15)
+        wrist = _limb_(elbow, shoulder, math.radians(60), 0.13)
+    else:
+        # Curl: standing still, the elbow goes from 165° (start) to 40° (end of the concentric portion)
+        ankle, knee, hip = (0.50, 0.92), (0.50, 0.70), (0.50, 0.48)
+        shoulder = (0.50, 0.20)
+        elbow = (shoulder[0], shoulder[1] + 0.16)
+        wrist = _limb_(elbow, shoulder, -math.radians(165 - (125 * phase)), 0.15)
+    head = (shoulder[0] + 0.02, shoulder[1] - 0.09)
+    return {"head": head, "shoulder": shoulder, "elbow": elbow, "wrist": wrist, "hip": hip, "knee": knee,
+            "ankle": ankle, "heel": (ankle[0] - 0.03, ankle[1] + 0.02), "toe": (ankle[0] + 0.07, ankle[1] + 0.03)}
+
+
+def lift_landmarks(exercise: str = "curl", reps: int = 5, concentric: float = 1.0, eccentric: float = 1.5,
+                   pause: float = 0.3, fps: int = 30, width: int = 1280, height: int = 720,
+                   side_seen: str = "left") -> np.ndarray:
+    """
+    :arg exercise: "curl" or "squat"
+    :arg reps: Number of reps
+    :arg concentric: Time (s) of the concentric portion of each rep
+    :arg eccentric: Time (s) of the eccentric portion of each rep
+    :arg pause: Time (s) spent at each end of the movement
+    :arg fps: Frames per second
+    :arg width: Width (pixels) of the video
+    :arg height: Height (pixels) of the video
+    :arg side_seen: "left" or "right", the side of the athlete facing the camera
+
+    :return: (frames x 33 x 2) array of the landmarks, in pixels, like _PoseDetector.find_position
+    """
+    duration = reps * (concentric + eccentric + (2 * pause))
+    frames = int(duration * fps)
+    positions = np.zeros((frames, NB_LANDMARKS, 2), dtype=np.int32)
+    near, far = (1, 0) if side_seen == "left" else (0, 1)  # MediaPipe: odd landmarks are the left side
+    for i in range(frames):
+        joints = _skeleton_(exercise, _phase_(i / fps, concentric, eccentric, pause, exercise != "squat"))
+        points = np.zeros((NB_LANDMARKS, 2))
+        points[0:11] = joints["head"]
+        for side, offset in ((near, 0.0), (far, 0.015)):  # The far side is slightly behind
+            for j, name in enumerate(["shoulder", "elbow", "wrist"]):
+                points[12 + (2 * j) - side] = (joints[name][0] - offset, joints[name][1] - offset)
+            for j in range(3):  # Pinky, index and thumb
+                points[18 + (2 * j) - side] = (joints["wrist"][0] + 0.01 - offset, joints["wrist"][1] - offset)
+            for j, name in enumerate(["hip", "knee", "ankle", "heel", "toe"]):
+                points[24 + (2 * j) - side] = (joints[name][0] - offset, joints[name][1] - offset)
+        # Coordinates are in units of the height, centered horizontally
+        points[:, 0] = (points[:, 0] - 0.5) * height + (width / 2)
+        points[:, 1] = points[:, 1] * height
+        if side_seen == "right":
+            points[:, 0] = width - points[:, 0]  # Facing left
+        positions[i] = np.round(points)
+    return positions
+
+
+def render_video(path: str, positions: np.ndarray, fps: int = 30, width: int = 1280, height: int = 720) -> None:
+    """
+    Draws the stick figure of every frame in a video
+
+    :arg path: The video (.mp4 or .avi)
+    :arg positions: (frames x 33 x 2) array of landmarks, in pixels
+    :arg fps: Frames per second
+    :arg width: Width (pixels) of the video
+    :arg height: Height (pixels) of the video
+    """
+    fourcc = cv2.VideoWriter_fourcc(*("mp4v" if path.lower().endswith(".mp4") else "MJPG"))
+    writer = cv2.VideoWriter(path, fourcc, fps, (width, height))
+    thickness = max(2, height // 90)
+    for frame_positions in positions.tolist():
+        frame = np.full((height, width, 3), 40, dtype=np.uint8)
+        for a, b in BONES:
+            cv2.line(frame, tuple(frame_positions[a]), tuple(frame_positions[b]), (230, 230, 230), thickness)
+        cv2.circle(frame, tuple(frame_positions[0]), thickness * 4, (230, 230, 230), cv2.FILLED)
+        writer.write(frame)
+    writer.release()
+
+
+def make_lift(path: str, exercise: str = "curl", reps: int = 5, concentric: float = 1.0, eccentric: float = 1.5,
+              pause: float = 0.3, fps: int = 30, width: int = 1280, height: int = 720,
+              side_seen: str = "left") -> np.ndarray:
+    """
+    Writes a synthetic lift video, and its landmarks next to it (<path>.landmarks.npz, with "positions" and "fps")
+
+    :args: See lift_landmarks
+
+    :return: (frames x 33 x 2) array of the landmarks, in pixels
+    """
+    positions = lift_landmarks(exercise, reps, concentric, eccentric, pause, fps, width, height, side_seen)
+    render_video(path, positions, fps, width, height)
+    np.savez_compressed(path + ".landmarks.npz", positions=positions, fps=fps)
+    return positions
+
+
+def main(argv: list[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic lift video and its landmarks")
+    parser.add_argument("path", help="The video to write (.mp4 or .avi)")
+    parser.add_argument("--exercise", choices=["curl", "squat"], default="curl")
+    parser.add_argument("--reps", type=int, default=5)
+    parser.add_argument("--concentric", type=float, default=1.0, help="Seconds")
+    parser.add_argument("--eccentric", type=float, default=1.5, help="Seconds")
+    parser.add_argument("--pause", type=float, default=0.3, help="Seconds")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--side", choices=["left", "right"], default="left")
+    args = parser.parse_args(argv)
+    make_lift(args.path, args.exercise, args.reps, args.concentric, args.eccentric, args.pause, args.fps,
+              args.width, args.height, args.side)
+
+
+if __name__ == "__main__":
+    main()
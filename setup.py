@@ -42,6 +42,8 @@ setup(name="SolvingRT",
       license="MIT",
       keywords=["resistance", "training", "video", "exercise"],
       packages=["solvingrt"],
+      entry_points={"console_scripts": ["solvingrt-batch=solvingrt.Batch:main",
+                                      "solvingrt-daemon=solvingrt.Daemon:main"]},
       classifiers=[
           "Programming Language :: Python :: 3",
           "License :: OSI Approved :: MIT License"
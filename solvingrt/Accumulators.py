@@ -0,0 +1,264 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# Statistics updated one value at a time, in constant memory, so that a video of any length can be analysed
+# without keeping every value (see Exercise.statistics and Segmenter.Rep.stats). Values that aren't finite (e.g. NaN
+# on frames where nobody is seen) are skipped. add_many adds the values of many frames at once
+
+import math
+import numpy as np
+
+
+class Welford:
+    """
+    Count, sum, mean and variance of the values added (Welford's algorithm, stable for long series)
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0  # Sum of the squared differences with the mean
+
+    def add(self, value: float) -> None:
+        if not math.isfinite(value):
+            return
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def add_many(self, values) -> None:
+        """
+        :arg values: Values to add, all at once
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        other = Welford()
+        other.count = len(values)
+        other.total = float(values.sum())
+        other.mean = other.total / other.count
+        other.m2 = float(np.square(values - other.mean).sum())
+        Welford.merge(self, other)
+
+    def merge(self, other) -> None:
+        """
+        Adds every value added to another Welford (Chan et al.)
+        """
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.total += other.total
+        self.count = count
+
+    def variance(self) -> float:
+        """
+        :return: The variance of the values (population), 0 if there is less than 2 values
+        """
+        return self.m2 / self.count if self.count > 1 else 0.0
+
+    def std(self) -> float:
+        """
+        :return: The standard deviation of the values (population)
+        """
+        return math.sqrt(Welford.variance(self))
+
+
+class MinMax:
+    """
+    Smallest and largest values added
+    """
+
+    def __init__(self):
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        if not math.isfinite(value):
+            return
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, values) -> None:
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if len(values) > 0:
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+
+    def merge(self, other) -> None:
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+
+class P2Quantile:
+    """
+    Estimate of a quantile (e.g. the median) with five markers, without keeping the values
+    (P-square algorithm, Jain & Chlamtac, 1985). Exact for the first five values. When many values are added at
+    once to an empty estimate, the markers start at the exact ranks of those values (see add_many)
+    """
+
+    def __init__(self, quantile: float):
+        """
+        :arg quantile: Between 0 and 1 (0.5 for the median)
+        """
+        self.quantile = quantile
+        self.heights = []  # Height of each marker (the first values until there is five)
+        self.positions = [0, 1, 2, 3, 4]  # Actual position of each marker
+        self.desired = [0, 2 * quantile, 4 * quantile, 2 + 2 * quantile, 4]  # Desired position of each marker
+        self.increments = [0, quantile / 2, quantile, (1 + quantile) / 2, 1]
+
+    def add(self, value: float) -> None:
+        if not math.isfinite(value):
+            return
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            heights.sort()
+            return
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+        for i in range(cell + 1, 5):
+            self.positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        # Moves the three middle markers towards where they should be
+        for i in range(1, 4):
+            offset = self.desired[i] - self.positions[i]
+            if ((offset >= 1) and (self.positions[i + 1] - self.positions[i] > 1)) or \
+                    ((offset <= -1) and (self.positions[i - 1] - self.positions[i] < -1)):
+                step = 1 if offset > 0 else -1
+                height = P2Quantile._parabolic_(self, i, step)
+                if not (heights[i - 1] < height < heights[i + 1]):
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / \
+                             (self.positions[i + step] - self.positions[i])
+                heights[i] = height
+                self.positions[i] += step
+
+    def add_many(self, values) -> None:
+        """
+        :arg values: Values to add. If none was added before, the markers are placed on the values of their desired
+        rank (the estimate is then the value of the nearest rank), as if the values had been added one at a time
+        by an exact algorithm
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        if (len(self.heights) > 0) or (len(values) <= 5):
+            for value in values.tolist():
+                P2Quantile.add(self, value)
+            return
+        count = len(values)
+        self.desired = [increment * (count - 1) for increment in self.increments]
+        positions = [int(round(desired)) for desired in self.desired]
+        # The markers must be on different values
+        for i in range(1, 4):
+            positions[i] = max(positions[i], positions[i - 1] + 1)
+        for i in range(3, -1, -1):
+            positions[i] = min(positions[i], positions[i + 1] - 1)
+        self.positions = positions
+        self.heights = np.partition(values, positions)[positions].tolist()
+
+    def _parabolic_(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * \
+            ((n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+             (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+
+    def value(self) -> float:
+        """
+        :return: The estimate of the quantile, NaN if no value was added
+        """
+        if len(self.heights) == 0:
+            return math.nan
+        if self.positions[4] > 4:
+            return self.heights[2]
+        # Less than six values: the exact quantile (linear interpolation)
+        rank = self.quantile * (len(self.heights) - 1)
+        low = int(rank)
+        high = min(low + 1, len(self.heights) - 1)
+        return self.heights[low] + (rank - low) * (self.heights[high] - self.heights[low])
+
+
+class Summary:
+    """
+    Count, mean, standard deviation, min, max and a few quantiles of the values added
+    """
+
+    def __init__(self, quantiles: tuple = (0.5, 0.9)):
+        """
+        :arg quantiles: Quantiles to estimate (see P2Quantile)
+        """
+        self.moments = Welford()
+        self.range = MinMax()
+        self.quantiles = {quantile: P2Quantile(quantile) for quantile in quantiles}
+
+    def add(self, value: float) -> None:
+        if not math.isfinite(value):
+            return
+        self.moments.add(value)
+        self.range.add(value)
+        for estimate in self.quantiles.values():
+            estimate.add(value)
+
+    def add_many(self, values) -> None:
+        """
+        :arg values: Values to add, all at once (see P2Quantile.add_many)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        values = values[np.isfinite(values)]
+        self.moments.add_many(values)
+        self.range.add_many(values)
+        for estimate in self.quantiles.values():
+            estimate.add_many(values)
+
+    def __len__(self) -> int:
+        return self.moments.count
+
+    def __repr__(self) -> str:
+        return f"Summary({self.to_dict()})"
+
+    def to_dict(self) -> dict:
+        """
+        :return: "count", "mean", "std", "min", "max" and the quantiles ("p50", "p90", ...)
+        """
+        if self.moments.count == 0:
+            return {"count": 0}
+        return {"count": self.moments.count, "mean": self.moments.mean, "std": self.moments.std(),
+                "min": self.range.min, "max": self.range.max,
+                **{f"p{round(100 * quantile)}": estimate.value() for quantile, estimate in self.quantiles.items()}}
@@ -0,0 +1,268 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Analyse many videos at once, on every core of the computer
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".m4v", ".webm")
+
+# Columns of a manifest. They have the same names as the arguments of Athlete and Exercise
+ATHLETE_COLUMNS = ["height_meter", "body_weight_kg", "moving_limb_meter", "weight_used_kg", "side_seen"]
+EXERCISE_COLUMNS = ["exercise_name", "muscle", "path_to_video", "measures"]
+OPTIONAL_COLUMNS = ["video_width", "video_height", "path_to_keypoints"]
+
+
+def read_manifest(path: str) -> list[dict]:
+    """
+    Reads a manifest, either a CSV file (measures separated by ";") or a JSON lines file (one object per line).
+    A row whose path_to_video is a directory stands for every video in that directory
+
+    :arg path: Path to the manifest
+
+    :return: One dict per video, with the columns as keys
+    """
+    rows = []
+    with open(path, newline="") as f:
+        if path.lower().endswith((".jsonl", ".json")):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            for row in csv.DictReader(f):
+                row["measures"] = [m.strip() for m in row["measures"].split(";") if m.strip()]
+                rows += [row]
+
+    jobs = []
+    for row in rows:
+        missing = [column for column in ATHLETE_COLUMNS + EXERCISE_COLUMNS if column not in row]
+        if missing:
+            raise ValueError(f"Columns {missing} are missing in {path}")
+        if os.path.isdir(row["path_to_video"]):
+            for name in sorted(os.listdir(row["path_to_video"])):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    jobs += [dict(row, path_to_video=os.path.join(row["path_to_video"], name))]
+        else:
+            jobs += [row]
+    return jobs
+
+
+def _to_job_(row) -> dict:
+    """
+    :arg row: Either a dict (like the ones given by read_manifest)
+    or a tuple (path_to_video, Athlete, exercise_name, muscle, measures)
+
+    :return: The row as a dict
+    """
+    if isinstance(row, dict):
+        return row
+    path_to_video, athlete, exercise_name, muscle, measures = row
+    return {"path_to_video": path_to_video, "exercise_name": exercise_name, "muscle": muscle,
+            "measures": list(measures), "height_meter": athlete.height, "body_weight_kg": athlete.body_weight,
+            "moving_limb_meter": athlete.moving_limb, "weight_used_kg": athlete.weight_used,
+            "side_seen": athlete.side_seen}
+
+
+def _build_exercise_(job: dict, cache_directory: str = None, pool=None):
+    """
+    :arg job: A row of the manifest
+    :arg cache_directory: Where the landmarks are cached, None to not use a cache
+    :arg pool: The PosePool.PosePool the graph is taken from, None for the pool of the process
+
+    :return: The Exercise of the row, ready to be analysed without being displayed
+    """
+    # Imported here: the main process only reads the manifest and doesn't need OpenCV nor MediaPipe
+    from solvingrt import solve
+    missing = [column for column in ATHLETE_COLUMNS + EXERCISE_COLUMNS if column not in job]
+    if missing:
+        raise ValueError(f"Columns {missing} are missing")
+    athlete = solve.Athlete(float(job["height_meter"]), float(job["body_weight_kg"]),
+                            float(job["moving_limb_meter"]), float(job["weight_used_kg"]), job["side_seen"])
+    exercise = solve.Exercise(job["exercise_name"], job["muscle"], job["path_to_video"],
+                              athlete, list(job["measures"]))
+    if job.get("path_to_keypoints"):
+        # Landmarks found elsewhere, the video isn't needed (see Keypoints)
+        width, height = job.get("video_width"), job.get("video_height")
+        exercise.use_keypoints(job["path_to_keypoints"], width=int(width) if width else None,
+                               height=int(height) if height else None)
+    elif not os.path.isfile(exercise.video):
+        raise FileNotFoundError(exercise.video)
+    elif job.get("video_width") and job.get("video_height"):
+        exercise.video_resize(job["video_width"], job["video_height"])
+    if cache_directory is not None:
+        exercise.use_cache(cache_directory)
+    exercise.headless()
+    # The resistance profiles are returned as data, every worker drawing in the same directory would clash
+    exercise.resistance_profile(render=False)
+
+    # A worker builds each graph once and reuses it for every video it analyses
+    exercise.use_pool(pool)
+    return exercise
+
+
+def _run_job_(job: dict, cache_directory: str = None) -> dict:
+    """
+    Analyses one video. Runs in a worker process.
+    Any error is caught and returned, so that one bad video doesn't stop the others
+
+    :arg job: A row of the manifest
+    :arg cache_directory: Where the landmarks are cached, None to not use a cache
+
+    :return: The data calculated for the video
+    """
+    result = {"path_to_video": job["path_to_video"], "exercise_name": job["exercise_name"], "muscle": job["muscle"]}
+    start = time.perf_counter()
+    try:
+        exercise = _build_exercise_(job, cache_directory)
+        for _ in exercise.iter_reps():
+            pass
+        result.update({"ok": True, **exercise.results.to_dict()})
+        if exercise.torque_profile is not None:
+            # Can be added to the profiles of other videos (see ResistanceProfile.from_dict and combine)
+            result["resistance_profile"] = exercise.torque_profile.to_dict()
+    except Exception as e:
+        result.update({"ok": False, "error": f"{type(e).__name__}: {e}"})
+    result["seconds"] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def _start_worker_(started) -> None:
+    """
+    Runs once in each worker process
+
+    :arg started: Shared array, a job sets its flag when a worker starts it (see _run_numbered_)
+    """
+    global _started_
+    _started_ = started
+
+
+def _run_numbered_(i: int, job: dict, cache_directory: str = None) -> dict:
+    """
+    Same as _run_job_, telling the main process that the job was started
+
+    :arg i: Index of the job
+    """
+    _started_[i] = 1  # Shared memory, already seen by the main process if the worker dies right after
+    return _run_job_(job, cache_directory)
+
+
+def _crashed_(job: dict) -> dict:
+    return {"path_to_video": job["path_to_video"], "exercise_name": job["exercise_name"], "muscle": job["muscle"],
+            "ok": False, "error": "The worker process crashed"}
+
+
+def analyse_batch(rows: list, processes: int = None, cache_directory: str = None) -> list[dict]:
+    """
+    Analyses many videos in parallel, one video per process at a time
+
+    :arg rows: The videos to analyse, either dicts (see read_manifest)
+    or tuples (path_to_video, Athlete, exercise_name, muscle, measures)
+    :arg processes: The number of worker processes (default: the number of cores)
+    :arg cache_directory: Where the landmarks are cached, None to not use a cache
+
+    :return: One dict per video, in the same order as the rows. "ok" tells if the analysis worked,
+    in which case "columns" (one list per measure, one value per rep) and "summary" (data of the set) hold the data
+    (see Results.SetResult.to_dict), otherwise "error" tells what went wrong
+    """
+    jobs = [_to_job_(row) for row in rows]
+    results = [None] * len(jobs)
+    pending = list(range(len(jobs)))
+    suspects = []  # Jobs that were running when a worker died
+    # Processes are spawned rather than forked, MediaPipe's threads don't survive a fork
+    context = multiprocessing.get_context("spawn")
+    started = context.RawArray("b", len(jobs))
+
+    while pending or suspects:
+        # A suspect is analysed alone, so that it only takes itself down if it is the one that crashes
+        alone = len(pending) == 0
+        batch = [suspects.pop(0)] if alone else pending
+        retry, running = [], 0
+        with ProcessPoolExecutor(max_workers=1 if alone else processes, mp_context=context,
+                                 initializer=_start_worker_, initargs=(started,)) as pool:
+            futures = {pool.submit(_run_numbered_, i, jobs[i], cache_directory): i for i in batch}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except BrokenProcessPool:
+                    # A worker died (e.g. segmentation fault in a decoder). Every job not done yet fails with it.
+                    # The jobs that were only queued are run again as they were, the ones that were running
+                    # are run again alone
+                    if alone:
+                        results[i] = _crashed_(jobs[i])
+                    elif started[i]:
+                        suspects += [i]
+                        running += 1
+                    else:
+                        retry += [i]
+                    started[i] = 0
+        if retry and (running == 0):
+            # The workers died before starting any job, they would again
+            for i in retry:
+                results[i] = _crashed_(jobs[i])
+            retry = []
+        pending = retry
+    return results
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Command line entry point (solvingrt-batch)
+
+    :arg argv: The arguments (default: sys.argv)
+
+    :return: 0 if every video was analysed, 1 if not
+    """
+    parser = argparse.ArgumentParser(prog="solvingrt-batch",
+                                     description="Analyse every video listed in a manifest (CSV or JSON lines)")
+    parser.add_argument("manifest", help="CSV or JSON lines file with the columns "
+                                         + ", ".join(EXERCISE_COLUMNS + ATHLETE_COLUMNS))
+    parser.add_argument("-p", "--processes", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("-c", "--cache", default=None, help="Directory where the landmarks are cached")
+    parser.add_argument("-o", "--output", default=None, help="JSON lines file for the results (default: stdout)")
+    args = parser.parse_args(argv)
+
+    results = analyse_batch(read_manifest(args.manifest), args.processes, args.cache)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    failed = sum(1 for result in results if not result["ok"])
+    if failed:
+        print(f"{failed} of {len(results)} videos could not be analysed", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
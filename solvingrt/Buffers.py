@@ -0,0 +1,167 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Preallocated NumPy arrays for the landmarks of every frame of a video and the last values of the measures
+
+import numpy as np
+
+NB_LANDMARKS = 33  # https://google.github.io/mediapipe/solutions/pose.html
+
+
+class _LandmarkBuffer:
+    """
+    The landmarks of every frame of a video: their position (pixels, int16, or float64 for keypoints given with
+    decimals, see Exercise.use_keypoints) and their visibility (0 to 1, float32,
+    NaN when MediaPipe didn't give it, e.g. interpolated frames), and whether a person was found in each frame.
+    The arrays are allocated once for the number of frames of the video, and grow if the video has more frames
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16):
+        """
+        :arg capacity: Number of frames expected (CAP_PROP_FRAME_COUNT)
+        :arg dtype: Type of the positions
+        """
+        capacity = max(1, int(capacity))
+        self.xy = np.zeros((capacity, NB_LANDMARKS, 2), dtype=dtype)
+        self.visibility = np.full((capacity, NB_LANDMARKS), np.nan, dtype=np.float32)
+        self.found = np.zeros(capacity, dtype=bool)
+        self.count = 0
+
+    @staticmethod
+    def from_arrays(positions: np.ndarray, detected: np.ndarray, visibility: np.ndarray = None, dtype=np.int16):
+        """
+        :arg positions: (frames x 33 x 2) array of the landmarks, in pixels
+        :arg detected: Boolean array, True for the frames where a person was found
+        :arg visibility: (frames x 33) array of the visibility of the landmarks, None if unknown
+        :arg dtype: Type of the positions kept
+
+        :return: A buffer holding these landmarks
+        """
+        buffer = _LandmarkBuffer(len(positions), dtype)
+        buffer.xy[:len(positions)] = positions
+        buffer.found[:len(positions)] = detected
+        if visibility is not None:
+            buffer.visibility[:len(positions)] = visibility
+        buffer.count = len(positions)
+        return buffer
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, i: int) -> list:
+        """
+        :return: The landmarks of a frame like _PoseDetector.find_position gives them ([] if no person was found)
+        """
+        if not -self.count <= i < self.count:
+            raise IndexError(i)
+        i %= self.count
+        return self.xy[i].tolist() if self.found[i] else []
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield _LandmarkBuffer.__getitem__(self, i)
+
+    def append(self, landmarks: list, visibility: np.ndarray = None) -> None:
+        """
+        :arg landmarks: The landmarks of the next frame, like _PoseDetector.find_position gives them
+        :arg visibility: The visibility of each landmark, None if unknown
+        """
+        if self.count == len(self.found):
+            _LandmarkBuffer._grow_(self)
+        i = self.count
+        if len(landmarks) > 0:
+            self.xy[i] = landmarks
+            self.found[i] = True
+            if visibility is not None:
+                self.visibility[i] = visibility
+        self.count += 1
+
+    def _grow_(self) -> None:
+        extra = len(self.found)  # Doubles, so that appending stays cheap on average
+        self.xy = np.concatenate((self.xy, np.zeros((extra, NB_LANDMARKS, 2), dtype=self.xy.dtype)))
+        self.visibility = np.concatenate((self.visibility,
+                                          np.full((extra, NB_LANDMARKS), np.nan, dtype=np.float32)))
+        self.found = np.concatenate((self.found, np.zeros(extra, dtype=bool)))
+
+    def positions(self) -> np.ndarray:
+        """
+        :return: (frames x 33 x 2) view of the landmarks (int16 or float64, 0 or NaN where no person was found)
+        """
+        return self.xy[:self.count]
+
+    def detected(self) -> np.ndarray:
+        """
+        :return: View of the frames where a person was found
+        """
+        return self.found[:self.count]
+
+    def visibilities(self) -> np.ndarray:
+        """
+        :return: (frames x 33) view of the visibility of the landmarks
+        """
+        return self.visibility[:self.count]
+
+    def arrays(self) -> tuple:
+        """
+        :return: The landmarks (int32, or float64 for a float buffer, ready for _VectorAnalysis) and the frames where
+        a person was found (like _VectorAnalysis.stack)
+        """
+        dtype = np.float64 if np.issubdtype(self.xy.dtype, np.floating) else np.int32
+        return self.xy[:self.count].astype(dtype), self.found[:self.count].copy()
+
+    def nbytes(self) -> int:
+        """
+        :return: Memory (bytes) used by the arrays
+        """
+        return self.xy.nbytes + self.visibility.nbytes + self.found.nbytes
+
+
+class _RingBuffer:
+    """
+    The last few float64 values (e.g. the angles needed by _VideoAnalysis.speed), in an array allocated once.
+    The oldest value is overwritten, so the memory used doesn't depend on the length of the video
+    """
+
+    def __init__(self, size: int):
+        """
+        :arg size: Number of values kept
+        """
+        self.data = np.empty(max(1, int(size)), dtype=np.float64)
+        self.count = 0  # Values added since the start
+
+    def __len__(self) -> int:
+        return min(self.count, len(self.data))
+
+    def append(self, value: float) -> None:
+        self.data[self.count % len(self.data)] = value
+        self.count += 1
+
+    def values(self) -> np.ndarray:
+        """
+        :return: The values kept, from the oldest to the newest
+        """
+        if self.count <= len(self.data):
+            return self.data[:self.count]
+        start = self.count % len(self.data)
+        return np.concatenate((self.data[start:], self.data[:start]))
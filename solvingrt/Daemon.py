@@ -0,0 +1,393 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# Long-running local service: MediaPipe is loaded once, and videos are sent to it over HTTP (TCP or Unix socket)
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from solvingrt import Batch as bt
+
+# States of a job
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           409: "Conflict", 500: "Internal Server Error"}
+
+
+def _json_default_(value):
+    # NumPy numbers (e.g. np.bool_, np.float32) in the results
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} can't be written as JSON")
+
+
+def _dumps_(data) -> bytes:
+    return json.dumps(data, default=_json_default_).encode()
+
+
+class _Job:
+
+    def __init__(self, number: int, spec: dict, priority: int):
+        self.id = str(number)
+        self.spec = spec
+        self.priority = priority
+        self.state = QUEUED
+        self.error = None
+        self.events = []  # Every event given so far (see AnalysisDaemon._publish_), so late readers can catch up
+        self.listeners = []  # asyncio.Queue of each reader of the events
+        self.exercise = None  # While it runs, to stop it
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "state": self.state, "priority": self.priority, "error": self.error,
+                "path_to_video": self.spec.get("path_to_video"), "exercise_name": self.spec.get("exercise_name"),
+                "reps": sum(1 for event in self.events if event["type"] == "rep"), "submitted": self.submitted,
+                "started": self.started, "finished": self.finished}
+
+
+class AnalysisDaemon:
+    """
+    Analyses the videos it is sent, a few at a time, with MediaPipe graphs that stay loaded between videos.
+    Jobs are dicts with the columns of a Batch manifest (path_to_video, exercise_name, muscle, measures and
+    the Athlete parameters). They wait in a priority queue (higher first, then first come first served),
+    can be cancelled, and give the data of each rep as soon as it is found
+    """
+
+    def __init__(self, workers: int = 2, cache_directory: str = None, history: int = 1000):
+        """
+        :arg workers: Videos analysed at the same time (one thread and one MediaPipe graph each)
+        :arg cache_directory: Where the landmarks are cached, None to not use a cache
+        :arg history: Number of finished jobs kept, to be read later
+        """
+        self.workers = max(1, int(workers))
+        self.cache_directory = cache_directory
+        self.history = history
+        self.jobs = {}
+        self.queue = None  # asyncio.PriorityQueue of (-priority, number, job), made in the event loop
+        self.numbers = itertools.count(1)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="solvingrt")
+        self.pool = None
+        self.loop = None
+        self.tasks = []
+
+    async def start(self, warmup: bool = True) -> None:
+        """
+        Starts the workers, and loads MediaPipe (one graph per worker) if warmup
+
+        :arg warmup: Build and run the graphs before the first job, so that it only pays for the inference
+        """
+        from solvingrt import PosePool as pp
+        from solvingrt import solve
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.PriorityQueue()
+        self.pool = pp.PosePool(max_size=self.workers)
+        if warmup:
+            # Graph settings of a default Exercise, which is what the jobs use
+            exercise = solve.Exercise("", "", "", solve.Athlete(1.8, 80, 0.3, 10, "right"), [])
+            await self.loop.run_in_executor(None, self.pool.warmup, exercise.pose.graph_settings(), self.workers)
+        self.tasks = [asyncio.create_task(AnalysisDaemon._worker_(self)) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """
+        Cancels every job, stops the workers and closes the graphs
+        """
+        for job in list(self.jobs.values()):
+            AnalysisDaemon.cancel(self, job.id)
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+        if self.pool is not None:
+            self.pool.close()
+
+    def submit(self, spec: dict, priority: int = 0) -> str:
+        """
+        :arg spec: The job, a row of a Batch manifest
+        :arg priority: Jobs with a higher priority are analysed first
+
+        :return: The id of the job
+        """
+        missing = [column for column in bt.ATHLETE_COLUMNS + bt.EXERCISE_COLUMNS if column not in spec]
+        if missing:
+            raise ValueError(f"Columns {missing} are missing")
+        if isinstance(spec["measures"], str):
+            spec["measures"] = [m.strip() for m in spec["measures"].split(";") if m.strip()]
+        number = next(self.numbers)
+        job = _Job(number, spec, int(priority))
+        self.jobs[job.id] = job
+        self.queue.put_nowait((-job.priority, number, job))
+        AnalysisDaemon._forget_(self)
+        return job.id
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        A queued job is never analysed, a running one stops at the next frame (the reps found so far are kept)
+
+        :arg job_id: The id of the job
+
+        :return: False if the job was already finished
+        """
+        job = self.jobs[job_id]
+        if job.state in FINISHED:
+            return False
+        if job.state == QUEUED:
+            AnalysisDaemon._finish_(self, job, CANCELLED)  # Skipped by the worker that takes it out of the queue
+        else:
+            job.state = CANCELLED
+            job.exercise.stop()
+        return True
+
+    async def events(self, job_id: str):
+        """
+        :arg job_id: The id of the job
+
+        :return: An async generator of the events of the job, from the first one: {"type": "rep", ...} for each
+        rep (see Results.RepResult.to_dict), {"type": "set", ...} for the set (see Results.SetResult.to_dict),
+        and {"type": "end", "state": ..., "error": ...} last
+        """
+        job = self.jobs[job_id]
+        queue = asyncio.Queue()
+        # The events already given and the ones to come, without a gap: nothing runs in between
+        for event in job.events:
+            queue.put_nowait(event)
+        if job.state not in FINISHED:
+            job.listeners += [queue]
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] == "end":
+                    return
+        finally:
+            if queue in job.listeners:
+                job.listeners.remove(queue)
+
+    def status(self) -> dict:
+        """
+        :return: The number of workers, of jobs in each state and the state of the MediaPipe graphs
+        """
+        states = {state: 0 for state in (QUEUED, RUNNING) + FINISHED}
+        for job in self.jobs.values():
+            states[job.state] += 1
+        return {"workers": self.workers, "jobs": states, "pool": repr(self.pool)}
+
+    def _publish_(self, job: _Job, event: dict) -> None:
+        """
+        Gives an event to every reader of the job. Runs in the event loop
+        """
+        job.events += [event]
+        for queue in job.listeners:
+            queue.put_nowait(event)
+
+    def _finish_(self, job: _Job, state: str, error: str = None) -> None:
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        job.exercise = None
+        AnalysisDaemon._publish_(self, job, {"type": "end", "id": job.id, "state": state, "error": error})
+        job.listeners = []
+
+    def _forget_(self) -> None:
+        """
+        Removes the oldest finished jobs when more than history are kept
+        """
+        finished = [job for job in self.jobs.values() if job.state in FINISHED]
+        for job in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job.id]
+
+    async def _worker_(self) -> None:
+        while True:
+            _, _, job = await self.queue.get()
+            if job.state != QUEUED:
+                continue  # Cancelled while it was waiting
+            job.state = RUNNING
+            job.started = time.time()
+            try:
+                job.exercise = bt._build_exercise_(job.spec, self.cache_directory, self.pool)
+                await self.loop.run_in_executor(self.executor, AnalysisDaemon._analyse_, self, job)
+            except asyncio.CancelledError:
+                if job.exercise is not None:
+                    job.exercise.stop()
+                raise
+            except Exception as e:
+                AnalysisDaemon._finish_(self, job, FAILED, f"{type(e).__name__}: {e}")
+            else:
+                AnalysisDaemon._finish_(self, job, CANCELLED if job.state == CANCELLED else DONE)
+
+    def _analyse_(self, job: _Job) -> None:
+        """
+        Analyses the video of a job. Runs in a worker thread, the events are given to the event loop
+        """
+        exercise = job.exercise
+        for result in exercise.iter_reps():
+            self.loop.call_soon_threadsafe(AnalysisDaemon._publish_, self, job,
+                                           {"type": result.type, "id": job.id, **result.to_dict()})
+
+    async def _handle_(self, reader, writer) -> None:
+        """
+        Answers one HTTP request:
+        GET /status, POST /jobs (the job as JSON, with an optional "priority"), GET /jobs, GET /jobs/<id>,
+        DELETE /jobs/<id> (cancel) and GET /jobs/<id>/events (JSON lines, streamed until the job ends)
+        """
+        try:
+            try:
+                method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("latin-1")
+                    if line in ("\r\n", "\n", ""):
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+            except (ValueError, asyncio.IncompleteReadError):
+                await AnalysisDaemon._respond_(writer, 400, {"error": "Malformed request"})
+                return
+            parts = [part for part in target.split("?")[0].split("/") if part]
+
+            if parts == ["status"] and method == "GET":
+                await AnalysisDaemon._respond_(writer, 200, AnalysisDaemon.status(self))
+            elif parts == ["jobs"] and method == "GET":
+                await AnalysisDaemon._respond_(writer, 200, [job.to_dict() for job in self.jobs.values()])
+            elif parts == ["jobs"] and method == "POST":
+                try:
+                    spec = json.loads(body or b"{}")
+                    job_id = AnalysisDaemon.submit(self, spec, spec.pop("priority", 0))
+                except (ValueError, TypeError, AttributeError) as e:
+                    await AnalysisDaemon._respond_(writer, 400, {"error": str(e)})
+                    return
+                await AnalysisDaemon._respond_(writer, 202, self.jobs[job_id].to_dict())
+            elif (len(parts) in (2, 3)) and (parts[0] == "jobs"):
+                job = self.jobs.get(parts[1])
+                if job is None:
+                    await AnalysisDaemon._respond_(writer, 404, {"error": f"No job {parts[1]}"})
+                elif len(parts) == 3:
+                    if (parts[2] != "events") or (method != "GET"):
+                        await AnalysisDaemon._respond_(writer, 404, {"error": f"No {target}"})
+                    else:
+                        await AnalysisDaemon._stream_(self, writer, job.id)
+                elif method == "GET":
+                    await AnalysisDaemon._respond_(writer, 200, job.to_dict())
+                elif method == "DELETE":
+                    cancelled = AnalysisDaemon.cancel(self, job.id)
+                    await AnalysisDaemon._respond_(writer, 200 if cancelled else 409, job.to_dict())
+                else:
+                    await AnalysisDaemon._respond_(writer, 405, {"error": f"{method} isn't allowed"})
+            else:
+                await AnalysisDaemon._respond_(writer, 404, {"error": f"No {method} {target}"})
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond_(writer, code: int, data) -> None:
+        body = _dumps_(data)
+        writer.write(f"HTTP/1.1 {code} {REASONS[code]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+
+    async def _stream_(self, writer, job_id: str) -> None:
+        """
+        Writes the events of a job as JSON lines, one chunk per event, as they come
+        """
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n"
+                     b"Connection: close\r\n\r\n")
+        async for event in AnalysisDaemon.events(self, job_id):
+            line = _dumps_(event) + b"\n"
+            writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_socket: str = None,
+                    warmup: bool = True) -> None:
+        """
+        Answers requests until cancelled (e.g. Ctrl+C)
+
+        :arg host: Address listened to. Keep the default so that only this computer can send videos
+        :arg port: TCP port
+        :arg unix_socket: Path of a Unix socket to listen to instead of TCP
+        :arg warmup: Load MediaPipe before the first job
+        """
+        await AnalysisDaemon.start(self, warmup)
+        if hasattr(signal, "SIGTERM") and (sys.platform != "win32"):
+            # Stops cleanly when the service is stopped (e.g. kill, systemd), like with Ctrl+C
+            self.loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        if unix_socket is not None:
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)  # Left by a daemon that didn't stop cleanly
+            server = await asyncio.start_unix_server(lambda r, w: AnalysisDaemon._handle_(self, r, w), unix_socket)
+        else:
+            server = await asyncio.start_server(lambda r, w: AnalysisDaemon._handle_(self, r, w), host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await AnalysisDaemon.stop(self)
+            if (unix_socket is not None) and os.path.exists(unix_socket):
+                os.remove(unix_socket)
+
+
+def main(argv: list[str] = None) -> int:
+    """
+    Command line entry point (solvingrt-daemon)
+
+    :arg argv: The arguments (default: sys.argv)
+
+    :return: 0 when stopped (Ctrl+C or SIGTERM)
+    """
+    parser = argparse.ArgumentParser(prog="solvingrt-daemon",
+                                     description="Keep MediaPipe loaded and analyse the videos sent over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen to (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument("--unix", default=None, help="Path of a Unix socket to listen to instead of TCP")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Videos analysed at the same time")
+    parser.add_argument("-c", "--cache", default=None, help="Directory where the landmarks are cached")
+    parser.add_argument("--no-warmup", action="store_true", help="Load MediaPipe with the first job instead")
+    args = parser.parse_args(argv)
+
+    daemon = AnalysisDaemon(args.workers, args.cache)
+    where = args.unix if args.unix is not None else f"http://{args.host}:{args.port}"
+    print(f"solvingrt-daemon listening on {where} with {daemon.workers} workers", file=sys.stderr)
+    try:
+        asyncio.run(AnalysisDaemon.serve(daemon, args.host, args.port, args.unix, not args.no_warmup))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# Smoothing of the landmarks, between _PoseDetector.find_position and the measures (see Exercise.smooth_landmarks).
+# MediaPipe gives whole pixels that jitter from one frame to the next, which the angular velocity (and so the power
+# and the velocity lost) amplifies. Every filter smooths one frame at a time while the video is analysed (update)
+# or every frame at once (apply), and works on every landmark at the same time. Both give the same landmarks, so a
+# video gives the same measures whether its landmarks were cached or not
+
+from collections import deque
+import math
+import numpy as np
+
+
+class OneEuroFilter:
+    """
+    One-Euro filter (Casiez et al., 2012): a low-pass filter whose cutoff frequency goes up with the speed of the
+    landmark. Slow movements are smoothed a lot (no jitter), fast ones barely (no lag)
+    """
+
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 0.05, d_cutoff: float = 1.0):
+        """
+        :arg min_cutoff: Cutoff frequency (Hz) when the landmark doesn't move. Lower removes more jitter
+        :arg beta: How much the cutoff frequency goes up with the speed (pixels/s) of the landmark. Higher lags less
+        :arg d_cutoff: Cutoff frequency (Hz) of the speed itself
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        OneEuroFilter.reset(self)
+
+    def reset(self) -> None:
+        """
+        Forgets the previous frames, to filter another video
+        """
+        self.last_time = None
+        self.last_value = None
+        self.last_speed = None
+
+    @staticmethod
+    def _alpha_(cutoff, dt: float):
+        tau = 1 / (2 * math.pi * cutoff)
+        return 1 / (1 + tau / dt)
+
+    def update(self, time: float, values) -> np.ndarray:
+        """
+        :arg time: Time (s) of the frame
+        :arg values: The landmarks of the frame (e.g. 33 x 2 pixels)
+
+        :return: The smoothed landmarks (floats)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if self.last_value is None:
+            self.last_time, self.last_value, self.last_speed = time, values, np.zeros_like(values)
+            return values
+        dt = time - self.last_time
+        if dt <= 0:
+            return self.last_value
+        speed = (values - self.last_value) / dt
+        speed = self.last_speed + OneEuroFilter._alpha_(self.d_cutoff, dt) * (speed - self.last_speed)
+        alpha = OneEuroFilter._alpha_(self.min_cutoff + self.beta * np.abs(speed), dt)
+        smoothed = self.last_value + alpha * (values - self.last_value)
+        self.last_time, self.last_value, self.last_speed = time, smoothed, speed
+        return smoothed
+
+    def apply(self, times, values, centered: bool = False) -> np.ndarray:
+        """
+        :arg times: Time (s) of every frame
+        :arg values: The landmarks of every frame (e.g. frames x 33 x 2 pixels)
+        :arg centered: Not used, the filter only looks at the past frames
+
+        :return: The smoothed landmarks of every frame, the same as calling update on each frame
+        """
+        OneEuroFilter.reset(self)
+        values = np.asarray(values, dtype=np.float64)
+        smoothed = np.empty_like(values)
+        for i, time in enumerate(np.asarray(times, dtype=np.float64).tolist()):
+            smoothed[i] = OneEuroFilter.update(self, time, values[i])
+        OneEuroFilter.reset(self)
+        return smoothed
+
+
+class SavitzkyGolayFilter:
+    """
+    Savitzky-Golay filter: fits a polynomial to the landmarks of the window frames around each frame.
+    Keeps the peaks of the movement better than an average. While the video is analysed, the future frames
+    aren't known yet, so the polynomial is fitted to the last frames and evaluated at the newest one.
+    The fit can be centered on each frame when every frame is known (see apply), but the measures then differ
+    from the ones of the analysis
+    """
+
+    def __init__(self, window: int = 9, order: int = 2):
+        """
+        :arg window: Number of frames in each fit (odd)
+        :arg order: Degree of the polynomial, lower than window
+        """
+        self.window = max(3, int(window) | 1)
+        self.order = min(int(order), self.window - 1)
+        self.coefficients = {}  # (window, position) -> weights of the samples, computed once
+        SavitzkyGolayFilter.reset(self)
+
+    def reset(self) -> None:
+        """
+        Forgets the previous frames, to filter another video
+        """
+        self.last = deque(maxlen=self.window)
+
+    def _weights_(self, window: int, positions: tuple) -> np.ndarray:
+        """
+        :arg window: Number of samples fitted
+        :arg positions: Where the fit is evaluated (0 is the first sample)
+
+        :return: (positions x window) weights, the smoothed values are weights @ samples
+        """
+        key = (window, positions)
+        if key not in self.coefficients:
+            order = min(self.order, window - 1)
+            offsets = np.arange(window) - window // 2
+            vandermonde = np.vander(offsets, order + 1, increasing=True)
+            evaluated = np.vander(np.asarray(positions) - window // 2, order + 1, increasing=True)
+            self.coefficients[key] = evaluated @ np.linalg.pinv(vandermonde)
+        return self.coefficients[key]
+
+    def update(self, time: float, values) -> np.ndarray:
+        """
+        :arg time: Time (s) of the frame (the frames are assumed to be evenly spaced)
+        :arg values: The landmarks of the frame (e.g. 33 x 2 pixels)
+
+        :return: The smoothed landmarks (floats)
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.last.append(values)
+        count = len(self.last)
+        if count <= self.order:
+            return values
+        weights = SavitzkyGolayFilter._weights_(self, count, (count - 1,))[0]
+        return np.tensordot(weights, np.stack(self.last), axes=1)
+
+    def apply(self, times, values, centered: bool = False) -> np.ndarray:
+        """
+        :arg times: Time (s) of every frame (the frames are assumed to be evenly spaced)
+        :arg values: The landmarks of every frame (e.g. frames x 33 x 2 pixels)
+        :arg centered: False to fit the frames up to each frame, the same as calling update on each frame.
+        True to fit the frames centered around it (smoother and without lag, only possible once the video is over)
+
+        :return: The smoothed landmarks of every frame
+        """
+        values = np.asarray(values, dtype=np.float64)
+        frames = len(values)
+        if not centered:
+            return SavitzkyGolayFilter._apply_causal_(self, values)
+        window = min(self.window, frames if frames % 2 == 1 else frames - 1)
+        if window <= self.order:
+            return values.copy()
+        flat = values.reshape(frames, -1)
+        half = window // 2
+        smoothed = np.empty_like(flat)
+        center = SavitzkyGolayFilter._weights_(self, window, (half,))[0]
+        windows = np.lib.stride_tricks.sliding_window_view(flat, window, axis=0)  # frames - window + 1, D, window
+        smoothed[half:frames - half] = windows @ center
+        # The first and last frames are evaluated on the first and last full window
+        smoothed[:half] = SavitzkyGolayFilter._weights_(self, window, tuple(range(half))) @ flat[:window]
+        smoothed[frames - half:] = SavitzkyGolayFilter._weights_(
+            self, window, tuple(range(window - half, window))) @ flat[frames - window:]
+        return smoothed.reshape(values.shape)
+
+    def _apply_causal_(self, values: np.ndarray) -> np.ndarray:
+        """
+        :arg values: The landmarks of every frame
+
+        :return: The smoothed landmarks of every frame, each fitted on the frames up to it (see update)
+        """
+        frames = len(values)
+        flat = values.reshape(frames, -1)
+        smoothed = flat.copy()  # The first frames, fewer than the order, are kept as they are
+        # Until the window is full, each frame is fitted on every frame before it
+        for count in range(self.order + 1, min(self.window, frames) + 1):
+            smoothed[count - 1] = SavitzkyGolayFilter._weights_(self, count, (count - 1,))[0] @ flat[:count]
+        if frames > self.window:
+            newest = SavitzkyGolayFilter._weights_(self, self.window, (self.window - 1,))[0]
+            windows = np.lib.stride_tricks.sliding_window_view(flat, self.window, axis=0)
+            smoothed[self.window:] = windows[1:] @ newest
+        return smoothed.reshape(values.shape)
+
+
+# Names accepted by Exercise.smooth_landmarks
+FILTERS = {"one euro": OneEuroFilter, "savitzky-golay": SavitzkyGolayFilter}
+
+
+def create(method: str, **settings):
+    """
+    :arg method: One of FILTERS
+    :arg settings: Given to the filter (e.g. min_cutoff and beta, or window and order)
+
+    :return: The filter
+    """
+    if method.lower() not in FILTERS:
+        print(f"{method} is not a valid input. Options are {list(FILTERS)}.")
+        raise ValueError(method)
+    return FILTERS[method.lower()](**settings)
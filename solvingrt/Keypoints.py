@@ -0,0 +1,298 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# Landmarks found elsewhere (e.g. by MediaPipe on a phone), analysed without a video
+
+import csv
+import json
+import numpy as np
+
+NB_LANDMARKS = 33  # MediaPipe Pose layout
+
+# Properties of cv2.VideoCapture given by _KeypointCapture (values of cv2.CAP_PROP_*)
+CAP_PROP_POS_MSEC, CAP_PROP_POS_FRAMES, CAP_PROP_FRAME_WIDTH, CAP_PROP_FRAME_HEIGHT, CAP_PROP_FPS = 0, 1, 3, 4, 5
+CAP_PROP_FRAME_COUNT = 7
+
+
+class KeypointStream:
+    """
+    The landmarks of every frame of a set, in MediaPipe's 33 point layout, at a regular frame rate.
+    Timestamps that aren't regular (e.g. frames dropped by the device) are resampled: the landmarks are
+    interpolated between the two nearest samples where a person was found
+    """
+
+    def __init__(self, positions, times=None, fps: float = None, detected=None, visibility=None,
+                 width: int = None, height: int = None, normalized: bool = None, source: str = ""):
+        """
+        :arg positions: (frames x 33 x 2) array of the x and y of each landmark. NaN where no person was found
+        :arg times: Time (s) of each frame, None if the frames are fps apart
+        :arg fps: Frames per second. Default: from the times, or 30
+        :arg detected: True for the frames where a person was found. Default: the frames without NaN
+        :arg visibility: (frames x 33) array of the visibility (0 to 1) of each landmark, if known
+        :arg width: Width (pixels) of the frames the landmarks were found in
+        :arg height: Height (pixels) of the frames the landmarks were found in
+        :arg normalized: True if the coordinates are fractions of the width and height (like MediaPipe gives them),
+        False if they are in pixels. Default: True if every coordinate is between -0.5 and 1.5
+        :arg source: Where the landmarks come from (e.g. a file), written as the path of the video in the results
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        if (positions.ndim != 3) or (positions.shape[1:] != (NB_LANDMARKS, 2)):
+            raise ValueError(f"The landmarks must be a (frames x {NB_LANDMARKS} x 2) array, not {positions.shape}")
+        finite = np.isfinite(positions).all(axis=(1, 2))
+        detected = finite if detected is None else np.asarray(detected, dtype=bool) & finite
+        if normalized is None:
+            normalized = bool(detected.any()) and (np.abs(positions[detected] - 0.5).max() <= 1.0)
+        if normalized:
+            if (width is None) or (height is None):
+                raise Exception("The size of the frames (width and height) is needed to use normalized coordinates")
+            positions = positions * np.array([width, height], dtype=np.float64)
+        elif (width is None) or (height is None):
+            # Large enough to hold every landmark, only the proportions matter to the measures
+            extent = np.nanmax(positions[detected], axis=(0, 1)) if detected.any() else np.array([640, 360])
+            width, height = int(np.ceil(extent[0])) + 1, int(np.ceil(extent[1])) + 1
+        visibility = None if visibility is None else np.asarray(visibility, dtype=np.float32)
+
+        if times is not None:
+            times = np.asarray(times, dtype=np.float64)
+            if len(times) != len(positions):
+                raise ValueError(f"{len(times)} times for {len(positions)} frames")
+            if np.any(np.diff(times) <= 0):
+                raise ValueError("The times must be increasing")
+            if fps is None:
+                fps = 1 / np.median(np.diff(times)) if len(times) > 1 else 30
+            positions, detected, visibility = KeypointStream._resample_(positions, detected, visibility, times, fps)
+        self.fps = 30.0 if fps is None else float(fps)
+        self.positions = np.where(detected[:, None, None], positions, 0.0)
+        self.detected = detected
+        self.visibility = visibility
+        self.width, self.height = int(width), int(height)
+        self.source = source
+
+    @staticmethod
+    def _resample_(positions: np.ndarray, detected: np.ndarray, visibility, times: np.ndarray, fps: float) -> tuple:
+        """
+        :return: The positions, detected and visibility at fps, from times[0] to times[-1]
+        """
+        period = 1 / fps
+        grid = times[0] + np.arange(int(round((times[-1] - times[0]) * fps)) + 1) * period
+        if (len(grid) == len(times)) and np.allclose(grid, times, rtol=0, atol=0.01 * period):
+            return positions, detected, visibility  # Already regular
+        # A frame of the grid has a person if the nearest sample has one and isn't more than a period away
+        nearest = np.clip(np.searchsorted(times, grid), 1, len(times) - 1)
+        nearest -= (grid - times[nearest - 1]) < (times[nearest] - grid)
+        grid_detected = detected[nearest] & (np.abs(times[nearest] - grid) <= period)
+        found = np.flatnonzero(detected)
+        grid_positions = np.zeros((len(grid), NB_LANDMARKS, 2))
+        if len(found) > 1:
+            t = times[found]
+            right = np.clip(np.searchsorted(t, grid), 1, len(t) - 1)
+            left = right - 1
+            weight = np.clip((grid - t[left]) / (t[right] - t[left]), 0, 1)[:, None, None]
+            grid_positions = positions[found[left]] * (1 - weight) + positions[found[right]] * weight
+        elif len(found) == 1:
+            grid_positions[:] = positions[found[0]]
+        grid_visibility = None if visibility is None else visibility[nearest]
+        return grid_positions, grid_detected, grid_visibility
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __repr__(self) -> str:
+        return (f"KeypointStream({len(self)} frames at {self.fps:g} fps, {int(self.detected.sum())} with a person, "
+                f"{self.width}x{self.height})")
+
+    def arrays(self, first: int, count: int, width: int, height: int) -> tuple:
+        """
+        :arg first: The first frame
+        :arg count: The number of frames
+        :arg width: Width (pixels) of the frames the analysis uses
+        :arg height: Height (pixels) of the frames the analysis uses
+
+        :return: The landmarks of these frames like LandmarkCache.load gives them: positions in the pixels of the
+        analysis, detected and visibility
+        """
+        scale = np.array([width / self.width, height / self.height])
+        positions = self.positions[first:first + count] * scale
+        visibility = None if self.visibility is None else self.visibility[first:first + count]
+        return positions, self.detected[first:first + count], visibility
+
+
+def from_rows(rows, fps: float = None, **settings) -> KeypointStream:
+    """
+    :arg rows: One dict per frame, with "time" (s) or "frame", and "landmarks": 33 [x, y] or [x, y, visibility]
+    (empty or None where no person was found)
+    :arg fps: Frames per second, needed if the rows have frames instead of times
+    :arg settings: The other arguments of KeypointStream (width, height, normalized, source)
+
+    :return: The landmarks of the rows
+    """
+    rows = list(rows)
+    positions = np.full((len(rows), NB_LANDMARKS, 2), np.nan)
+    visibility = np.full((len(rows), NB_LANDMARKS), np.nan, dtype=np.float32)
+    for i, row in enumerate(rows):
+        landmarks = row.get("landmarks")
+        if landmarks:
+            landmarks = np.asarray(landmarks, dtype=np.float64)
+            positions[i] = landmarks[:, :2]
+            if landmarks.shape[1] > 2:
+                visibility[i] = landmarks[:, 2]
+    times = _times_(rows, fps)
+    return KeypointStream(positions, times, fps, visibility=visibility if np.isfinite(visibility).any() else None,
+                          **settings)
+
+
+def _times_(rows: list, fps: float):
+    """
+    :return: The time (s) of each row, from its "time" or its "frame", None if the rows have neither
+    """
+    if all(row.get("time") not in (None, "") for row in rows) and rows:
+        return [float(row["time"]) for row in rows]
+    if all(row.get("frame") not in (None, "") for row in rows) and rows:
+        return [float(row["frame"]) / (fps or 30) for row in rows]
+    return None
+
+
+def read_csv(path: str, fps: float = None, **settings) -> KeypointStream:
+    """
+    :arg path: CSV file with one line per frame: "time" (s) or "frame", then x0, y0, ..., x32, y32 and optionally
+    v0, ..., v32 (visibility). Empty coordinates where no person was found
+    :arg fps: Frames per second, needed if the lines have frames instead of times
+    :arg settings: The other arguments of KeypointStream (width, height, normalized)
+
+    :return: The landmarks of the file
+    """
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        missing = [name for i in range(NB_LANDMARKS) for name in (f"x{i}", f"y{i}")
+                   if name not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Columns {missing[:4]}... are missing in {path}")
+        lines = list(reader)
+    names = [name for i in range(NB_LANDMARKS) for name in (f"x{i}", f"y{i}")]
+    has_visibility = f"v{NB_LANDMARKS - 1}" in lines[0] if lines else False
+
+    def number(text: str) -> float:
+        return float(text) if text not in (None, "") else np.nan
+
+    positions = np.array([[number(line[name]) for name in names] for line in lines],
+                         dtype=np.float64).reshape(-1, NB_LANDMARKS, 2)
+    visibility = None
+    if has_visibility:
+        visibility = np.array([[number(line[f"v{i}"]) for i in range(NB_LANDMARKS)] for line in lines],
+                              dtype=np.float32)
+    settings.setdefault("source", path)
+    return KeypointStream(positions, _times_(lines, fps), fps, visibility=visibility, **settings)
+
+
+def read_jsonl(path: str, fps: float = None, **settings) -> KeypointStream:
+    """
+    :arg path: JSON lines file with one object per frame (see from_rows)
+    :arg fps: Frames per second, needed if the lines have frames instead of times
+    :arg settings: The other arguments of KeypointStream (width, height, normalized)
+
+    :return: The landmarks of the file
+    """
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    settings.setdefault("source", path)
+    return from_rows(rows, fps, **settings)
+
+
+def read_npz(path: str, fps: float = None, **settings) -> KeypointStream:
+    """
+    :arg path: NumPy file with "positions" (frames x 33 x 2, or x 3 with the visibility), and optionally "times" (s),
+    "detected", "visibility", "fps", "width" and "height". The files of the landmark cache can be read too
+    :arg fps: Frames per second, if the file doesn't have it
+    :arg settings: The other arguments of KeypointStream (width, height, normalized)
+
+    :return: The landmarks of the file
+    """
+    with np.load(path, allow_pickle=False) as data:
+        positions = data["positions"].astype(np.float64)
+        visibility = data["visibility"] if "visibility" in data.files else None
+        if positions.shape[-1] > 2:
+            positions, visibility = positions[..., :2], positions[..., 2]
+        if (visibility is not None) and not np.isfinite(visibility).any():
+            visibility = None
+        times = data["times"] if "times" in data.files else None
+        detected = data["detected"] if "detected" in data.files else None
+        if (fps is None) and ("fps" in data.files):
+            fps = float(data["fps"])
+        for name in ("width", "height"):
+            if (name in data.files) and (name not in settings):
+                settings[name] = int(data[name])
+    settings.setdefault("source", path)
+    return KeypointStream(positions, times, fps, detected, visibility, **settings)
+
+
+READERS = {".csv": read_csv, ".jsonl": read_jsonl, ".json": read_jsonl, ".npz": read_npz}
+
+
+def load(path: str, fps: float = None, **settings) -> KeypointStream:
+    """
+    :arg path: A CSV, JSON lines or NumPy file (see read_csv, read_jsonl and read_npz)
+    :arg fps: Frames per second, if the file doesn't tell
+    :arg settings: The other arguments of KeypointStream (width, height, normalized)
+
+    :return: The landmarks of the file
+    """
+    extension = path[path.rfind("."):].lower() if "." in path else ""
+    if extension not in READERS:
+        print(f"{extension} is not a valid input. Options are {list(READERS)}.")
+        raise ValueError(extension)
+    return READERS[extension](path, fps, **settings)
+
+
+class _KeypointCapture:
+    """
+    Answers the questions Exercise asks a cv2.VideoCapture (size, frame rate, number of frames, seeking),
+    for landmarks that have no video. There are no images to read
+    """
+
+    def __init__(self, stream: KeypointStream):
+        self.stream = stream
+        self.position = 0
+
+    def get(self, prop: int) -> float:
+        return {CAP_PROP_POS_MSEC: self.position / self.stream.fps * 1000, CAP_PROP_POS_FRAMES: self.position,
+                CAP_PROP_FRAME_WIDTH: self.stream.width, CAP_PROP_FRAME_HEIGHT: self.stream.height,
+                CAP_PROP_FPS: self.stream.fps, CAP_PROP_FRAME_COUNT: len(self.stream)}.get(prop, 0)
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == CAP_PROP_POS_MSEC:
+            value = round(value / 1000 * self.stream.fps)
+        elif prop != CAP_PROP_POS_FRAMES:
+            return False
+        self.position = int(min(max(0, value), len(self.stream)))
+        return True
+
+    def read(self) -> tuple:
+        return False, None
+
+    def isOpened(self) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
@@ -0,0 +1,153 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# On-disk cache of the landmarks found in a video, so that a video is only given once to MediaPipe
+
+import hashlib
+import os
+import numpy as np
+from solvingrt import VectorAnalysis as va
+from solvingrt import Buffers as bf
+
+
+class _LandmarkCache:
+
+    CHUNK = 1 << 20  # The video is hashed 1 MB at a time
+
+    # Hashes already computed in this process, keyed by (path, size, modification time)
+    _hashes = {}
+
+    def __init__(self, directory: str = None, max_size_mb: float = 500):
+        if directory is None:
+            directory = os.path.join(os.path.expanduser("~"), ".cache", "solvingrt")
+        self.directory = directory
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def video_hash(path: str) -> str:
+        """
+        :arg path: Path to the video
+
+        :return: The SHA-1 of the content of the video
+        """
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if memo_key not in _LandmarkCache._hashes:
+            sha = hashlib.sha1()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(_LandmarkCache.CHUNK), b""):
+                    sha.update(chunk)
+            _LandmarkCache._hashes[memo_key] = sha.hexdigest()
+        return _LandmarkCache._hashes[memo_key]
+
+    def key(self, path: str, width: int, height: int, settings: tuple) -> str:
+        """
+        The landmarks only depend on the content of the video, the size it is resized to and
+        the parameters given to MediaPipe. The measures, the athlete and the drawings don't matter
+
+        :arg path: Path to the video
+        :arg width: Width (pixels) the video is resized to
+        :arg height: Height (pixels) the video is resized to
+        :arg settings: The parameters of the _PoseDetector (see _PoseDetector.settings)
+
+        :return: The name under which the landmarks are stored
+        """
+        description = f"{_LandmarkCache.video_hash(path)}|{width}x{height}|{settings}"
+        return hashlib.sha1(description.encode()).hexdigest()
+
+    def _path_(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npz")
+
+    def load(self, key: str):
+        """
+        :arg key: The key given by the key method
+
+        :return: The (frames x 33 x 2) array of the landmarks (int32), the boolean array of the frames where
+        a person was found (see _VectorAnalysis.stack) and the (frames x 33) array of the visibility of the landmarks
+        (None if it wasn't stored), or None if the video isn't cached
+        """
+        path = _LandmarkCache._path_(self, key)
+        try:
+            with np.load(path) as data:
+                positions = data["positions"].astype(np.int32)
+                detected = data["detected"]
+                visibility = data["visibility"] if "visibility" in data.files else None
+        except (OSError, KeyError, ValueError):
+            # Missing, or corrupted by an interrupted write
+            return None
+        os.utime(path)  # Most recently used
+        return positions, detected, visibility
+
+    def save(self, key: str, landmarks: list) -> None:
+        """
+        Stores the landmarks, then removes the least recently used files if the cache is too big
+
+        :arg key: The key given by the key method
+        :arg landmarks: A Buffers._LandmarkBuffer, or a list (one element per frame) of the landmarks given by
+        _PoseDetector.find_position
+        """
+        if isinstance(landmarks, bf._LandmarkBuffer):
+            positions, detected, visibility = landmarks.positions(), landmarks.detected(), landmarks.visibilities()
+        else:
+            positions, detected = va._VectorAnalysis.stack(landmarks)
+            positions = positions.astype(np.int16)
+            visibility = np.full(positions.shape[:2], np.nan, dtype=np.float32)
+
+        path = _LandmarkCache._path_(self, key)
+        temp = path + f".{os.getpid()}.tmp"
+        with open(temp, "wb") as f:
+            np.savez_compressed(f, positions=positions, detected=detected, visibility=visibility)
+        os.replace(temp, path)  # Atomic, so a reader never sees half a file
+        _LandmarkCache.evict(self)
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used files until the cache fits in its maximum size
+        """
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                try:
+                    stat = os.stat(os.path.join(self.directory, name))
+                except OSError:
+                    continue
+                files += [(stat.st_mtime, stat.st_size, name)]
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """
+        Removes every cached video
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith(".npz"):
+                os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,174 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# Finds where the lift is in a video (e.g. without the setting-up and the rest around it) with a quick first pass,
+# so that the full analysis only runs on that part (see Exercise.find_lift)
+
+import cv2
+import numpy as np
+from solvingrt import Segmenter as sg
+
+
+def motion_energy(path: str, step: int = 2, width: int = 64) -> tuple:
+    """
+    How much the image changes over time, on small grayscale frames
+
+    :arg path: Path to the video
+    :arg step: Only one frame every step frames is compared (the others are skipped)
+    :arg width: Width (pixels) the frames are shrunk to
+
+    :return: The time (s) of each frame compared, the mean pixel difference (0 to 255) with the previous one,
+    and the length (s) of the video
+    """
+    video = cv2.VideoCapture(path)
+    fps = video.get(cv2.CAP_PROP_FPS) or 30
+    times, energy = [], []
+    previous = None
+    frame = 0
+    try:
+        while True:
+            if frame % step != 0:
+                # Skipped frames are only grabbed, not converted nor compared
+                if not video.grab():
+                    break
+                frame += 1
+                continue
+            success, image = video.read()
+            if not success:
+                break
+            height = max(1, round(image.shape[0] * width / image.shape[1]))
+            small = cv2.cvtColor(cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA),
+                                 cv2.COLOR_BGR2GRAY).astype(np.float32)
+            if previous is not None:
+                times += [frame / fps]
+                energy += [float(np.abs(small - previous).mean())]
+            previous = small
+            frame += 1
+    finally:
+        video.release()
+    return np.array(times), np.array(energy), frame / fps
+
+
+def active_window(times, activity, duration: float, threshold: float = None, max_gap: float = 2.0,
+                  padding: float = 1.0, smoothing: float = 0.5) -> tuple:
+    """
+    :arg times: Time (s) of each value
+    :arg activity: How much is happening at each time (e.g. motion_energy)
+    :arg duration: Length (s) of the video
+    :arg threshold: Activity above which something is happening. Default: a quarter of the way from the quiet
+    parts (10th percentile) to the busy parts (90th percentile)
+    :arg max_gap: Quiet moments shorter than this (s) are part of the lift (e.g. a pause between two reps)
+    :arg padding: Time (s) kept before and after the lift
+    :arg smoothing: Length (s) of the moving average applied to the activity
+
+    :return: (start, end) in seconds of the busiest active part of the video, None if nothing happens
+    """
+    times = np.asarray(times, dtype=np.float64)
+    activity = np.asarray(activity, dtype=np.float64)
+    if len(activity) < 2:
+        return None
+    spacing = float(np.median(np.diff(times))) or 1.0
+    width = max(1, int(round(smoothing / spacing)))
+    activity = np.convolve(activity, np.ones(width) / width, mode="same")
+    if threshold is None:
+        low, high = np.percentile(activity, [10, 90])
+        if high - low <= 1e-9:
+            return None
+        threshold = low + 0.25 * (high - low)
+    active = np.flatnonzero(activity > threshold)
+    if len(active) == 0:
+        return None
+
+    # Active samples closer than max_gap are in the same part, the part with the most activity is the lift
+    breaks = np.flatnonzero(np.diff(times[active]) > max_gap)
+    starts = np.concatenate(([0], breaks + 1))
+    ends = np.concatenate((breaks, [len(active) - 1]))
+    totals = [activity[active[a]:active[b] + 1].sum() for a, b in zip(starts, ends)]
+    best = int(np.argmax(totals))
+    start = times[active[starts[best]]] - padding
+    end = times[active[ends[best]]] + padding
+    return max(0.0, float(start)), min(float(duration), float(end))
+
+
+def by_motion(exercise, step: int = 2, padding: float = 1.0, max_gap: float = 2.0) -> tuple:
+    """
+    Finds the lift where the image changes the most (frame differencing, very fast but anything that moves counts)
+
+    :arg exercise: The Exercise whose video is searched
+    :arg step: Only one frame every step frames is compared
+    :arg padding: Time (s) kept before and after the lift
+    :arg max_gap: Longest pause (s) within the lift
+
+    :return: (start, end) in seconds, None if nothing moves
+    """
+    times, energy, duration = motion_energy(exercise.video, step)
+    return active_window(times, energy, duration, padding=padding, max_gap=max_gap)
+
+
+def by_pose(exercise, step: int = 6, padding: float = 1.0) -> tuple:
+    """
+    Finds the lift from the first to the last rep, with MediaPipe on one frame every step frames
+    (slower than by_motion, but only the joints of the exercise count)
+
+    :arg exercise: The Exercise whose video is searched (its MediaPipe settings are used)
+    :arg step: MediaPipe runs on one frame every step frames. The reps must last more than a few steps
+    :arg padding: Time (s) kept before and after the reps
+
+    :return: (start, end) in seconds, None if no rep is found
+    """
+    video = cv2.VideoCapture(exercise.video)
+    fps = video.get(cv2.CAP_PROP_FPS) or 30
+    if (exercise.width == 0) or (exercise.height == 0):
+        exercise.height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT) / 2)
+        exercise.width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH) / 2)
+    points = exercise._get_pose_landmarks_()
+    frames, angles = [], []
+    frame = 0
+    try:
+        while True:
+            if frame % step != 0:
+                if not video.grab():
+                    break
+                frame += 1
+                continue
+            success, image = video.read()
+            if not success:
+                break
+            if len(exercise.pose.find_position(cv2.resize(image, (exercise.width, exercise.height)))) > 0:
+                frames += [frame]
+                angles += [exercise.pose.find_angle(points)]
+            frame += 1
+    finally:
+        video.release()
+        exercise.pose.release()
+    min_range, _ = exercise.segmentation
+    segmenter = sg.RepSegmenter(exercise._get_muscle_info_("decreasing"), exercise._get_muscle_info_("conc_motion"),
+                                min_range, 1)
+    reps = segmenter.segment(frames, angles)
+    if len(reps) == 0:
+        return None
+    start = reps[0].start / fps - padding
+    end = reps[-1].end / fps + padding
+    return max(0.0, start), min(frame / fps, end)
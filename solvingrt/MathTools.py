@@ -145,8 +145,7 @@ def _standard_deviation(average: float, sample: list[float]) -> float:
 
     :return: The standard deviation
     """
-    n = 0.0
-    n += [((i - average) ** 2) for i in sample]
+    n = sum(((i - average) ** 2) for i in sample)
     return (n / len(sample)) ** (1/2)
 
 
@@ -156,7 +155,17 @@ def _average(data: list[float]) -> float:
 
     :return: The average of the data provided
     """
-    if len(data) == 0:
+    return _average_of(sum(data), len(data))
+
+
+def _average_of(total: float, count: int) -> float:
+    """
+    :arg total: Sum of the data
+    :arg count: Number of data
+
+    :return: The average of the data (see _average), when only their sum is kept (see Accumulators.Welford)
+    """
+    if count == 0:
         raise Exception("Division by zero. Often caused by video not restricted to the lift "
                         "(eg. the lifter preparing is included).")
-    return round((abs(sum(data)) / len(data)), 4)
+    return round((abs(total) / count), 4)
@@ -0,0 +1,633 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# The measures an Exercise can calculate, and the per-frame features (angle, velocity...) they are calculated from.
+# Other measures and features can be registered without changing solve.py (see register and register_feature)
+
+import math
+import numpy as np
+from solvingrt import Accumulators as ac
+from solvingrt import Buffers as bf
+from solvingrt import MathTools as mt
+from solvingrt import ResistanceProfile as rp
+from solvingrt import VectorAnalysis as vec
+
+JUMP = 4  # Measures sampled every JUMP frames (torque, power, speed), the others are sampled every frame
+
+# Features read from the arrays of VectorAnalysis.series when every landmark is known in advance (see Exercise.stream)
+SERIES = ("angle", "angle_gravity", "effective_length", "velocity", "torque", "power")
+
+FEATURES = {}  # Name: (function(pipeline, features) -> value, names of the features it needs)
+MEASURES = {}  # Name (lower case): Measure class. The summaries of the set are written in this order
+
+
+def register_feature(name: str, depends: tuple = ()):
+    """
+    Decorator of a function that calculates a feature of a frame, e.g.
+    @register_feature("angular_acceleration", depends=("velocity",))
+
+    :arg name: Name of the feature
+    :arg depends: Names of the features it needs. "frame" (number of the frame) and "landmarks" are always known
+
+    :return: The decorator, which gives back the function unchanged
+    """
+    def decorator(function):
+        FEATURES[name] = (function, tuple(depends))
+        return function
+    return decorator
+
+
+def register(measure_class):
+    """
+    Decorator of a subclass of Measure, which can then be given to Exercise with its name
+
+    :arg measure_class: The Measure
+
+    :return: The class, unchanged
+    """
+    MEASURES[measure_class.name.lower()] = measure_class
+    return measure_class
+
+
+def rep_average(segment, name: str) -> float:
+    """
+    :arg segment: A rep (Segmenter.Rep)
+    :arg name: Name of a value sampled during the rep
+
+    :return: The average of the value over the rep (see MathTools._average)
+    """
+    moments = segment.stats.get(name)
+    if moments is None:
+        return mt._average_of(0.0, 0)
+    return mt._average_of(moments.total, moments.count)
+
+
+class Measure:
+    """
+    A measure samples values on some frames (averaged over each rep by the rep detection), then gives the data of
+    each rep and of the set. Subclasses set the class attributes and override the methods they need
+    """
+
+    name = ""
+    features = ()  # Features of the frame it needs (see FEATURES)
+    every = 1  # Sampled on the frames whose number is a multiple of every
+    values = ()  # Names of the values it samples
+    statistics = True  # The values it samples are added to Exercise.statistics
+    accumulators = {}  # Name of a value: class (or function) that accumulates it over a rep, Welford by default
+
+    def __init__(self, pipeline):
+        """
+        :arg pipeline: The _Pipeline of the analysis (exercise, analysis, frame_rate, concentric_motion...)
+        """
+        self.pipeline = pipeline
+
+    def start(self) -> None:
+        """
+        Called before the first frame of the video
+        """
+
+    def sample(self, features: dict, values: dict) -> None:
+        """
+        :arg features: The features of the frame
+        :arg values: Where the values of the frame are added
+        """
+
+    def sample_many(self, features: dict, values: dict) -> None:
+        """
+        Same as sample, for every frame the measure is sampled on at once (see _Pipeline.measure_all). A measure
+        that overrides sample without overriding sample_many is sampled one frame at a time
+
+        :arg features: An array of each feature, with one value per frame ("landmarks" is a (frames x 33 x 2) array)
+        :arg values: Where the array of each value is added, NaN on the frames where it isn't sampled
+        (a tuple of arrays for a tuple value)
+        """
+
+    def rep(self, segment, result) -> None:
+        """
+        :arg segment: The rep (Segmenter.Rep), with the statistics of the values sampled during it
+        :arg result: The Results.RepResult of the rep, where the data of the rep is added
+        """
+
+    def summary(self, summary: dict) -> None:
+        """
+        :arg summary: The data of the set, where the data of this measure is added
+        """
+
+
+@register_feature("angle")
+def _angle_(pipeline, features: dict) -> float:
+    return pipeline.analysis.angle()
+
+
+@register_feature("angle_gravity")
+def _angle_gravity_(pipeline, features: dict) -> float:
+    return pipeline.analysis.angle_gravity()
+
+
+@register_feature("effective_length")
+def _effective_length_(pipeline, features: dict) -> float:
+    return pipeline.exercise.pose.find_length(pipeline.points)
+
+
+@register_feature("velocity", depends=("angle",))
+def _velocity_(pipeline, features: dict) -> float:
+    if len(pipeline.angles) < 4:
+        return 0.0  # The person was found on too few frames yet to look back
+    return float(pipeline.analysis.speed(pipeline.angles.values(), pipeline.times.values()))
+
+
+@register_feature("torque", depends=("effective_length",))
+def _torque_(pipeline, features: dict) -> float:
+    return pipeline.analysis.torque(features["effective_length"])
+
+
+@register_feature("power", depends=("velocity", "effective_length"))
+def _power_(pipeline, features: dict) -> float:
+    return pipeline.analysis.power(features["velocity"], features["effective_length"])
+
+
+@register
+class Torque(Measure):
+    name = "torque"
+    features = ("torque",)
+    every = JUMP
+    values = ("torque",)
+
+    def sample(self, features: dict, values: dict) -> None:
+        values["torque"] = features["torque"]
+
+    def sample_many(self, features: dict, values: dict) -> None:
+        values["torque"] = features["torque"]
+
+    def rep(self, segment, result) -> None:
+        result["torque"] = rep_average(segment, "torque")
+
+
+@register
+class Power(Measure):
+    name = "power"
+    features = ("power",)
+    every = JUMP
+    values = ("conc_power", "ecc_power")
+
+    def sample(self, features: dict, values: dict) -> None:
+        power = features["power"]
+        if self.pipeline.concentric_motion:
+            values["conc_power" if power < 0 else "ecc_power"] = power
+        else:
+            values["conc_power" if power > 0 else "ecc_power"] = power
+
+    def sample_many(self, features: dict, values: dict) -> None:
+        power = features["power"]
+        concentric = power < 0 if self.pipeline.concentric_motion else power > 0
+        values["conc_power"] = np.where(concentric, power, np.nan)
+        values["ecc_power"] = np.where(concentric, np.nan, power)
+
+    def rep(self, segment, result) -> None:
+        result["conc_power"] = rep_average(segment, "conc_power")
+        result["ecc_power"] = rep_average(segment, "ecc_power")
+
+
+@register
+class Work(Power):
+    name = "work"
+
+    def rep(self, segment, result) -> None:
+        result["work"] = rep_average(segment, "conc_power") * (segment.max_angle - segment.min_angle)
+
+
+@register
+class Speed(Measure):
+    name = "speed"
+    features = ("velocity",)
+    every = JUMP
+    values = ("conc_velocity", "ecc_velocity")
+
+    def sample(self, features: dict, values: dict) -> None:
+        velocity = features["velocity"]
+        if self.pipeline.concentric_motion:
+            values["conc_velocity" if velocity < 0 else "ecc_velocity"] = velocity
+        else:
+            values["conc_velocity" if velocity > 0 else "ecc_velocity"] = velocity
+
+    def sample_many(self, features: dict, values: dict) -> None:
+        velocity = features["velocity"]
+        concentric = velocity < 0 if self.pipeline.concentric_motion else velocity > 0
+        values["conc_velocity"] = np.where(concentric, velocity, np.nan)
+        values["ecc_velocity"] = np.where(concentric, np.nan, velocity)
+
+    def rep(self, segment, result) -> None:
+        result["conc_velocity"] = rep_average(segment, "conc_velocity")
+        result["ecc_velocity"] = rep_average(segment, "ecc_velocity")
+
+
+@register
+class Parallel(Measure):
+    name = "parallel"
+    values = ("parallel",)
+    statistics = False
+
+    def __init__(self, pipeline):
+        Measure.__init__(self, pipeline)
+        if "squat" not in pipeline.exercise.name.lower():
+            print(f"{self.name} is not a valid input.")
+            raise ValueError(self.name)
+
+    def sample(self, features: dict, values: dict) -> None:
+        landmarks, points = features["landmarks"], self.pipeline.points
+        muscle = self.pipeline.exercise.muscle.lower()
+        if (muscle == "quadriceps") or (muscle == "hamstrings"):
+            if landmarks[points[0]][1] >= landmarks[points[1]][1]:
+                values["parallel"] = 1
+        elif muscle == "glutes":
+            if landmarks[points[1]][1] >= landmarks[points[2]][1]:
+                values["parallel"] = 1
+
+    def sample_many(self, features: dict, values: dict) -> None:
+        landmarks, points = features["landmarks"], self.pipeline.points
+        muscle = self.pipeline.exercise.muscle.lower()
+        if (muscle == "quadriceps") or (muscle == "hamstrings"):
+            low = landmarks[:, points[0], 1] >= landmarks[:, points[1], 1]
+        elif muscle == "glutes":
+            low = landmarks[:, points[1], 1] >= landmarks[:, points[2], 1]
+        else:
+            return
+        values["parallel"] = np.where(low, 1.0, np.nan)
+
+    def rep(self, segment, result) -> None:
+        result["parallel"] = "parallel" in segment.stats
+
+
+@register
+class Tempo(Measure):
+    name = "tempo"
+
+    def rep(self, segment, result) -> None:
+        result["concentric_time"] = segment.phase("concentric").frames() * self.pipeline.frame_rate
+        result["eccentric_time"] = segment.phase("eccentric").frames() * self.pipeline.frame_rate
+
+
+@register
+class TimeUnderTension(Measure):
+    name = "time under tension"
+    features = ("effective_length",)
+
+    def start(self) -> None:
+        self.frames = 0  # Frames under significant tension
+
+    def sample(self, features: dict, values: dict) -> None:
+        self.frames += self.pipeline.analysis.time_under_tension(features["effective_length"])
+
+    def sample_many(self, features: dict, values: dict) -> None:
+        self.frames += int(vec._VectorAnalysis.time_under_tension(features["effective_length"]).sum())
+
+    def summary(self, summary: dict) -> None:
+        summary["time_under_tension"] = self.frames * self.pipeline.frame_rate
+
+
+@register
+class Angles(Measure):
+    name = "angles"
+    features = ("angle",)
+
+    def start(self) -> None:
+        self.range = ac.MinMax()
+
+    def sample(self, features: dict, values: dict) -> None:
+        self.range.add(features["angle"])
+
+    def sample_many(self, features: dict, values: dict) -> None:
+        self.range.add_many(features["angle"])
+
+    def rep(self, segment, result) -> None:
+        result["min_angle"] = segment.min_angle
+        result["max_angle"] = segment.max_angle
+
+    def summary(self, summary: dict) -> None:
+        summary["min_angle"] = float(self.range.min)
+        summary["max_angle"] = float(self.range.max)
+
+
+@register
+class VelocityLost(Speed):
+    name = "velocity lost"
+
+    def start(self) -> None:
+        self.concentric_speed = ac.MinMax()  # Average concentric velocity of the reps
+
+    def rep(self, segment, result) -> None:
+        Speed.rep(self, segment, result)
+        self.concentric_speed.add(result["conc_velocity"])
+
+    def summary(self, summary: dict) -> None:
+        if summary["reps"] > 0:
+            max_vel = self.concentric_speed.max
+            min_vel = self.concentric_speed.min
+            summary["velocity_lost"] = ((max_vel - min_vel) / max_vel) * 100
+
+
+@register
+class ResistanceProfileMeasure(Measure):
+    name = "resistance profile"
+    features = ("angle", "torque")
+    values = ("resistance profile",)
+    statistics = False
+
+    def __init__(self, pipeline):
+        Measure.__init__(self, pipeline)
+        bin_width = pipeline.exercise.profile_settings[0]
+        # The torque of each rep is binned by angle, and added to the profile of the set once the rep is complete
+        self.accumulators = {"resistance profile": lambda: rp.ResistanceProfile(bin_width)}
+
+    def start(self) -> None:
+        exercise = self.pipeline.exercise
+        exercise.torque_profile = rp.ResistanceProfile(exercise.profile_settings[0], label=exercise.name)
+
+    def sample(self, features: dict, values: dict) -> None:
+        values["resistance profile"] = (features["angle"], features["torque"])
+
+    def sample_many(self, features: dict, values: dict) -> None:
+        values["resistance profile"] = (features["angle"], features["torque"])
+
+    def rep(self, segment, result) -> None:
+        if "resistance profile" in segment.stats:
+            self.pipeline.exercise.torque_profile.merge(segment.stats["resistance profile"])
+
+    def summary(self, summary: dict) -> None:
+        if self.pipeline.exercise.profile_settings[1]:
+            self.pipeline.analysis.resistance_profile(self.pipeline.exercise.torque_profile)
+
+
+class _Step:
+
+    def __init__(self, features: list, measures: list):
+        self.features = features  # (name, function) in the order they are calculated
+        self.measures = measures  # Measures sampled on this frame
+
+
+class _Pipeline:
+    """
+    The measures of an Exercise, compiled once: for each frame, the features that some measure sampled on that
+    frame needs, in an order where every feature comes after the ones it depends on. Each feature is calculated
+    at most once per frame, and not at all if no measure needs it on that frame. The angle is always calculated,
+    it is needed to count the reps
+    """
+
+    def __init__(self, exercise, analysis, points: list, concentric_motion: bool):
+        """
+        :arg exercise: The Exercise
+        :arg analysis: Its VideoAnalysis._VideoAnalysis
+        :arg points: The three joints to follow
+        :arg concentric_motion: True if the rep starts with the concentric phase (see Exercise._get_muscle_info_)
+        """
+        self.exercise = exercise
+        self.analysis = analysis
+        self.points = points
+        self.concentric_motion = concentric_motion
+        self.frame_rate = 0
+        self.series = {}
+        self.measures = []
+        for name in exercise.measures:
+            name = name.lower()
+            if name not in MEASURES:
+                print(f"{name} is not a valid input.")
+                raise ValueError(name)
+            if name not in [measure.name.lower() for measure in self.measures]:
+                self.measures += [MEASURES[name](self)]
+        self.names = [measure.name.lower() for measure in self.measures]
+        self.accumulators = {}
+        self.no_statistics = set()
+        for measure in self.measures:
+            self.accumulators.update(measure.accumulators)
+            if not measure.statistics:
+                self.no_statistics.update(measure.values)
+
+        # Every measure is sampled on the same frames every period frames
+        self.period = 1
+        for measure in self.measures:
+            self.period = self.period * measure.every // math.gcd(self.period, measure.every)
+        self.steps = []
+        for remainder in range(self.period):
+            sampled = [measure for measure in self.measures if remainder % measure.every == 0]
+            order = []
+            for measure in sampled:
+                for feature in measure.features:
+                    _Pipeline._resolve_(feature, order, [])
+            order = [name for name in order if name != "angle"]  # Calculated first, on every frame
+            self.steps += [_Step([(name, FEATURES[name][0]) for name in order], sampled)]
+        # The velocity looks back a few frames, so the angle of every frame is kept if any frame needs it
+        self.history = any(name == "velocity" for step in self.steps for name, _ in step.features)
+        self.angle = FEATURES["angle"][0]
+        self.times, self.angles = None, None
+
+    @staticmethod
+    def _resolve_(name: str, order: list, visiting: list) -> None:
+        """
+        Adds a feature to order, after the features it depends on
+
+        :arg name: The feature
+        :arg order: The features already ordered
+        :arg visiting: The features whose dependencies are being added, to find cycles
+        """
+        if name in order:
+            return
+        if name not in FEATURES:
+            print(f"{name} is not a valid input. Options are {list(FEATURES)}.")
+            raise ValueError(name)
+        if name in visiting:
+            raise Exception(f"The features {visiting} depend on each other")
+        for dependency in FEATURES[name][1]:
+            _Pipeline._resolve_(dependency, order, visiting + [name])
+        order += [name]
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self.names
+
+    def start(self, frame_rate: float, series: dict = None) -> None:
+        """
+        Called before the first frame
+
+        :arg frame_rate: FRAME_RATE of the video
+        :arg series: The features of every frame (see VectorAnalysis.series) if they are known in advance
+        """
+        self.frame_rate = frame_rate
+        self.series = {} if series is None else {name: series[name] for name in SERIES if name in series}
+        # Time and angle of the last frames where a person was found, as many as _VideoAnalysis.speed looks back
+        self.times, self.angles = bf._RingBuffer(4), bf._RingBuffer(4)
+        for measure in self.measures:
+            measure.start()
+
+    def step(self, frame: int, landmarks: list) -> tuple:
+        """
+        :arg frame: Number of the frame (the first one is 1)
+        :arg landmarks: The landmarks of the frame, where a person was found
+
+        :return: The angle of the moving joint, and the values sampled on this frame
+        """
+        features = {"frame": frame, "landmarks": landmarks}
+        series = self.series
+        angle = series["angle"][frame - 1] if "angle" in series else self.angle(self, features)
+        features["angle"] = angle
+        if self.history:
+            self.times.append(frame * self.frame_rate)
+            self.angles.append(angle)
+        step = self.steps[frame % self.period]
+        for name, function in step.features:
+            features[name] = series[name][frame - 1] if name in series else function(self, features)
+        values = {}
+        for measure in step.measures:
+            measure.sample(features, values)
+        return angle, values
+
+    def vectorized(self) -> bool:
+        """
+        :return: True if every measure can be sampled on every frame at once (see Measure.sample_many), from the
+        features of VectorAnalysis.series
+        """
+        for measure in self.measures:
+            sample = next(cls for cls in type(measure).__mro__ if "sample" in vars(cls))
+            sample_many = next(cls for cls in type(measure).__mro__ if "sample_many" in vars(cls))
+            if not issubclass(sample_many, sample):
+                return False
+            if any(name not in SERIES for name in measure.features):
+                return False
+        return True
+
+    def measure_all(self, segmenter, series: dict, landmarks, detected) -> tuple:
+        """
+        Same as step and segmenter.update on every frame, then segmenter.flush, with every frame at once: the values
+        are sampled on every frame (see Measure.sample_many), the reps are found by segmenter.segment, and the
+        values of each rep are added to its statistics at once. Called after start, when vectorized
+
+        :arg segmenter: The Segmenter.RepSegmenter of the analysis
+        :arg series: The features of every frame (see VectorAnalysis.series)
+        :arg landmarks: (frames x 33 x 2) array of the landmarks of every frame
+        :arg detected: True for the frames where a person was found
+
+        :return: The reps (Segmenter.Rep, with the statistics of the values sampled during each), and the statistics
+        of the angle and of the values sampled (see Exercise.statistics)
+        """
+        found = np.flatnonzero(detected)
+        frames = found + 1  # The first frame is 1, like in step
+        angles = series["angle"][found]
+        columns = {}  # Name of a value: its array (or tuple of arrays) on the frames where a person was found
+        for measure in self.measures:
+            sampled = np.flatnonzero(frames % measure.every == 0)
+            features = {"frame": frames[sampled], "landmarks": landmarks[found[sampled]], "angle": angles[sampled]}
+            for name in measure.features:
+                features[name] = series[name][found[sampled]]
+            values = {}
+            measure.sample_many(features, values)
+            for name, value in values.items():
+                columns[name] = _Pipeline._spread_(value, sampled, len(found), columns.get(name))
+        present = {name: _Pipeline._present_(column) for name, column in columns.items()}
+
+        statistics = {"angle": ac.Summary()}
+        statistics["angle"].add_many(angles)
+        # In the order they are first sampled, like with step
+        for name in sorted(columns, key=lambda name: np.argmax(present[name]) if present[name].any() else len(found)):
+            if (name not in self.no_statistics) and present[name].any():
+                statistics[name] = ac.Summary()
+                _Pipeline._add_many_(statistics[name], columns[name], present[name])
+
+        reps = segmenter.segment(frames, angles)
+        last_end = None
+        for segment in reps:
+            # The frame where a rep starts belongs to the rep before it, if there is one (see RepSegmenter._close_)
+            first = np.searchsorted(frames, segment.start, side="right" if segment.start == last_end else "left")
+            last = np.searchsorted(frames, segment.end, side="right")
+            last_end = segment.end
+            for name, column in columns.items():
+                kept = present[name][first:last]
+                if kept.any():
+                    segment.stats[name] = self.accumulators.get(name, ac.Welford)()
+                    part = tuple(values[first:last] for values in column) if isinstance(column, tuple) else \
+                        column[first:last]
+                    _Pipeline._add_many_(segment.stats[name], part, kept)
+        return reps, statistics
+
+    @staticmethod
+    def _spread_(value, sampled, frames: int, column=None):
+        """
+        :arg value: Array (or tuple of arrays) of a value on the frames sampled
+        :arg sampled: Indices of those frames among the frames where a person was found
+        :arg frames: Number of frames where a person was found
+        :arg column: The same value given by another measure, kept where this one isn't sampled
+
+        :return: The value on every frame where a person was found, NaN where it isn't sampled
+        """
+        if isinstance(value, tuple):
+            return tuple(_Pipeline._spread_(part, sampled, frames, None if column is None else column[i])
+                         for i, part in enumerate(value))
+        full = np.full(frames, np.nan) if column is None else column.copy()
+        value = np.broadcast_to(np.asarray(value, dtype=np.float64), len(sampled))
+        sampled_here = ~np.isnan(value)
+        full[sampled[sampled_here]] = value[sampled_here]
+        return full
+
+    @staticmethod
+    def _present_(column):
+        """
+        :return: True for the frames where the value (every part of a tuple value) was sampled
+        """
+        if isinstance(column, tuple):
+            return np.logical_and.reduce([~np.isnan(part) for part in column])
+        return ~np.isnan(column)
+
+    @staticmethod
+    def _add_many_(stats, column, kept) -> None:
+        """
+        Adds the values sampled to an accumulator, at once if it has an add_many method, one by one if not
+
+        :arg stats: The accumulator
+        :arg column: Array (or tuple of arrays) of the value
+        :arg kept: True for the frames where it was sampled
+        """
+        parts = column if isinstance(column, tuple) else (column,)
+        parts = [part[kept] for part in parts]
+        if hasattr(stats, "add_many"):
+            stats.add_many(*parts)
+        elif isinstance(column, tuple):
+            for value in zip(*(part.tolist() for part in parts)):
+                stats.add(value)
+        else:
+            for value in parts[0].tolist():
+                stats.add(value)
+
+    def rep(self, segment, result) -> None:
+        """
+        :arg segment: A rep (Segmenter.Rep)
+        :arg result: Its Results.RepResult, given the data of each measure in the order they were asked for
+        """
+        for measure in self.measures:
+            measure.rep(segment, result)
+
+    def summary(self, summary: dict) -> None:
+        """
+        :arg summary: The data of the set, given the data of each measure in the order they were registered
+        """
+        for name in MEASURES:
+            if name in self.names:
+                self.measures[self.names.index(name)].summary(summary)
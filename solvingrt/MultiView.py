@@ -0,0 +1,276 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# The same set filmed by several cameras (e.g. one from the side and one from the front), analysed at once
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from solvingrt import LiftWindow as lw
+from solvingrt import Results as rs
+
+
+def estimate_offset(reference: str, other: str, max_lag: float = 10.0, step: int = 1) -> float:
+    """
+    Finds how much later a video started than another one, by matching how much the image changes over time
+    (see LiftWindow.motion_energy). Both videos must show the same movement
+
+    :arg reference: Path to the video whose clock is used
+    :arg other: Path to the other video
+    :arg max_lag: Largest offset (s) searched, in both directions
+    :arg step: Only one frame every step frames is compared
+
+    :return: The time (s) on the clock of the reference when the other video starts
+    """
+    ref_times, ref_energy, ref_duration = lw.motion_energy(reference, step)
+    times, energy, duration = lw.motion_energy(other, step)
+    if (len(ref_times) < 2) or (len(times) < 2):
+        raise Exception(f"Can't read {reference if len(ref_times) < 2 else other}")
+    # Both signals are resampled at the same rate, then normalized so that a bright video doesn't weigh more
+    period = max(ref_times[1] - ref_times[0], times[1] - times[0])
+    a = np.interp(np.arange(0, ref_duration, period), ref_times, ref_energy)
+    b = np.interp(np.arange(0, duration, period), times, energy)
+    a = (a - a.mean()) / (a.std() or 1)
+    b = (b - b.mean()) / (b.std() or 1)
+    # correlation[k] compares a[n + lag] with b[n], where lag = k - (len(b) - 1)
+    correlation = np.correlate(a, b, "full")
+    lags = np.arange(len(correlation)) - (len(b) - 1)
+    # The sum is divided by the number of samples that overlap, so that small overlaps aren't penalized
+    overlap = np.minimum(len(a), len(b) + lags) - np.maximum(0, lags)
+    correlation = correlation / np.maximum(1, overlap)
+    # Too short an overlap correlates by chance
+    allowed = (np.abs(lags) * period <= max_lag) & (overlap >= min(len(a), len(b)) // 4)
+    if not allowed.any():
+        raise Exception("The videos don't overlap enough to be matched")
+    best = np.flatnonzero(allowed)[np.argmax(correlation[allowed])]
+    return float(lags[best] * period)
+
+
+class MultiView:
+    """
+    One set filmed by several cameras. Each view is an Exercise with its own video and Athlete
+    (e.g. side_seen="right" for the side camera, side_seen="front" for the front one) and its own measures.
+    The views are analysed at the same time, then their reps are matched by time and merged into one result
+    """
+
+    def __init__(self, views: dict, offsets: dict = None):
+        """
+        :arg views: {name: Exercise}. The first view is the reference: the clock and the frames of the result
+        are the ones of its video, and its measures are preferred when several views have them
+        :arg offsets: {name: time (s) on the clock of the reference when the video of that view starts}.
+        Missing views have an offset of 0 (the videos started at the same time), see synchronize
+        """
+        if len(views) == 0:
+            raise Exception("At least one view is needed")
+        self.views = dict(views)
+        self.offsets = {name: 0.0 for name in self.views}
+        if offsets is not None:
+            for name, offset in offsets.items():
+                if name not in self.views:
+                    print(f"{name} is not a valid input. Options are {list(self.views)}.")
+                    raise ValueError(name)
+                self.offsets[name] = float(offset)
+        self.reps = {}  # Results.RepResult of each view
+        self.results = None
+        self.seconds = {}  # Time (s) taken by the analysis of each view
+
+    def reference(self) -> str:
+        """
+        :return: The name of the view whose clock is used
+        """
+        return next(iter(self.views))
+
+    def synchronize(self, max_lag: float = 10.0, step: int = 1) -> dict:
+        """
+        Finds the offset of every view from the motion in the videos, for cameras that weren't started together
+
+        :arg max_lag: Largest offset (s) searched
+        :arg step: Only one frame every step frames is compared
+
+        :return: The offset (s) of each view
+        """
+        reference = self.reference()
+        for name, exercise in self.views.items():
+            if name != reference:
+                self.offsets[name] = estimate_offset(self.views[reference].video, exercise.video, max_lag, step)
+        return dict(self.offsets)
+
+    def analyse(self, workers: int = None, keep_landmarks: bool = False) -> rs.SetResult:
+        """
+        Analyses every view at the same time, one worker thread per view. MediaPipe and the decoding of the videos
+        release the GIL, so the views run in parallel and take about as long as the slowest one.
+        The views aren't displayed
+
+        :arg workers: Number of views analysed at the same time. Default: every view
+        :arg keep_landmarks: Keep the landmarks of every frame (see landmarks)
+
+        :return: The merged Results.SetResult (see merge)
+        """
+        for exercise in self.views.values():
+            exercise.headless()  # Windows can only be shown from the main thread
+            exercise.keep_landmarks = exercise.keep_landmarks or keep_landmarks
+        with ThreadPoolExecutor(max_workers=workers or len(self.views)) as pool:
+            futures = {name: pool.submit(_analyse_view_, exercise) for name, exercise in self.views.items()}
+            for name, future in futures.items():
+                self.reps[name], self.seconds[name] = future.result()
+        self.results = MultiView.merge(self)
+        return self.results
+
+    def rep_times(self, name: str, rep: rs.RepResult) -> tuple:
+        """
+        :arg name: The view
+        :arg rep: A rep of that view
+
+        :return: (start, end) in seconds on the clock of the reference
+        """
+        segment = rep.segment
+        start = segment.start if segment is not None else rep.frame
+        return (MultiView.frame_time(self, name, start),
+                MultiView.frame_time(self, name, segment.end if segment is not None else rep.frame))
+
+    def frame_time(self, name: str, frame: int) -> float:
+        """
+        :arg name: The view
+        :arg frame: A frame of the analysis of that view (the first frame analysed is 1)
+
+        :return: The time (s) of that frame on the clock of the reference
+        """
+        exercise = self.views[name]
+        return (exercise.first_frame + frame - 1) * exercise.frame_period + self.offsets[name]
+
+    def time_frame(self, name: str, seconds: float) -> int:
+        """
+        :arg name: The view
+        :arg seconds: A time on the clock of the reference
+
+        :return: The frame of the analysis of that view shown at that time
+        """
+        exercise = self.views[name]
+        return int(round((seconds - self.offsets[name]) / exercise.frame_period)) - exercise.first_frame + 1
+
+    def merge(self, min_overlap: float = 0.5) -> rs.SetResult:
+        """
+        Matches the reps of the views by time: two reps are the same if they overlap for at least min_overlap
+        of the shorter one. A rep seen by only one view is kept.
+        Each measure is given under its own name (from the first view that has it) and once per view, prefixed by
+        the name of the view (e.g. "side_torque", "front_max_angle"). "start_time" and "end_time" are on the clock
+        of the reference
+
+        :arg min_overlap: Fraction (0 to 1) of the shorter rep during which the two reps must overlap
+
+        :return: One Results.SetResult with a row per rep
+        """
+        reference = self.reference()
+        groups = []  # [start, end, {view: rep}], the times are the ones of the first view that saw the rep
+        for name in self.views:
+            for rep in self.reps.get(name, []):
+                start, end = MultiView.rep_times(self, name, rep)
+                best, best_overlap = None, min_overlap
+                for group in groups:
+                    if name in group[2]:
+                        continue
+                    overlap = min(end, group[1]) - max(start, group[0])
+                    shortest = min(end - start, group[1] - group[0])
+                    overlap = overlap / shortest if shortest > 0 else float(overlap >= 0)
+                    if overlap >= best_overlap:
+                        best, best_overlap = group, overlap
+                if best is None:
+                    groups += [[start, end, {name: rep}]]
+                else:
+                    best[2][name] = rep
+        groups.sort(key=lambda group: group[0])
+
+        rep_results = []
+        for number, (start, end, reps) in enumerate(groups, start=1):
+            values = {"start_time": start, "end_time": end}
+            for name, rep in reps.items():
+                for measure, value in rep.values.items():
+                    values.setdefault(measure, value)
+            for name, rep in reps.items():
+                for measure, value in rep.values.items():
+                    values[f"{name}_{measure}"] = value
+            first = next(iter(reps))
+            rep_results += [rs.RepResult(number, MultiView.time_frame(self, reference, end), values,
+                                         reps[first].segment)]
+
+        summary = {"reps": len(groups)}
+        for name, exercise in self.views.items():
+            if exercise.results is None:
+                continue
+            for key, value in exercise.results.summary.items():
+                if key != "reps":
+                    summary.setdefault(key, value)
+            for key, value in exercise.results.summary.items():
+                summary[f"{name}_{key}"] = value
+        info = {"views": {name: exercise.info() for name, exercise in self.views.items()},
+                "offsets": dict(self.offsets), "reference": reference}
+        return rs.SetResult(rep_results, summary, info)
+
+    def landmarks(self, period: float = None) -> tuple:
+        """
+        The landmarks of every view on the same timeline, e.g. to combine the side and the front views of a frame.
+        Each time is given the frame of each view shown at that time (the nearest one).
+        Needs analyse(keep_landmarks=True)
+
+        :arg period: Time (s) between two frames of the timeline. Default: the frames of the reference
+
+        :return: The times (s, on the clock of the reference), and {view: (positions, detected)} with positions of
+        shape (times, 33, 2) and detected of shape (times,). Times before or after a video are not detected
+        """
+        reference = self.reference()
+        for name, exercise in self.views.items():
+            if not exercise.keep_landmarks:
+                raise Exception(f"The landmarks of {name} weren't kept, use analyse(keep_landmarks=True)")
+        first = self.views[reference]
+        period = first.frame_period if period is None else period
+        start = MultiView.frame_time(self, reference, 1)
+        times = start + np.arange(len(first.landmarks)) * first.frame_period
+        if period != first.frame_period:
+            times = np.arange(times[0], times[-1] + period / 2, period) if len(times) > 0 else times
+        aligned = {}
+        for name, exercise in self.views.items():
+            positions, detected = exercise.landmarks.xy, exercise.landmarks.found
+            count = len(exercise.landmarks)
+            frames = np.array([MultiView.time_frame(self, name, t) for t in times], dtype=np.int64) - 1
+            inside = (frames >= 0) & (frames < count)
+            index = np.clip(frames, 0, max(0, count - 1))
+            view_positions = np.zeros((len(times), 33, 2), dtype=np.float32)
+            view_detected = np.zeros(len(times), dtype=bool)
+            if count > 0:
+                view_positions[inside] = positions[index[inside]]
+                view_detected[inside] = detected[index[inside]]
+            aligned[name] = (view_positions, view_detected)
+        return times, aligned
+
+
+def _analyse_view_(exercise) -> tuple:
+    """
+    :arg exercise: The Exercise of one view
+
+    :return: The Results.RepResult of each rep, and the time (s) the analysis took
+    """
+    start = time.perf_counter()
+    reps = [result for result in exercise.iter_reps() if result.type == "rep"]
+    return reps, time.perf_counter() - start
@@ -22,16 +22,31 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import mediapipe as mp
 import cv2
 import math
+import time
+import numpy as np
 from solvingrt import MathTools
 
+# Arguments of mp.solutions.pose.Pose, in the order of _PoseDetector.graph_settings
+GRAPH_ARGUMENTS = ["static_image_mode", "model_complexity", "enable_segmentation", "smooth_segmentation",
+                   "min_detection_confidence", "min_tracking_confidence"]
+
+
+def build_graph(graph_settings: tuple):
+    """
+    :arg graph_settings: The arguments of the graph (see GRAPH_ARGUMENTS)
+
+    :return: A new MediaPipe Pose graph
+    """
+    import mediapipe as mp  # Only loaded when a graph is needed, it takes a while
+    return mp.solutions.pose.Pose(**dict(zip(GRAPH_ARGUMENTS, graph_settings)))
+
 
 class _PoseDetector:
 
     def __init__(self, exercise, static_image_mode=False, model_complexity=1,
-                 enable_segmentation=True, smooth_segmentation=True,
+                 enable_segmentation=False, smooth_segmentation=True,
                  min_detection_confidence=0.4, min_tracking_confidence=0.4):
         self.exercise = exercise
         self.side_seen = self.exercise.athlete.side_seen
@@ -43,12 +58,93 @@ class _PoseDetector:
         self.smooth_segmentation = smooth_segmentation
         self.min_detection_confidence = min_detection_confidence
         self.min_tracking_confidence = min_tracking_confidence
-        self.pose = mp.solutions.pose.Pose(static_image_mode=self.static_image_mode,
-                                           model_complexity=self.model_complexity,
-                                           enable_segmentation=self.enable_segmentation,
-                                           smooth_segmentation=self.smooth_segmentation,
-                                           min_detection_confidence=self.min_detection_confidence,
-                                           min_tracking_confidence=self.min_tracking_confidence)
+        self.inference_width = None  # Frames wider than this (pixels) are shrunk before MediaPipe, None to not shrink
+        # The MediaPipe graph is only built when the first frame is processed, so that a graph that is
+        # already loaded (see Batch) can be given instead
+        self.pose = None
+        self.pool = None  # Where the graph comes from and goes back to, None to own the graph (see PosePool)
+        self.positions = []
+        self.visibility = None  # Visibility (0 to 1) of each landmark of the last frame, None if no person was found
+        # Region of interest: only the part of the frame around the person is given to MediaPipe (see track)
+        self.roi_padding = None
+        self.box = None  # (x0, y0, x1, y1) in pixels, None when the person isn't tracked
+
+    def build(self):
+        """
+        :return: A new MediaPipe Pose graph with the settings of this detector
+        """
+        return build_graph(_PoseDetector.graph_settings(self))
+
+    def graph_settings(self) -> tuple:
+        """
+        :return: The arguments of the MediaPipe graph. Two detectors with the same graph settings can share a graph
+        """
+        return (self.static_image_mode, self.model_complexity, self.enable_segmentation, self.smooth_segmentation,
+                self.min_detection_confidence, self.min_tracking_confidence)
+
+    def settings(self) -> tuple:
+        """
+        :return: The parameters given to MediaPipe. Two detectors with the same settings find the same landmarks
+        """
+        return _PoseDetector.graph_settings(self) + (self.roi_padding, self.inference_width)
+
+    def configure(self, model_complexity: int = None, enable_segmentation: bool = None,
+                  inference_width: int = 0) -> None:
+        """
+        Changes the settings of MediaPipe. The graph is built again (or taken from the pool) on the next frame
+        if it needs to
+
+        :arg model_complexity: 0, 1 or 2, None to not change it
+        :arg enable_segmentation: None to not change it
+        :arg inference_width: Frames wider than this (pixels) are shrunk before MediaPipe, None to not shrink,
+        0 to not change it
+        """
+        before = _PoseDetector.graph_settings(self)
+        if model_complexity is not None:
+            self.model_complexity = model_complexity
+        if enable_segmentation is not None:
+            self.enable_segmentation = enable_segmentation
+        if inference_width != 0:
+            self.inference_width = inference_width
+        if (_PoseDetector.graph_settings(self) != before) and (self.pose is not None):
+            if self.pool is not None:
+                _PoseDetector.release(self)
+            else:
+                self.pose.close()
+                self.pose = None
+
+    def release(self) -> None:
+        """
+        Gives the graph back to its pool, once a video is analysed. The next frame gets a graph from the pool again.
+        Does nothing if the detector owns its graph
+        """
+        if (self.pool is not None) and (self.pose is not None):
+            self.pool.release(self.pose)
+            self.pose = None
+        self.box = None
+
+    def reset(self) -> None:
+        """
+        Forgets the person found so far, so that the next frame isn't tracked from them (e.g. after frames that
+        aren't part of the analysis). A graph from a pool is given back, it is reset when it is checked out again
+        """
+        if self.pool is not None:
+            _PoseDetector.release(self)
+        elif hasattr(self.pose, "reset"):
+            self.pose.reset()
+        self.box = None
+        self.positions = []
+        self.visibility = None
+
+    def track(self, padding: float = 0.25) -> None:
+        """
+        Give MediaPipe only a box around where the person was in the previous frame. The full frame is used
+        again when the person is lost
+
+        :arg padding: Space added around the person, as a fraction of the size of the person on each side
+        """
+        self.roi_padding = padding
+        self.box = None
 
     def find_position(self, video: cv2) -> list[list[int, int]]:
         """
@@ -60,14 +156,81 @@ class _PoseDetector:
         :return: A list with the position as landmarks, and the x,y components in pixels
         """
         self.positions = []
-        results = self.pose.process(cv2.cvtColor(video, cv2.COLOR_BGR2RGB))
-        if results.pose_landmarks:
-            for landmarks in results.pose_landmarks.landmark:
-                height, width, _ = video.shape
-                x_axis, y_axis = int(landmarks.x * width), int(landmarks.y * height)
-                self.positions.append([x_axis, y_axis])
+        self.visibility = None
+        if self.pose is None:
+            if self.pool is None:
+                self.pose = _PoseDetector.build(self)
+            else:
+                self.pose = self.pool.checkout(_PoseDetector.graph_settings(self))
+        height, width, _ = video.shape
+        converting = 0.0  # Time (s) spent preparing the images for MediaPipe, the rest is counted in "pose"
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            converting += _PoseDetector._process_(self, video[y0:y1, x0:x1], x0, y0)
+            if len(self.positions) == 0:
+                self.box = None  # Lost, look in the full frame
+        if self.box is None:
+            converting += _PoseDetector._process_(self, video, 0, 0)
+        if (self.roi_padding is not None) and (len(self.positions) > 0):
+            _PoseDetector._update_box_(self, width, height)
+        if self.exercise.stats is not None:
+            self.exercise.stats.tick("pose", cvtColor=converting)
         return self.positions
 
+    def _process_(self, image, x_offset: int, y_offset: int) -> float:
+        """
+        Gives an image to MediaPipe and stores the landmarks found, in pixels of the full frame
+
+        :arg image: The full frame or a part of it
+        :arg x_offset: Position (pixels) of the left of the image in the full frame
+        :arg y_offset: Position (pixels) of the top of the image in the full frame
+
+        :return: Time (s) spent resizing and converting the image for MediaPipe
+        """
+        start = time.perf_counter()
+        height, width, _ = image.shape
+        if (self.inference_width is not None) and (width > self.inference_width):
+            # The landmarks are relative to the size of the image, so they don't need to be scaled back
+            image = cv2.resize(image, (self.inference_width, max(1, int(height * self.inference_width / width))),
+                               interpolation=cv2.INTER_AREA)
+        rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        converting = time.perf_counter() - start
+        results = self.pose.process(rgb)
+        if results.pose_landmarks:
+            found = np.array([(landmark.x, landmark.y, landmark.visibility)
+                              for landmark in results.pose_landmarks.landmark])
+            # Truncated like int(), from the same float64 values
+            xy = ((found[:, :2] * (width, height)) + (x_offset, y_offset)).astype(np.int32)
+            self.positions = xy.tolist()
+            self.visibility = found[:, 2].astype(np.float32)
+        return converting
+
+    def _update_box_(self, width: int, height: int) -> None:
+        """
+        Moves the region of interest around the landmarks just found. The box is only moved when the person gets
+        close to its border (or is much smaller than it), so that MediaPipe sees the same region from one frame
+        to the next and can keep tracking
+
+        :arg width: Width (pixels) of the full frame
+        :arg height: Height (pixels) of the full frame
+        """
+        xs = [x for x, _ in self.positions]
+        ys = [y for _, y in self.positions]
+        left, right, top, bottom = min(xs), max(xs), min(ys), max(ys)
+        pad_x = max((right - left) * self.roi_padding, 16)
+        pad_y = max((bottom - top) * self.roi_padding, 16)
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            inside = (left - x0 >= pad_x / 2 or x0 == 0) and (x1 - right >= pad_x / 2 or x1 == width) and \
+                     (top - y0 >= pad_y / 2 or y0 == 0) and (y1 - bottom >= pad_y / 2 or y1 == height)
+            big_enough = (right - left) * (bottom - top) >= (x1 - x0) * (y1 - y0) / 4
+            if inside and big_enough:
+                return
+        self.box = (max(0, int(left - pad_x)), max(0, int(top - pad_y)),
+                    min(width, int(right + pad_x)), min(height, int(bottom + pad_y)))
+        if (self.box[2] - self.box[0] < 32) or (self.box[3] - self.box[1] < 32):
+            self.box = None  # Too small to find anything in it
+
     def find_angle(self, pts: list[int, int, int]) -> float:
         """
         :arg pts: The list of the three joints to follow
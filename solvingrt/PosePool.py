@@ -0,0 +1,167 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# MediaPipe graphs shared by many Exercises, so that models are loaded (and warmed up) once
+
+import threading
+import time
+import numpy as np
+from solvingrt import PoseDetector as pd
+
+
+class PosePool:
+    """
+    Keeps MediaPipe Pose graphs, keyed by their settings (see _PoseDetector.graph_settings).
+    A graph is checked out by one detector at a time, while it analyses a video, and is given back afterwards.
+    At most max_size graphs exist at once: when the pool is full, the graph unused for the longest time is closed
+    to make room, or checkout waits for a graph to be given back
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, max_size: int = 4):
+        """
+        :arg max_size: Maximum number of graphs (checked out or not)
+        """
+        self.max_size = max(1, int(max_size))
+        self.idle = []  # (graph settings, graph, time it was given back), the oldest first
+        self.busy = {}  # id(graph): (graph settings, graph)
+        self.created = 0  # Graphs built
+        self.reused = 0  # Checkouts that got a graph already built
+        self.condition = threading.Condition()
+
+    @staticmethod
+    def shared():
+        """
+        :return: The pool used by every Exercise that calls use_pool without a pool (one per process)
+        """
+        with PosePool._shared_lock:
+            if PosePool._shared is None:
+                PosePool._shared = PosePool()
+            return PosePool._shared
+
+    def __len__(self) -> int:
+        with self.condition:
+            return len(self.idle) + len(self.busy)
+
+    def __repr__(self) -> str:
+        return f"PosePool({len(self.idle)} idle, {len(self.busy)} checked out, max_size={self.max_size})"
+
+    def checkout(self, graph_settings: tuple, timeout: float = None):
+        """
+        :arg graph_settings: The arguments of the graph (see _PoseDetector.graph_settings)
+        :arg timeout: Maximum time (s) to wait for a graph when the pool is full, None to wait as long as needed
+
+        :return: A graph with these settings, reset so that it doesn't track the person of its last video.
+        It must be given back with release
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while True:
+                for i, (settings, graph, _) in enumerate(self.idle):
+                    if settings == graph_settings:
+                        del self.idle[i]
+                        self.busy[id(graph)] = (settings, graph)
+                        self.reused += 1
+                        PosePool._reset_(graph)
+                        return graph
+                if len(self.idle) + len(self.busy) < self.max_size:
+                    break
+                if self.idle:
+                    # Full, the graph unused for the longest time makes room
+                    _, old, _ = self.idle.pop(0)
+                    PosePool._close_(old)
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None) and (remaining <= 0):
+                    raise TimeoutError(f"No MediaPipe graph was given back in {timeout} s")
+                self.condition.wait(remaining)
+            place = object()  # Keeps a place in the pool while the graph is built, outside of the lock
+            self.busy[id(place)] = None
+            self.created += 1
+
+        try:
+            graph = pd.build_graph(graph_settings)
+        except BaseException:
+            with self.condition:
+                del self.busy[id(place)]
+                self.condition.notify()
+            raise
+        with self.condition:
+            del self.busy[id(place)]
+            self.busy[id(graph)] = (graph_settings, graph)
+        return graph
+
+    def release(self, graph) -> None:
+        """
+        Gives a graph back to the pool
+
+        :arg graph: A graph given by checkout
+        """
+        with self.condition:
+            settings, graph = self.busy.pop(id(graph))
+            self.idle += [(settings, graph, time.monotonic())]
+            self.condition.notify()
+
+    def warmup(self, graph_settings: tuple, count: int = 1, width: int = 640, height: int = 360) -> None:
+        """
+        Builds graphs in advance and runs them once, so that the first video doesn't pay for it
+
+        :arg graph_settings: The arguments of the graphs (see _PoseDetector.graph_settings)
+        :arg count: Number of graphs with these settings that must be ready (at most max_size)
+        :arg width: Width (pixels) of the frame given to each graph
+        :arg height: Height (pixels) of the frame given to each graph
+        """
+        # Checked out together, so that the graphs already idle are counted (and run) instead of given again
+        graphs = []
+        try:
+            for _ in range(min(count, self.max_size)):
+                graphs += [PosePool.checkout(self, graph_settings)]
+            frame = np.zeros((height, width, 3), dtype=np.uint8)
+            for graph in graphs:
+                graph.process(frame)
+        finally:
+            for graph in graphs:
+                PosePool.release(self, graph)
+
+    def close(self) -> None:
+        """
+        Closes every graph that isn't checked out
+        """
+        with self.condition:
+            for _, graph, _ in self.idle:
+                PosePool._close_(graph)
+            self.idle = []
+            self.condition.notify_all()
+
+    @staticmethod
+    def _reset_(graph) -> None:
+        if hasattr(graph, "reset"):
+            graph.reset()  # Don't track the person of the previous video
+
+    @staticmethod
+    def _close_(graph) -> None:
+        if hasattr(graph, "close"):
+            graph.close()
@@ -0,0 +1,181 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Where the time goes while a video is analysed (see Exercise.profile)
+
+import time
+
+# Stages of the analysis of a frame, in order
+STAGES = ["read", "resize", "sampling", "cvtColor", "pose", "measures", "draw", "write", "imshow"]
+
+
+class FrameStats:
+    """
+    Time spent in each stage of the analysis, for the whole video and for the last frame, and how many frames
+    were analysed, dropped or had no person in them.
+    Stages: read (VideoCapture.read), resize, sampling (see adaptive_sampling), cvtColor, pose (MediaPipe),
+    measures, draw, write (waiting for room in the queue of the video written, see save_video) and imshow
+    (including waitKey)
+    """
+
+    def __init__(self, callback=None):
+        """
+        :arg callback: A function called after each frame with a dict: "frame" (its number), "landmarks" (True if
+        a person was found) and the time (s) spent in each stage for that frame. None to not call anything
+        """
+        self.callback = callback
+        FrameStats.reset(self)
+
+    def reset(self) -> None:
+        """
+        Forgets everything, called at the start of each analysis
+        """
+        self.total = {stage: 0.0 for stage in STAGES}  # Time (s) spent in each stage, for the whole video
+        self.last = {}  # Time (s) spent in each stage, for the last frame
+        self.current = {}
+        self.frames = 0  # Frames analysed
+        self.no_landmarks = 0  # Frames analysed in which no person was found
+        self.dropped = 0  # Frames of the video that couldn't be read, known once the whole video is analysed
+        self.total_frames = 0  # Frames in the video, according to OpenCV
+        self.wall = 0.0  # Time (s) from the start to the end of the analysis
+        self.started = time.perf_counter()
+        self.clock = self.started
+
+    def restart(self) -> None:
+        """
+        Starts timing again without counting the time since the last tick (e.g. time spent by the caller
+        of iter_reps between two reps)
+        """
+        self.clock = time.perf_counter()
+
+    def tick(self, stage: str, **parts) -> None:
+        """
+        Counts the time since the last tick as time spent in a stage, for the current frame
+
+        :arg stage: One of STAGES
+        :arg parts: Time (s) spent in other stages since the last tick, measured apart (e.g. cvtColor=0.001).
+        It is counted in those stages instead
+        """
+        now = time.perf_counter()
+        elapsed = now - self.clock
+        for other, seconds in parts.items():
+            self.current[other] = self.current.get(other, 0.0) + seconds
+            elapsed -= seconds
+        self.current[stage] = self.current.get(stage, 0.0) + elapsed
+        self.clock = now
+
+    def hold(self) -> dict:
+        """
+        Sets the current frame aside, e.g. a frame skipped by the adaptive sampling, which is only analysed once the
+        next keyframe is found. A new frame starts
+
+        :return: The time (s) spent in each stage for the frame set aside, given back to resume
+        """
+        held, self.current = self.current, {}
+        return held
+
+    def resume(self, held: dict) -> None:
+        """
+        Continues a frame set aside by hold. The current frame must have been set aside (or ended) before
+
+        :arg held: What hold gave
+        """
+        self.current = held
+
+    def share(self, stage: str, frames: list) -> None:
+        """
+        Counts the time since the last tick as time spent in a stage, split evenly between frames set aside
+        (e.g. interpolating the landmarks of every frame skipped)
+
+        :arg stage: One of STAGES
+        :arg frames: The frames set aside (what hold gave for each)
+        """
+        now = time.perf_counter()
+        for held in frames:
+            held[stage] = held.get(stage, 0.0) + (now - self.clock) / len(frames)
+        self.clock = now
+
+    def end_frame(self, found: bool) -> None:
+        """
+        :arg found: True if a person was found in the frame
+        """
+        self.frames += 1
+        if not found:
+            self.no_landmarks += 1
+        for stage, seconds in self.current.items():
+            self.total[stage] = self.total.get(stage, 0.0) + seconds
+        self.last = self.current
+        self.current = {}
+        if self.callback is not None:
+            self.callback({"frame": self.frames, "landmarks": found, **self.last})
+
+    def end(self, total_frames: int, completed: bool, skipped: int = 0) -> None:
+        """
+        :arg total_frames: Frames in the video, according to OpenCV
+        :arg completed: True if the whole video was analysed (frames left when the analysis is stopped early
+        aren't dropped)
+        :arg skipped: Frames of the video that aren't read on purpose (e.g. the last one, see
+        Exercise._landmark_stream_), which aren't dropped either
+        """
+        self.total_frames = total_frames
+        if completed:
+            self.dropped = max(0, total_frames - skipped - self.frames)
+        self.wall = time.perf_counter() - self.started
+
+    def per_frame(self) -> dict:
+        """
+        :return: Mean time (ms) spent in each stage per frame analysed
+        """
+        return {stage: (1000 * seconds / self.frames) if self.frames > 0 else 0.0
+                for stage, seconds in self.total.items()}
+
+    def fps(self) -> float:
+        """
+        :return: Frames analysed per second, from the start to the end of the analysis
+        """
+        return self.frames / self.wall if self.wall > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        """
+        :return: Every count and the time (s) spent in each stage, ready for json
+        """
+        return {"frames": self.frames, "total_frames": self.total_frames, "dropped": self.dropped,
+                "no_landmarks": self.no_landmarks, "wall": self.wall, "fps": FrameStats.fps(self),
+                "total": dict(self.total), "per_frame_ms": FrameStats.per_frame(self)}
+
+    def text(self) -> list[str]:
+        """
+        :return: The stats as text, one stage per line, like ["pose: 14.2 ms/frame (78.1%)"]
+        """
+        timed = sum(self.total.values())
+        per_frame = FrameStats.per_frame(self)
+        text = [f"{self.frames} frames analysed ({FrameStats.fps(self):.1f} fps), {self.dropped} dropped, "
+                f"{self.no_landmarks} without landmarks"]
+        for stage, seconds in self.total.items():
+            if seconds > 0:
+                text += [f"{stage}: {per_frame[stage]:.2f} ms/frame ({100 * seconds / timed:.1f}%)"]
+        return text
+
+    def __repr__(self) -> str:
+        return f"FrameStats({self.frames} frames, {self.fps():.1f} fps)"
@@ -0,0 +1,136 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Speed/accuracy trade-offs of the analysis (see Exercise.quality)
+
+import time
+import cv2
+from solvingrt import Sampler as sp
+
+# From the fastest to the most accurate.
+# model_complexity: MediaPipe model (0: lite, 1: full, 2: heavy)
+# enable_segmentation: MediaPipe also finds the silhouette of the person, which SolvingRT doesn't use
+# inference_width: Frames wider than this (pixels) are shrunk before MediaPipe, None to give the whole frame
+# max_stride: MediaPipe runs at least every max_stride frames (see adaptive_sampling), None for every frame
+# smoothing: Filter of the landmarks (see smooth_landmarks), the lite model jitters more. None to not smooth them
+PROFILES = {"realtime": {"model_complexity": 0, "enable_segmentation": False, "inference_width": 384,
+                         "max_stride": 4, "smoothing": "one euro"},
+            "balanced": {"model_complexity": 1, "enable_segmentation": False, "inference_width": 640,
+                         "max_stride": 2, "smoothing": None},
+            "accurate": {"model_complexity": 2, "enable_segmentation": False, "inference_width": None,
+                         "max_stride": None, "smoothing": None}}
+
+
+def apply(exercise, name: str) -> None:
+    """
+    :arg exercise: The Exercise to configure
+    :arg name: One of PROFILES
+    """
+    if name not in PROFILES:
+        print(f"{name} is not a valid input. Options are {list(PROFILES)} and 'auto'.")
+        raise ValueError(name)
+    profile = PROFILES[name]
+    exercise.pose.configure(profile["model_complexity"], profile["enable_segmentation"], profile["inference_width"])
+    if profile["max_stride"] is None:
+        exercise.sampling = None
+    else:
+        exercise.adaptive_sampling(profile["max_stride"])
+    exercise.smooth_landmarks(profile["smoothing"])
+    exercise.quality_profile = name
+
+
+def probe_frames(exercise, seconds: float) -> list:
+    """
+    :arg exercise: The Exercise whose video is probed
+    :arg seconds: Length (s) of the start of the video to read
+
+    :return: The first frames of the video, resized like they are when the video is analysed
+    """
+    video = cv2.VideoCapture(exercise.video)
+    try:
+        if (exercise.width == 0) or (exercise.height == 0):
+            exercise.height = int(video.get(cv2.CAP_PROP_FRAME_HEIGHT) / 2)
+            exercise.width = int(video.get(cv2.CAP_PROP_FRAME_WIDTH) / 2)
+        nb_frames = max(2, int(seconds * (video.get(cv2.CAP_PROP_FPS) or 30)))
+        frames = []
+        while len(frames) < nb_frames:
+            success, frame = video.read()
+            if not success:
+                break
+            frames += [cv2.resize(frame, (exercise.width, exercise.height))]
+    finally:
+        video.release()
+    return frames
+
+
+def throughput(exercise, frames: list) -> float:
+    """
+    Finds the landmarks of the frames like the analysis does, with the current settings of the exercise
+
+    :arg exercise: The Exercise (already configured)
+    :arg frames: Frames from the video (see probe_frames)
+
+    :return: Frames per second (MediaPipe and sampling only, reading the video isn't included)
+    """
+    detector = exercise.pose
+    detector.find_position(frames[0])  # Builds the graph, isn't timed
+    sampler = None
+    if exercise.sampling is not None:
+        sampler = sp._AdaptiveSampler(exercise._get_pose_landmarks_(), *exercise.sampling)
+    skipped = 0
+    start = time.perf_counter()
+    for frame in frames[1:]:
+        if (sampler is None) or sampler.needs_pose(frame):
+            landmarks = detector.find_position(frame)
+            if sampler is not None:
+                sampler.keyframe(landmarks, skipped)
+            skipped = 0
+        else:
+            skipped += 1
+    seconds = time.perf_counter() - start
+    detector.reset()  # The analysis doesn't start by tracking the person of the probe
+    return (len(frames) - 1) / seconds if seconds > 0 else float("inf")
+
+
+def auto(exercise, target_fps: float, seconds: float = 2.0) -> dict:
+    """
+    Tries the profiles, from the most accurate to the fastest, on the first seconds of the video, and keeps the
+    first one that is fast enough. The fastest profile is kept if none is
+
+    :arg exercise: The Exercise to configure
+    :arg target_fps: Frames that must be analysed per second
+    :arg seconds: Length (s) of the start of the video used to measure the speed
+
+    :return: The frames per second measured for each profile tried
+    """
+    frames = probe_frames(exercise, seconds)
+    if len(frames) < 2:
+        raise Exception(f"Can't read {exercise.video}")
+    measured = {}
+    for name in reversed(list(PROFILES)):
+        apply(exercise, name)
+        measured[name] = throughput(exercise, frames)
+        if measured[name] >= target_fps:
+            break
+    return measured
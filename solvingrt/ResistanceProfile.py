@@ -0,0 +1,228 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# The resistance profile (torque for every angle of the exercise), binned by angle so that the profiles of
+# many reps, sets or athletes can be added together and compared
+
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+class ResistanceProfile:
+    """
+    Sum, sum of squares and count of the torque (Nm) in each bin of the joint angle (°), in fixed arrays
+    """
+
+    def __init__(self, bin_width: float = 5.0, min_angle: float = 0.0, max_angle: float = 180.0, label: str = ""):
+        """
+        :arg bin_width: Width (°) of each bin
+        :arg min_angle: Lowest angle (°) of the first bin. Lower angles are counted in the first bin
+        :arg max_angle: Highest angle (°) of the last bin. Higher angles are counted in the last bin
+        :arg label: Name of the profile in graphs (e.g. the athlete or the set)
+        """
+        self.bin_width = float(bin_width)
+        self.min_angle = float(min_angle)
+        self.max_angle = float(max_angle)
+        self.label = label
+        bins = max(1, int(np.ceil((self.max_angle - self.min_angle) / self.bin_width)))
+        self.total = np.zeros(bins, dtype=np.float64)
+        self.squares = np.zeros(bins, dtype=np.float64)
+        self.count = np.zeros(bins, dtype=np.int64)
+
+    def __len__(self) -> int:
+        """
+        :return: Number of samples added
+        """
+        return int(self.count.sum())
+
+    def __repr__(self) -> str:
+        return f"ResistanceProfile({self.label!r}, {len(self)} samples, {len(self.total)} bins of {self.bin_width}°)"
+
+    def _bins_(self, angles) -> np.ndarray:
+        bins = np.floor((np.asarray(angles, dtype=np.float64) - self.min_angle) / self.bin_width)
+        return np.clip(bins, 0, len(self.total) - 1).astype(np.int64)
+
+    def add(self, angle: float, torque: float) -> None:
+        """
+        :arg angle: Angle (°) of the moving joint
+        :arg torque: Torque (Nm) at that angle. Ignored with the angle if either isn't finite (e.g. NaN)
+        """
+        if not (math.isfinite(angle) and math.isfinite(torque)):
+            return
+        i = min(max(int((angle - self.min_angle) // self.bin_width), 0), len(self.total) - 1)
+        self.total[i] += torque
+        self.squares[i] += torque * torque
+        self.count[i] += 1
+
+    def add_many(self, angles, torques) -> None:
+        """
+        :arg angles: Angles (°) of the moving joint, e.g. kinematics()["angle"] (values that aren't finite, e.g. NaN,
+        are ignored with their torque)
+        :arg torques: Torque (Nm) at each angle
+        """
+        angles = np.asarray(angles, dtype=np.float64)
+        torques = np.asarray(torques, dtype=np.float64)
+        valid = np.isfinite(angles) & np.isfinite(torques)
+        bins = ResistanceProfile._bins_(self, angles[valid])
+        torques = torques[valid]
+        size = len(self.total)
+        self.total += np.bincount(bins, torques, size)
+        self.squares += np.bincount(bins, torques * torques, size)
+        self.count += np.bincount(bins, minlength=size)
+
+    def merge(self, other) -> None:
+        """
+        Adds the samples of another profile with the same bins
+        """
+        if (other.bin_width, other.min_angle, other.max_angle) != (self.bin_width, self.min_angle, self.max_angle):
+            raise ValueError(f"The bins of {other} are not the bins of {self}")
+        self.total += other.total
+        self.squares += other.squares
+        self.count += other.count
+
+    def centers(self) -> np.ndarray:
+        """
+        :return: The angle (°) at the center of each bin
+        """
+        return self.min_angle + (np.arange(len(self.total)) + 0.5) * self.bin_width
+
+    def mean(self) -> np.ndarray:
+        """
+        :return: The average torque (Nm) of each bin, NaN for the bins without samples
+        """
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, self.total / self.count, np.nan)
+
+    def std(self) -> np.ndarray:
+        """
+        :return: The standard deviation of the torque (Nm) of each bin, NaN for the bins without samples
+        """
+        mean = ResistanceProfile.mean(self)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(np.maximum(self.squares / self.count - mean * mean, 0))
+
+    def to_dict(self) -> dict:
+        """
+        :return: The bins and the sums of the profile, ready for json (see from_dict), with the average torque
+        ("torque", None where there is no sample) at each angle ("angles")
+        """
+        mean = ResistanceProfile.mean(self)
+        return {"label": self.label, "bin_width": self.bin_width, "min_angle": self.min_angle,
+                "max_angle": self.max_angle, "angles": ResistanceProfile.centers(self).tolist(),
+                "torque": [None if np.isnan(value) else value for value in mean.tolist()],
+                "total": self.total.tolist(), "squares": self.squares.tolist(), "count": self.count.tolist()}
+
+    @staticmethod
+    def from_dict(data: dict):
+        """
+        :arg data: A profile given by to_dict (e.g. in the results of Batch)
+
+        :return: The ResistanceProfile
+        """
+        profile = ResistanceProfile(data["bin_width"], data["min_angle"], data["max_angle"], data.get("label", ""))
+        profile.total[:] = data["total"]
+        profile.squares[:] = data["squares"]
+        profile.count[:] = data["count"]
+        return profile
+
+
+def combine(profiles: list, label: str = ""):
+    """
+    :arg profiles: Profiles with the same bins (e.g. every set of an athlete)
+    :arg label: Name of the combined profile
+
+    :return: A new profile with the samples of every profile
+    """
+    first = profiles[0]
+    combined = ResistanceProfile(first.bin_width, first.min_angle, first.max_angle, label)
+    for profile in profiles:
+        combined.merge(profile)
+    return combined
+
+
+def stack(profiles: list) -> tuple:
+    """
+    :arg profiles: Profiles with the same bins
+
+    :return: The angles (°) of the bins, and a (profiles x bins) array of the average torque (Nm) of each profile
+    """
+    for profile in profiles[1:]:
+        if len(profile.total) != len(profiles[0].total):
+            raise ValueError(f"The bins of {profile} are not the bins of {profiles[0]}")
+    return ResistanceProfile.centers(profiles[0]), np.vstack([ResistanceProfile.mean(p) for p in profiles])
+
+
+def render(profiles: list, path: str, title: str = "Resistance profile", dpi: int = 100) -> str:
+    """
+    Draws the profiles on one graph with Matplotlib's object-oriented API and the Agg backend (no window and no
+    global pyplot state, so graphs can be drawn from many threads or processes at once)
+
+    :arg profiles: The profiles to draw, one line each (with the standard deviation around it)
+    :arg path: The image to write (e.g. a .png)
+    :arg title: Title of the graph
+    :arg dpi: Resolution of the image
+
+    :return: The path of the image
+    """
+    # Only loaded when a graph is drawn, it takes a while
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    figure = Figure(figsize=(6.4, 4.8), dpi=dpi)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    for profile in profiles:
+        angles = ResistanceProfile.centers(profile)
+        mean = ResistanceProfile.mean(profile)
+        std = ResistanceProfile.std(profile)
+        line, = axes.plot(angles, mean, label=profile.label or None)
+        axes.fill_between(angles, mean - std, mean + std, color=line.get_color(), alpha=0.2, linewidth=0)
+    axes.set_xlabel("Angle (°)")
+    axes.set_ylabel("Torque (Nm)")
+    axes.set_title(title)
+    if any(profile.label for profile in profiles):
+        axes.legend()
+    figure.savefig(path)
+    return path
+
+
+def _render_job_(job: tuple) -> str:
+    return render(*job)
+
+
+def render_many(jobs: list, processes: int = None) -> list[str]:
+    """
+    Draws many graphs in parallel, one process per core
+
+    :arg jobs: (profiles, path) or (profiles, path, title) for each graph (see render)
+    :arg processes: The number of worker processes (default: the number of cores)
+
+    :return: The path of each image, in the same order as the jobs
+    """
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as pool:
+        return list(pool.map(_render_job_, [tuple(job) for job in jobs], chunksize=max(1, len(jobs) // 64)))
@@ -0,0 +1,292 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Data calculated for each rep and for each set, and how to export it
+
+import csv
+import json
+import os
+import numpy as np
+
+# How each measure is written as text, for the data of a rep and for the data of a set
+REP_FORMATS = {"torque": "Torque: {} Nm",
+               "conc_power": "Conc. power: {} W",
+               "ecc_power": "Ecc. power: {} W",
+               "work": "Work (concentric): {}J",
+               "conc_velocity": "Conc. velocity: {} rad/s",
+               "ecc_velocity": "Ecc. velocity: {} rad/s",
+               "parallel": "Parallel: {}",
+               "concentric_time": "Concentric time: {}s",
+               "eccentric_time": "Eccentric time: {}s",
+               "min_angle": "Min angle: {}",
+               "max_angle": "Max angle: {}"}
+SET_FORMATS = {"time_under_tension": "Time under significant tension: {} s",
+               "min_angle": "Min angle: {}",
+               "max_angle": "Max angle: {}",
+               "velocity_lost": "Velocity lost: {}%"}
+# Number of decimals shown, for the measures that are rounded when written as text
+REP_ROUNDING = {"concentric_time": 4, "eccentric_time": 4}
+SET_ROUNDING = {"min_angle": 4, "max_angle": 4, "velocity_lost": 2}
+
+
+class RepResult:
+    """
+    The data of one rep: its number, the frame where it was completed and one value per measure.
+    The measures can be read as attributes (rep.torque) or as keys (rep["torque"])
+    """
+
+    type = "rep"
+
+    def __init__(self, rep: int, frame: int, values: dict = None, segment=None):
+        self.rep = rep
+        self.frame = frame
+        self.values = {} if values is None else values
+        self.segment = segment  # Phases of the rep (Segmenter.Rep), if known
+
+    def __getattr__(self, name: str):
+        try:
+            return self.__dict__["values"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, name: str):
+        return self.values[name]
+
+    def __setitem__(self, name: str, value) -> None:
+        self.values[name] = value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.values
+
+    def __repr__(self) -> str:
+        return f"RepResult(rep={self.rep}, frame={self.frame}, {self.values})"
+
+    def to_dict(self) -> dict:
+        """
+        :return: The rep number, the frame and the measures in a dict
+        """
+        return {"rep": self.rep, "frame": self.frame, **self.values}
+
+    def text(self) -> list[str]:
+        """
+        :return: The data as text, like ["Rep #1", "Torque: 24.7202 Nm"]
+        """
+        return [f"Rep #{self.rep}"] + _text_(self.values, REP_FORMATS, REP_ROUNDING)
+
+
+class SetResult:
+    """
+    The data of a set: a table with one NumPy array (one value per rep) for each measure, the data calculated for
+    the whole set (summary) and what was analysed (info: exercise, muscle, video and athlete)
+    """
+
+    type = "set"
+
+    def __init__(self, reps: list[RepResult], summary: dict, info: dict = None):
+        self.summary = summary
+        self.info = {} if info is None else info
+        names = []
+        for rep in reps:
+            names += [name for name in rep.values if name not in names]
+        self.columns = {"rep": np.array([rep.rep for rep in reps], dtype=np.int32),
+                        "frame": np.array([rep.frame for rep in reps], dtype=np.int64)}
+        for name in names:
+            values = [rep.values.get(name) for rep in reps]
+            if any(isinstance(value, (bool, np.bool_)) for value in values):
+                self.columns[name] = np.array([bool(value) for value in values], dtype=bool)
+            else:
+                self.columns[name] = np.array([np.nan if value is None else value for value in values],
+                                              dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.columns["rep"])
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def __repr__(self) -> str:
+        return f"SetResult({len(self)} reps, measures={self.measures()}, summary={self.summary})"
+
+    def measures(self) -> list[str]:
+        """
+        :return: The names of the measures calculated for each rep
+        """
+        return [name for name in self.columns if name not in ("rep", "frame")]
+
+    def rep(self, i: int) -> RepResult:
+        """
+        :arg i: Index of the rep (0 is the first rep)
+
+        :return: The data of that rep
+        """
+        values = {}
+        for name in SetResult.measures(self):
+            value = self.columns[name][i].item()
+            if not (isinstance(value, float) and np.isnan(value)):
+                values[name] = value
+        return RepResult(int(self.columns["rep"][i]), int(self.columns["frame"][i]), values)
+
+    def reps(self) -> list[RepResult]:
+        """
+        :return: The data of every rep
+        """
+        return [SetResult.rep(self, i) for i in range(len(self))]
+
+    def to_dict(self) -> dict:
+        """
+        :return: The info, the summary and the columns (as lists), ready for json
+        """
+        return {"info": self.info, "summary": self.summary,
+                "columns": {name: values.tolist() for name, values in self.columns.items()}}
+
+    def rep_text(self) -> list[list[str]]:
+        """
+        :return: The data of each rep as text (see RepResult.text)
+        """
+        return [rep.text() for rep in SetResult.reps(self)]
+
+    def set_text(self) -> list[str]:
+        """
+        :return: The data of the set as text, like ["Velocity lost: 27.03%"]
+        """
+        return _text_(self.summary, SET_FORMATS, SET_ROUNDING)
+
+
+def _text_(values: dict, formats: dict, rounding: dict) -> list[str]:
+    text = []
+    for name, value in values.items():
+        if name in formats:
+            if name in rounding:
+                value = round(value, rounding[name])
+            text += [formats[name].format(value)]
+    return text
+
+
+def _rows_(sets: list[SetResult]):
+    """
+    :return: A generator of one dict per rep, with the info and the summary of its set
+    """
+    for set_result in sets:
+        info = {**set_result.info, **{f"set_{name}": value for name, value in set_result.summary.items()}}
+        columns = {name: values.tolist() for name, values in set_result.columns.items()}
+        for i in range(len(set_result)):
+            yield {**info, **{name: values[i] for name, values in columns.items()}}
+
+
+def export_csv(sets: list[SetResult], path: str, append: bool = True) -> None:
+    """
+    Writes one line per rep. Each line also has the info and the summary (prefixed with "set_") of its set
+
+    :arg sets: The sets to write
+    :arg path: The CSV file
+    :arg append: Add to the file if it exists (its columns are kept), instead of replacing it
+    """
+    rows = list(_rows_(sets))
+    header = None
+    if append and os.path.isfile(path) and os.path.getsize(path) > 0:
+        with open(path, newline="") as f:
+            header = next(csv.reader(f))
+        unknown = {name for row in rows for name in row} - set(header)
+        if unknown:
+            raise ValueError(f"Columns {sorted(unknown)} are not in {path}")
+    with open(path, "a" if header is not None else "w", newline="") as f:
+        if header is None:
+            header = []
+            for row in rows:
+                header += [name for name in row if name not in header]
+            writer = csv.DictWriter(f, fieldnames=header)
+            writer.writeheader()
+        else:
+            writer = csv.DictWriter(f, fieldnames=header)
+        writer.writerows(rows)
+
+
+def export_jsonl(sets: list[SetResult], path: str, append: bool = True) -> None:
+    """
+    Writes one line per set, with its info, its summary and its columns (see SetResult.to_dict)
+
+    :arg sets: The sets to write
+    :arg path: The JSON lines file
+    :arg append: Add to the file instead of replacing it
+    """
+    with open(path, "a" if append else "w") as f:
+        f.writelines(json.dumps(set_result.to_dict()) + "\n" for set_result in sets)
+
+
+def export_npz(sets: list[SetResult], path: str, append: bool = True) -> None:
+    """
+    Writes the columns of every set, one after the other, in a compressed NumPy file.
+    "set_index" tells which set each rep belongs to, "set_reps" is the number of reps of each set, and the info
+    and summary of each set are in "info_<name>" and "summary_<name>" arrays (one value per set).
+    A NumPy file can't grow in place, so appending reads the file back: write many sets at once
+
+    :arg sets: The sets to write
+    :arg path: The .npz file
+    :arg append: Add to the file if it exists, instead of replacing it
+    """
+    tables = []
+    if append and os.path.isfile(path):
+        with np.load(path, allow_pickle=False) as data:
+            tables += [{name: data[name] for name in data.files}]
+
+    new = {"set_index": np.concatenate([np.full(len(s), i, dtype=np.int32) for i, s in enumerate(sets)])
+           if sets else np.zeros(0, dtype=np.int32),
+           "set_reps": np.array([len(s) for s in sets], dtype=np.int32)}
+    names = []
+    for set_result in sets:
+        names += [name for name in set_result.columns if name not in names]
+    for name in names:
+        new[name] = np.concatenate([s.columns[name] if name in s.columns else np.full(len(s), np.nan)
+                                    for s in sets])
+    for prefix, attribute in (("info_", "info"), ("summary_", "summary")):
+        keys = []
+        for set_result in sets:
+            keys += [key for key in getattr(set_result, attribute) if key not in keys]
+        for key in keys:
+            values = [getattr(set_result, attribute).get(key) for set_result in sets]
+            if all(isinstance(value, (int, float)) or value is None for value in values):
+                new[prefix + key] = np.array([np.nan if value is None else value for value in values],
+                                             dtype=np.float64)
+            else:
+                new[prefix + key] = np.array(["" if value is None else str(value) for value in values])
+    tables += [new]
+
+    if len(tables) > 1:
+        old, new = tables
+        nb_old_sets, nb_old_reps = len(old["set_reps"]), len(old["set_index"])
+        new["set_index"] = new["set_index"] + nb_old_sets
+        merged = {}
+        for name in list(old) + [name for name in new if name not in old]:
+            per_set = name.startswith(("info_", "summary_")) or (name == "set_reps")
+            lengths = (nb_old_sets, len(sets)) if per_set else (nb_old_reps, len(new["set_index"]))
+            text = any((name in table) and (table[name].dtype.kind == "U") for table in (old, new))
+            parts = [table[name] if name in table else np.full(length, "" if text else np.nan)
+                     for table, length in zip((old, new), lengths)]
+            merged[name] = np.concatenate(parts)
+        tables = [merged]
+
+    temp = path + f".{os.getpid()}.tmp"
+    with open(temp, "wb") as f:
+        np.savez_compressed(f, **tables[0])
+    os.replace(temp, path)
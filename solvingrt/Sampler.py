@@ -0,0 +1,119 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Decides on which frames MediaPipe runs. The landmarks of the other frames are interpolated
+
+import cv2
+
+
+class _AdaptiveSampler:
+
+    THUMBNAIL_WIDTH = 64  # Width (pixels) of the frames compared to detect motion
+
+    def __init__(self, points: list, max_stride: int = 4, motion_threshold: float = 3.0,
+                 velocity_threshold: float = 0.03):
+        """
+        :arg points: The three joints to follow (their velocity decides the stride)
+        :arg max_stride: MediaPipe runs at least every max_stride frames. 1 means every frame
+        :arg motion_threshold: Mean difference (0 to 255) between a frame and the last frame given to MediaPipe
+        above which MediaPipe runs right away. None to not compare frames
+        :arg velocity_threshold: Speed of the joints (fraction of the height of the video per frame)
+        above which MediaPipe runs on every frame
+        """
+        self.points = points
+        self.max_stride = max(1, int(max_stride))
+        self.motion_threshold = motion_threshold
+        self.velocity_threshold = velocity_threshold
+        self.stride = 1  # Dense until the speed of the lift is known
+        self.since_key = 0  # Frames since the last keyframe (the last frame given to MediaPipe)
+        self.last_landmarks = []
+        self.last_thumbnail = None
+        self.thumbnail = None
+        self.moved = False
+        self.height = 0
+
+    def settings(self) -> tuple:
+        """
+        :return: The parameters of the sampler, two samplers with the same settings interpolate the same frames
+        """
+        return self.max_stride, self.motion_threshold, self.velocity_threshold
+
+    def needs_pose(self, video) -> bool:
+        """
+        Must be called once for every frame, in order
+
+        :arg video: The (resized) frame
+
+        :return: True if MediaPipe must find the landmarks of this frame, False if they can be interpolated
+        """
+        self.since_key += 1
+        self.height = video.shape[0]
+        self.moved = False
+        if self.motion_threshold is not None:
+            scale = _AdaptiveSampler.THUMBNAIL_WIDTH / video.shape[1]
+            small = cv2.resize(video, (_AdaptiveSampler.THUMBNAIL_WIDTH, max(1, int(video.shape[0] * scale))),
+                               interpolation=cv2.INTER_AREA)
+            self.thumbnail = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            if self.last_thumbnail is not None:
+                self.moved = cv2.absdiff(self.thumbnail, self.last_thumbnail).mean() > self.motion_threshold
+        return self.moved or (self.since_key >= self.stride)
+
+    def keyframe(self, landmarks: list, skipped: int) -> list[list]:
+        """
+        Must be called with the landmarks MediaPipe found, every time needs_pose is True
+
+        :arg landmarks: The landmarks of the keyframe
+        :arg skipped: The number of frames between the last keyframe and this one
+
+        :return: The interpolated landmarks of the skipped frames
+        """
+        gap = skipped + 1
+        previous = self.last_landmarks
+        if (len(previous) > 0) and (len(landmarks) > 0):
+            filled = []
+            for k in range(1, gap):
+                weight = k / gap
+                filled += [[[int(round(x1 + ((x2 - x1) * weight))), int(round(y1 + ((y2 - y1) * weight)))]
+                            for (x1, y1), (x2, y2) in zip(previous, landmarks)]]
+            # Speed of the fastest joint since the last keyframe. A fast lift is sampled on every frame
+            speed = max(((landmarks[pt][0] - previous[pt][0]) ** 2 + (landmarks[pt][1] - previous[pt][1]) ** 2)
+                        ** (1 / 2) for pt in self.points) / gap
+            fast = speed > self.velocity_threshold * self.height
+        else:
+            # The person appeared or disappeared, nothing to interpolate from
+            filled = [[] for _ in range(skipped)]
+            fast = True
+        self.stride = 1 if (fast or self.moved) else self.max_stride
+        self.last_landmarks = landmarks
+        self.last_thumbnail = self.thumbnail
+        self.since_key = 0
+        return filled
+
+    def flush(self, skipped: int) -> list[list]:
+        """
+        :arg skipped: The number of frames after the last keyframe, at the end of the video
+
+        :return: Their landmarks, which are the landmarks of the last keyframe
+        """
+        return [[list(point) for point in self.last_landmarks] for _ in range(skipped)]
@@ -0,0 +1,364 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# Finds the reps, and their concentric and eccentric phases, in the angle of the moving joint
+
+from collections import deque
+import numpy as np
+from solvingrt import Accumulators as ac
+
+
+class _Span:
+    """
+    Range of the angle and statistics of the measures of consecutive samples, without keeping the samples
+    """
+
+    def __init__(self, accumulators: dict = None):
+        """
+        :arg accumulators: Name of a measure -> class of its statistics (Accumulators.Welford if not given)
+        """
+        self.accumulators = {} if accumulators is None else accumulators
+        self.angles = ac.MinMax()
+        self.measures = {}  # Name of the measure -> statistics
+
+    def _measure_(self, name: str):
+        if name not in self.measures:
+            self.measures[name] = self.accumulators.get(name, ac.Welford)()
+        return self.measures[name]
+
+    def add(self, angle: float, values: dict = None) -> None:
+        self.angles.add(angle)
+        _Span.add_values(self, values)
+
+    def add_values(self, values: dict = None) -> None:
+        """
+        :arg values: Name of a measure -> value given to the add method of its statistics (a tuple is given as
+        many arguments)
+        """
+        if values:
+            for name, value in values.items():
+                if isinstance(value, tuple):
+                    _Span._measure_(self, name).add(*value)
+                else:
+                    _Span._measure_(self, name).add(value)
+
+    def merge(self, other) -> None:
+        self.angles.merge(other.angles)
+        for name, moments in other.measures.items():
+            _Span._measure_(self, name).merge(moments)
+
+
+class Phase:
+    """
+    A concentric or eccentric portion of a rep, from one turning point of the (smoothed) angle to the next
+    """
+
+    def __init__(self, kind: str, start: int, end: int, start_angle: float, end_angle: float,
+                 min_angle: float, max_angle: float, stats: dict = None, start_values: dict = None):
+        self.kind = kind  # "concentric" or "eccentric"
+        self.start = start  # Frame of the first turning point
+        self.end = end  # Frame of the second turning point
+        self.start_angle = start_angle  # Smoothed angles (°) at the turning points
+        self.end_angle = end_angle
+        self.min_angle = min_angle  # Measured angles (°), not smoothed
+        self.max_angle = max_angle
+        # Measures of the frames after start, up to end (Welford), and of the start frame.
+        # Given to the rep once it is complete (see Rep.stats)
+        self.stats = {} if stats is None else stats
+        self.start_values = start_values
+
+    def frames(self) -> int:
+        """
+        :return: Length of the phase, in frames
+        """
+        return self.end - self.start
+
+    def __repr__(self) -> str:
+        return f"Phase({self.kind}, frames {self.start}-{self.end})"
+
+    def to_dict(self) -> dict:
+        return {"kind": self.kind, "start": self.start, "end": self.end, "start_angle": self.start_angle,
+                "end_angle": self.end_angle, "min_angle": self.min_angle, "max_angle": self.max_angle}
+
+
+class Rep:
+    """
+    One rep: its number and its two phases, in the order they are done (concentric first for most exercises)
+    """
+
+    def __init__(self, number: int, phases: list[Phase], stats: dict = None):
+        self.number = number
+        self.phases = phases
+        self.start = phases[0].start  # Frame where the rep starts
+        self.turn = phases[0].end  # Frame where the movement changes direction
+        self.end = phases[-1].end  # Frame where the rep ends
+        self.min_angle = min(phase.min_angle for phase in phases)
+        self.max_angle = max(phase.max_angle for phase in phases)
+        # Statistics of the measures of the frames of the rep (Accumulators.Welford, unless the segmenter
+        # was given other accumulators)
+        self.stats = {} if stats is None else stats
+
+    def phase(self, kind: str) -> Phase:
+        """
+        :arg kind: "concentric" or "eccentric"
+
+        :return: That phase of the rep
+        """
+        return next(phase for phase in self.phases if phase.kind == kind)
+
+    def contains(self, frame: int) -> bool:
+        """
+        :return: True if the frame is part of the rep
+        """
+        return self.start <= frame <= self.end
+
+    def __repr__(self) -> str:
+        return f"Rep(#{self.number}, frames {self.start}-{self.turn}-{self.end})"
+
+    def to_dict(self) -> dict:
+        return {"rep": self.number, "start": self.start, "turn": self.turn, "end": self.end,
+                "phases": [phase.to_dict() for phase in self.phases]}
+
+
+class RepSegmenter:
+    """
+    The angle is smoothed with a centered moving average, then a turning point is found every time the angle goes
+    back by at least min_range degrees from its last extremum (so the noise of the landmarks and partial movements
+    don't count). Every sample is looked at once, either all at once (segment) or one at a time while the video is
+    analysed (update, then flush at the end). A rep is a phase in the direction the exercise starts with, followed
+    by a phase in the other direction; movements before the first such phase (e.g. getting in position) are ignored.
+    Only the turning points and running statistics are kept, so the memory used doesn't depend on the length of
+    the video (or of a pause)
+    """
+
+    def __init__(self, decreasing: bool, concentric_first: bool, min_range: float = 30.0, window: int = 5,
+                 accumulators: dict = None):
+        """
+        :arg decreasing: True if the angle decreases during the concentric portion
+        :arg concentric_first: True if a rep starts with the concentric portion
+        :arg min_range: Smallest change (°) of the smoothed angle between two turning points
+        :arg window: Number of samples averaged to smooth the angle (odd). 1 to not smooth
+        :arg accumulators: Name of a measure -> class (called without arguments) of the statistics kept for it,
+        with add and merge methods. Accumulators.Welford for the others
+        """
+        self.accumulators = {} if accumulators is None else accumulators
+        self.decreasing = decreasing
+        self.concentric_first = concentric_first
+        self.min_range = min_range
+        self.window = max(1, int(window) | 1)
+        RepSegmenter.reset(self)
+
+    def reset(self) -> None:
+        """
+        Forgets every sample, to segment another video
+        """
+        self.pending = deque()  # (frame, angle, values) waiting for the samples after them to be smoothed
+        self.direction = 0  # 1 while the smoothed angle goes up, -1 while it goes down, 0 before the first move
+        # Samples are (frame, angle, smoothed angle, values)
+        self.low = None  # Before the first move: lowest and highest samples, and the samples after them
+        self.high = None
+        self.after_low = _Span(self.accumulators)
+        self.after_high = _Span(self.accumulators)
+        self.start = None  # Last turning point
+        self.extreme = None  # Highest (or lowest) sample since the last turning point
+        self.span = _Span(self.accumulators)  # Samples from the last turning point to the extreme
+        self.tail = _Span(self.accumulators)  # Samples after the extreme
+        self.first = None  # First phase of the rep being done
+        self.last_end = None  # Frame where the last rep ended
+        self.reps = 0
+
+    def update(self, frame: int, angle: float, values: dict = None) -> list[Rep]:
+        """
+        :arg frame: Number of the frame
+        :arg angle: Angle (°) of the moving joint in that frame
+        :arg values: Measures of that frame, averaged for each rep (see Rep.stats). None if there is none
+
+        :return: The reps completed (usually none, sometimes one). A rep is known window // 2 samples after its end,
+        plus the samples needed for the angle to go back by min_range
+        """
+        if len(self.pending) == 0:
+            # The start of the angle is repeated, so that the first samples can be smoothed
+            self.pending.extend([(frame, angle, None)] * (self.window // 2))
+        self.pending.append((frame, angle, values))
+        if len(self.pending) < self.window:
+            return []
+        reps = RepSegmenter._smoothed_(self)
+        self.pending.popleft()
+        return reps
+
+    def flush(self) -> list[Rep]:
+        """
+        Must be called after the last sample
+
+        :return: The reps completed by the end of the video
+        """
+        reps = []
+        if len(self.pending) > 0:
+            frame, angle, _ = self.pending[-1]
+            # The first window // 2 samples waiting are already smoothed, they are only there for the next ones
+            for _ in range(len(self.pending) - (self.window // 2)):
+                # The end of the angle is repeated, so that the last samples can be smoothed
+                while len(self.pending) < self.window:
+                    self.pending.append((frame, angle, None))
+                reps += RepSegmenter._smoothed_(self)
+                self.pending.popleft()
+            self.pending.clear()
+        return reps + RepSegmenter._end_(self)
+
+    def segment(self, frames, angles, values: list = None) -> list[Rep]:
+        """
+        Finds every rep of a video at once
+
+        :arg frames: Number of each frame (where a person was found)
+        :arg angles: Angle (°) of the moving joint in each of those frames
+        :arg values: Measures of each of those frames (dict or None), see update
+
+        :return: Every rep of the video
+        """
+        RepSegmenter.reset(self)
+        angles = np.asarray(angles, dtype=np.float64)
+        if len(angles) == 0:
+            return []
+        if values is None:
+            values = [None] * len(angles)
+        half = self.window // 2
+        padded = np.concatenate((np.full(half, angles[0]), angles, np.full(half, angles[-1])))
+        # Summed in the same order as update, so both find the same reps
+        smoothed = padded[:len(angles)].copy()
+        for i in range(1, self.window):
+            smoothed += padded[i:i + len(angles)]
+        smoothed /= self.window
+        reps = []
+        for sample in zip(np.asarray(frames).tolist(), angles.tolist(), smoothed.tolist(), values):
+            reps += RepSegmenter._step_(self, sample)
+        return reps + RepSegmenter._end_(self)
+
+    def _smoothed_(self) -> list[Rep]:
+        frame, angle, values = self.pending[self.window // 2]
+        smooth = sum(value for _, value, _ in self.pending) / self.window
+        return RepSegmenter._step_(self, (frame, angle, smooth, values))
+
+    def _step_(self, sample: tuple) -> list[Rep]:
+        """
+        Looks at one smoothed sample
+
+        :arg sample: (frame, angle, smoothed angle, values)
+
+        :return: The reps completed
+        """
+        _, angle, smooth, values = sample
+        if self.direction == 0:
+            if self.low is None:
+                self.low = self.high = sample
+                return []
+            # Before the first move, the lowest and highest angles so far are both possible turning points
+            if smooth < self.low[2]:
+                self.low, self.after_low = sample, _Span(self.accumulators)
+            else:
+                self.after_low.add(angle, values)
+            if smooth > self.high[2]:
+                self.high, self.after_high = sample, _Span(self.accumulators)
+            else:
+                self.after_high.add(angle, values)
+            if smooth - self.low[2] >= self.min_range:
+                RepSegmenter._move_(self, 1, self.low, self.after_low, sample)
+            elif self.high[2] - smooth >= self.min_range:
+                RepSegmenter._move_(self, -1, self.high, self.after_high, sample)
+            return []
+        if self.direction * (smooth - self.extreme[2]) >= 0:
+            # Still going the same way
+            self.span.merge(self.tail)
+            self.span.add(angle, values)
+            self.tail = _Span(self.accumulators)
+            self.extreme = sample
+            return []
+        self.tail.add(angle, values)
+        if abs(self.extreme[2] - smooth) >= self.min_range:
+            reps = RepSegmenter._close_(self)
+            # The next phase starts at the turning point and goes the other way. Every sample since the turning point
+            # was closer to it than min_range, so this sample is the furthest the angle went the other way
+            RepSegmenter._move_(self, -self.direction, self.extreme, self.tail, sample)
+            return reps
+        return []
+
+    def _move_(self, direction: int, start: tuple, after: _Span, extreme: tuple) -> None:
+        """
+        A phase starts
+
+        :arg direction: 1 if the angle goes up, -1 if it goes down
+        :arg start: The turning point where it starts
+        :arg after: The samples after the turning point, up to extreme
+        :arg extreme: The furthest sample from start so far
+        """
+        self.direction = direction
+        self.start = start
+        self.extreme = extreme
+        self.span = _Span(self.accumulators)
+        self.span.add(start[1])  # The measures of the turning point belong to the phase before it
+        self.span.merge(after)
+        self.tail = _Span(self.accumulators)
+
+    def _end_(self) -> list[Rep]:
+        """
+        The last movement has no turning point after it, it ends where it went the furthest
+
+        :return: The rep completed by it, if any
+        """
+        if (self.direction != 0) and (abs(self.extreme[2] - self.start[2]) >= self.min_range):
+            reps = RepSegmenter._close_(self)
+            self.direction = 0
+            return reps
+        return []
+
+    def _close_(self) -> list[Rep]:
+        """
+        The extreme sample is a turning point: closes the phase that ends there
+
+        :return: The rep completed by this phase, if any
+        """
+        rising = self.direction == 1
+        kind = "concentric" if rising != self.decreasing else "eccentric"
+        phase = Phase(kind, self.start[0], self.extreme[0], self.start[2], self.extreme[2],
+                      self.span.angles.min, self.span.angles.max, self.span.measures, self.start[3])
+
+        if (kind == "concentric") == self.concentric_first:
+            self.first = phase
+            return []
+        if (self.first is not None) and (self.first.end == phase.start):
+            first = self.first
+            span = _Span(self.accumulators)
+            # The first frame of a rep is also the last frame of the rep before it, if they follow each other
+            if first.start != self.last_end:
+                span.add_values(first.start_values)
+            for moments in (first.stats, phase.stats):
+                for name, values in moments.items():
+                    span._measure_(name).merge(values)
+            stats = span.measures
+            first.stats, first.start_values, phase.stats, phase.start_values = {}, None, {}, None
+            self.reps += 1
+            self.first = None
+            self.last_end = phase.end
+            return [Rep(self.reps, [first, phase], stats)]
+        return []
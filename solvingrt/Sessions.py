@@ -0,0 +1,354 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# Local database of every set analysed, to follow the measures of each athlete over time
+
+import datetime
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from solvingrt import LandmarkCache as lc
+from solvingrt import Results as rs
+
+# The measures of the reps and of the sets are stored one value per row, so new measures don't change the tables.
+# Their primary key starts with (athlete, exercise, measure, time), and the tables are stored in the order of their
+# primary key (WITHOUT ROWID): the values of a measure for one athlete and one exercise over a time range are next
+# to each other on disk, and a query reads them in one pass, without sorting
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS athletes (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS exercises (id INTEGER PRIMARY KEY, name TEXT NOT NULL, muscle TEXT NOT NULL,
+                                      UNIQUE (name, muscle));
+CREATE TABLE IF NOT EXISTS measures (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS sets (id INTEGER PRIMARY KEY, athlete_id INTEGER NOT NULL REFERENCES athletes,
+                                 exercise_id INTEGER NOT NULL REFERENCES exercises, performed_at REAL NOT NULL,
+                                 reps INTEGER NOT NULL, video TEXT, video_hash TEXT, height_meter REAL,
+                                 body_weight_kg REAL, moving_limb_meter REAL, weight_used_kg REAL, side_seen TEXT);
+CREATE INDEX IF NOT EXISTS sets_by_time ON sets (athlete_id, exercise_id, performed_at);
+CREATE INDEX IF NOT EXISTS sets_by_video ON sets (video_hash);
+CREATE TABLE IF NOT EXISTS reps (set_id INTEGER NOT NULL REFERENCES sets, rep INTEGER NOT NULL,
+                                 frame INTEGER NOT NULL, PRIMARY KEY (set_id, rep)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rep_values (athlete_id INTEGER NOT NULL, exercise_id INTEGER NOT NULL,
+                                       measure_id INTEGER NOT NULL, performed_at REAL NOT NULL,
+                                       set_id INTEGER NOT NULL, rep INTEGER NOT NULL, value REAL NOT NULL,
+                                       PRIMARY KEY (athlete_id, exercise_id, measure_id, performed_at, set_id, rep))
+                                       WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rep_values_by_set ON rep_values (set_id);
+CREATE TABLE IF NOT EXISTS set_values (athlete_id INTEGER NOT NULL, exercise_id INTEGER NOT NULL,
+                                       measure_id INTEGER NOT NULL, performed_at REAL NOT NULL,
+                                       set_id INTEGER NOT NULL, value REAL NOT NULL,
+                                       PRIMARY KEY (athlete_id, exercise_id, measure_id, performed_at, set_id))
+                                       WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS set_values_by_set ON set_values (set_id);
+"""
+
+# Keys of Results.SetResult.info stored with each set, in the columns of the same name
+ATHLETE_COLUMNS = ["height_meter", "body_weight_kg", "moving_limb_meter", "weight_used_kg", "side_seen"]
+
+
+def timestamp(when) -> float:
+    """
+    :arg when: A datetime, a date, a number of seconds since 1970 or an ISO 8601 string ("2024-03-01", ...)
+
+    :return: The number of seconds since 1970 (UTC)
+    """
+    if isinstance(when, str):
+        when = datetime.datetime.fromisoformat(when)
+    if isinstance(when, datetime.datetime):
+        return when.timestamp()
+    if isinstance(when, datetime.date):
+        return datetime.datetime(when.year, when.month, when.day).timestamp()
+    return float(when)
+
+
+class SessionStore:
+    """
+    SQLite database of the sets analysed: one row per set (athlete, exercise, time, the Athlete parameters and
+    the hash of the video), and the measures of each rep and of each set.
+    The queries give NumPy arrays
+    """
+
+    def __init__(self, path: str = None):
+        """
+        :arg path: The database file (created if needed), default: ~/.local/share/solvingrt/sessions.sqlite.
+        ":memory:" for a database that isn't saved
+        """
+        if path is None:
+            directory = os.path.join(os.path.expanduser("~"), ".local", "share", "solvingrt")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, "sessions.sqlite")
+        self.path = path
+        # Exercises analysed in threads (e.g. MultiView) can share the store, writes are serialized by the lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        # Written once per batch of sets instead of once per row, and readers aren't blocked while writing
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._ids = {"athletes": {}, "exercises": {}, "measures": {}}  # Ids already looked up, by name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        SessionStore.close(self)
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _id_(self, table: str, *names):
+        """
+        :arg table: "athletes", "measures" (names: name) or "exercises" (names: name, muscle)
+        :arg names: The values of the unique columns
+
+        :return: The id of the row, added if it doesn't exist
+        """
+        known = self._ids[table]
+        if names not in known:
+            columns = ["name", "muscle"][:len(names)]
+            where = " AND ".join(f"{column} = ?" for column in columns)
+            self.connection.execute(f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) "
+                                    f"VALUES ({', '.join('?' * len(names))})", names)
+            known[names] = self.connection.execute(f"SELECT id FROM {table} WHERE {where}", names).fetchone()[0]
+        return known[names]
+
+    def _find_(self, table: str, column: str, value) -> list:
+        """
+        :return: The ids of the rows whose column is value, without adding any
+        """
+        return [row[0] for row in self.connection.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,))]
+
+    def add(self, sets, athlete: str, performed_at=None, hash_videos: bool = True) -> list[int]:
+        """
+        Stores sets, all at once (one transaction)
+
+        :arg sets: A Results.SetResult (e.g. Exercise.results), or a list of them
+        :arg athlete: Name of the athlete
+        :arg performed_at: When the sets were done (see timestamp), one for all the sets or one per set.
+        Default: the modification time of the video, or now if the video isn't found
+        :arg hash_videos: Store the SHA-1 of the videos (see LandmarkCache.video_hash), to find them again
+
+        :return: The id of each set
+        """
+        if isinstance(sets, rs.SetResult):
+            sets = [sets]
+        if not isinstance(performed_at, (list, tuple)):
+            performed_at = [performed_at] * len(sets)
+        if len(performed_at) != len(sets):
+            raise ValueError(f"{len(performed_at)} times for {len(sets)} sets")
+        # Checked (and the videos hashed) before anything is written
+        videos = []
+        for set_result, when in zip(sets, performed_at):
+            video = set_result.info.get("path_to_video")
+            found = isinstance(video, str) and os.path.isfile(video)
+            if when is None:
+                when = os.path.getmtime(video) if found else time.time()
+            video_hash = lc._LandmarkCache.video_hash(video) if (found and hash_videos) else None
+            videos += [(video, timestamp(when), video_hash)]
+        ids = []
+        with self.lock:
+            known = {table: dict(names) for table, names in self._ids.items()}
+            try:
+                with self.connection:
+                    SessionStore._insert_(self, sets, athlete, videos, ids)
+            except BaseException:
+                self._ids = known  # The ids added by the transaction were rolled back with it
+                raise
+        return ids
+
+    def _insert_(self, sets: list, athlete: str, videos: list, ids: list) -> None:
+        """
+        Inserts the sets, in the transaction of add
+
+        :arg sets: The Results.SetResult to store
+        :arg athlete: Name of the athlete
+        :arg videos: (video, time, hash of the video) of each set
+        :arg ids: Where the id of each set is added
+        """
+        athlete_id = SessionStore._id_(self, "athletes", athlete)
+        for set_result, (video, when, video_hash) in zip(sets, videos):
+            info = set_result.info
+            exercise_id = SessionStore._id_(self, "exercises", str(info.get("exercise_name", "")),
+                                            str(info.get("muscle", "")))
+            cursor = self.connection.execute(
+                f"INSERT INTO sets (athlete_id, exercise_id, performed_at, reps, video, video_hash, "
+                f"{', '.join(ATHLETE_COLUMNS)}) VALUES ({', '.join('?' * (6 + len(ATHLETE_COLUMNS)))})",
+                [athlete_id, exercise_id, when, len(set_result), video, video_hash]
+                + [info.get(column) for column in ATHLETE_COLUMNS])
+            set_id = cursor.lastrowid
+            ids += [set_id]
+            key = (athlete_id, exercise_id)
+
+            numbers = set_result.columns["rep"].tolist()
+            self.connection.executemany("INSERT INTO reps VALUES (?, ?, ?)",
+                                        zip([set_id] * len(numbers), numbers,
+                                            set_result.columns["frame"].tolist()))
+            rows = []
+            for name in set_result.measures():
+                measure_id = SessionStore._id_(self, "measures", name)
+                values = set_result.columns[name].astype(np.float64)
+                keep = ~np.isnan(values)  # Measures that weren't found in a rep aren't stored
+                rows += [(*key, measure_id, when, set_id, number, value)
+                         for number, value in zip(np.array(numbers)[keep].tolist(), values[keep].tolist())]
+            self.connection.executemany("INSERT INTO rep_values VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            rows = [(*key, SessionStore._id_(self, "measures", name), when, set_id, float(value))
+                    for name, value in set_result.summary.items()
+                    if isinstance(value, (int, float, np.number)) and not np.isnan(value)]
+            self.connection.executemany("INSERT INTO set_values VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def _where_(self, athlete: str, exercise: str, measure: str, start, end, muscle: str = None) -> tuple:
+        """
+        :return: The conditions of a query on rep_values or set_values and their parameters, None if nothing
+        can match (unknown athlete, exercise or measure)
+        """
+        athletes = SessionStore._find_(self, "athletes", "name", athlete)
+        measures = SessionStore._find_(self, "measures", "name", measure)
+        query = "SELECT id FROM exercises WHERE name = ?" + (" AND muscle = ?" if muscle is not None else "")
+        exercises = [row[0] for row in self.connection.execute(query, (exercise,) if muscle is None
+                                                                  else (exercise, muscle))]
+        if not (athletes and measures and exercises):
+            return None
+        where = (f"athlete_id = ? AND exercise_id IN ({', '.join('?' * len(exercises))}) AND measure_id = ? "
+                 "AND performed_at >= ? AND performed_at < ?")
+        parameters = [athletes[0], *exercises, measures[0],
+                      -np.inf if start is None else timestamp(start), np.inf if end is None else timestamp(end)]
+        return where, parameters
+
+    def rep_values(self, athlete: str, exercise: str, measure: str, start=None, end=None,
+                   muscle: str = None) -> dict:
+        """
+        The value of a measure in every rep of an athlete on an exercise, e.g. "conc_velocity"
+
+        :arg athlete: Name of the athlete
+        :arg exercise: Name of the exercise
+        :arg measure: Name of the measure (a column of Results.SetResult)
+        :arg start: Only the sets done at or after start (see timestamp)
+        :arg end: Only the sets done before end
+        :arg muscle: Only the sets of the exercise on that muscle
+
+        :return: {"time": when the set was done (s since 1970), "set": id of the set, "rep": number of the rep,
+        "value"}, one NumPy array each, ordered by time
+        """
+        where = SessionStore._where_(self, athlete, exercise, measure, start, end, muscle)
+        rows = [] if where is None else self.connection.execute(
+            f"SELECT performed_at, set_id, rep, value FROM rep_values WHERE {where[0]} "
+            "ORDER BY performed_at, set_id, rep", where[1]).fetchall()
+        table = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        return {"time": table[:, 0], "set": table[:, 1].astype(np.int64), "rep": table[:, 2].astype(np.int32),
+                "value": table[:, 3]}
+
+    def set_values(self, athlete: str, exercise: str, measure: str, start=None, end=None,
+                   muscle: str = None) -> dict:
+        """
+        The value of a measure of the set (e.g. "velocity_lost") in every set of an athlete on an exercise
+
+        :arg athlete: Name of the athlete
+        :arg exercise: Name of the exercise
+        :arg measure: Name of the measure (a key of Results.SetResult.summary)
+        :arg start: Only the sets done at or after start (see timestamp)
+        :arg end: Only the sets done before end
+        :arg muscle: Only the sets of the exercise on that muscle
+
+        :return: {"time": when the set was done (s since 1970), "set": id of the set, "value"}, one NumPy array
+        each, ordered by time
+        """
+        where = SessionStore._where_(self, athlete, exercise, measure, start, end, muscle)
+        rows = [] if where is None else self.connection.execute(
+            f"SELECT performed_at, set_id, value FROM set_values WHERE {where[0]} ORDER BY performed_at, set_id",
+            where[1]).fetchall()
+        table = np.array(rows, dtype=np.float64).reshape(-1, 3)
+        return {"time": table[:, 0], "set": table[:, 1].astype(np.int64), "value": table[:, 2]}
+
+    def sets(self, athlete: str = None, exercise: str = None, start=None, end=None) -> list[dict]:
+        """
+        :arg athlete: Only the sets of that athlete
+        :arg exercise: Only the sets of that exercise
+        :arg start: Only the sets done at or after start (see timestamp)
+        :arg end: Only the sets done before end
+
+        :return: One dict per set (id, athlete, exercise_name, muscle, performed_at, reps, video, video_hash
+        and the Athlete parameters), ordered by time
+        """
+        conditions, parameters = ["performed_at >= ?", "performed_at < ?"], [
+            -np.inf if start is None else timestamp(start), np.inf if end is None else timestamp(end)]
+        if athlete is not None:
+            conditions += ["athletes.name = ?"]
+            parameters += [athlete]
+        if exercise is not None:
+            conditions += ["exercises.name = ?"]
+            parameters += [exercise]
+        cursor = self.connection.execute(
+            "SELECT sets.id AS id, athletes.name AS athlete, exercises.name AS exercise_name, muscle, performed_at, "
+            f"reps, video, video_hash, {', '.join(ATHLETE_COLUMNS)} FROM sets "
+            "JOIN athletes ON athletes.id = athlete_id JOIN exercises ON exercises.id = exercise_id "
+            f"WHERE {' AND '.join(conditions)} ORDER BY performed_at, sets.id", parameters)
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor]
+
+    def load(self, set_id: int) -> rs.SetResult:
+        """
+        :arg set_id: The id of a set (see add and sets)
+
+        :return: The set, as it was stored (the segments of the reps aren't stored)
+        """
+        row = self.connection.execute(
+            f"SELECT exercises.name, muscle, video, {', '.join(ATHLETE_COLUMNS)} FROM sets "
+            "JOIN exercises ON exercises.id = exercise_id WHERE sets.id = ?", (set_id,)).fetchone()
+        if row is None:
+            raise Exception(f"No set with id {set_id}")
+        info = dict(zip(["exercise_name", "muscle", "path_to_video"] + ATHLETE_COLUMNS, row))
+        reps = {rep: rs.RepResult(rep, frame) for rep, frame in self.connection.execute(
+            "SELECT rep, frame FROM reps WHERE set_id = ? ORDER BY rep", (set_id,))}
+        for rep, name, value in self.connection.execute(
+                "SELECT rep, name, value FROM rep_values JOIN measures ON measures.id = measure_id "
+                "WHERE set_id = ? ORDER BY measure_id", (set_id,)):
+            reps[rep][name] = value
+        summary = {name: value for name, value in self.connection.execute(
+            "SELECT name, value FROM set_values JOIN measures ON measures.id = measure_id WHERE set_id = ?",
+            (set_id,))}
+        if "reps" in summary:
+            summary["reps"] = int(summary["reps"])
+        return rs.SetResult(list(reps.values()), summary, info)
+
+    def delete(self, set_id: int) -> None:
+        """
+        :arg set_id: The id of the set to remove, with its reps
+        """
+        with self.lock, self.connection:
+            for table in ("rep_values", "set_values", "reps"):
+                self.connection.execute(f"DELETE FROM {table} WHERE set_id = ?", (set_id,))
+            self.connection.execute("DELETE FROM sets WHERE id = ?", (set_id,))
+
+    def names(self, table: str) -> list[str]:
+        """
+        :arg table: "athletes", "exercises" or "measures"
+
+        :return: The names stored
+        """
+        if table not in self._ids:
+            print(f"{table} is not a valid input. Options are {list(self._ids)}.")
+            raise ValueError(table)
+        return [row[0] for row in self.connection.execute(f"SELECT DISTINCT name FROM {table} ORDER BY name")]
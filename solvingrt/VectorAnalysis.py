@@ -0,0 +1,229 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+# Same measures as _VideoAnalysis and _PoseDetector, but computed for every frame of a video at once.
+# The landmarks are a (frames x 33 x 2) array, in pixels
+
+import numpy as np
+
+
+class _VectorAnalysis:
+
+    G = 9.8  # Gravitational constant
+    RAD_TO_DEG = 57.2958  # 180 / pi = 57.2958
+    DEG_TO_RAD = 0.0174533  # pi / 180 = 0.0174533
+    NB_LANDMARKS = 33  # https://google.github.io/mediapipe/solutions/pose.html
+    LAG = 3  # The velocity is measured between a frame and the 3rd frame before it (see _VideoAnalysis.speed)
+
+    def __init__(self, athlete, exercise):
+        self.athlete = athlete  # Class Athlete from SolvingRT file
+        self.exercise = exercise  # Class Exercise from SolvingRT file
+        self.points = self.exercise._get_pose_landmarks_()
+        self.side_seen = self.athlete.side_seen
+
+    @staticmethod
+    def stack(landmarks: list) -> tuple:
+        """
+        :arg landmarks: A list (one element per frame) of the landmarks given by _PoseDetector.find_position
+
+        :return: The (frames x 33 x 2) array of the landmarks, and a boolean array that is True for the frames
+        where a person was found (the landmarks of the other frames are 0)
+        """
+        positions = np.zeros((len(landmarks), _VectorAnalysis.NB_LANDMARKS, 2), dtype=np.int32)
+        detected = np.zeros(len(landmarks), dtype=bool)
+        for i, frame in enumerate(landmarks):
+            if len(frame) > 0:
+                positions[i] = frame
+                detected[i] = True
+        return positions, detected
+
+    @staticmethod
+    def _angles_(p1: np.ndarray, p2: np.ndarray, p3: np.ndarray) -> np.ndarray:
+        """
+        Law of cosine (see MathTools._law_of_cosine) for every frame
+
+        :args: Three (frames x 2) arrays of points
+
+        :return: The angles (°) at p2
+        """
+        side_c = np.hypot(p3[:, 0] - p2[:, 0], p3[:, 1] - p2[:, 1])
+        side_a = np.hypot(p2[:, 0] - p1[:, 0], p2[:, 1] - p1[:, 1])
+        side_b = np.hypot(p3[:, 0] - p1[:, 0], p3[:, 1] - p1[:, 1])
+        deno = 2 * side_c * side_a
+        deno[deno == 0] = 0.001  # Shouldn't happen, but prevents a potential bug
+        cos_angle = ((side_c ** 2) + (side_a ** 2) - (side_b ** 2)) / deno
+        return np.arccos(np.clip(cos_angle, -1, 1)) * _VectorAnalysis.RAD_TO_DEG
+
+    def _front_points_(self, positions: np.ndarray) -> tuple:
+        """
+        :return: The elbow, the shoulder and a point under the shoulder, used when filming from the front or back
+        """
+        elbow, shoulder = (14, 12) if self.exercise.right_side is True else (13, 11)
+        p1 = positions[:, elbow].astype(np.float64)
+        p2 = positions[:, shoulder].astype(np.float64)
+        p3 = p2.copy()
+        p3[:, 1] += 100
+        return p1, p2, p3
+
+    def joint_angles(self, positions: np.ndarray) -> np.ndarray:
+        """
+        :arg positions: (frames x 33 x 2) array of landmarks
+
+        :return: The angle (°) of the moving joint in every frame (see _PoseDetector.find_angle)
+        """
+        side = self.side_seen.lower()
+        if (side == "left") or (side == "right"):
+            p1, p2, p3 = (positions[:, pt].astype(np.float64) for pt in self.points)
+        elif (side == "front") or (side == "back"):
+            if self.exercise.pose.is_upper_body():
+                p1, p2, p3 = _VectorAnalysis._front_points_(self, positions)
+            else:
+                raise Exception("Sides 'front' and 'back' are only supported for upper body muscles.")
+        else:
+            print(f"{self.side_seen} is not a valid input. Options are 'right', 'left', 'front' and 'back'.")
+            raise ValueError(self.side_seen)
+        return _VectorAnalysis._angles_(p1, p2, p3)
+
+    def gravity_angles(self, positions: np.ndarray) -> np.ndarray:
+        """
+        :arg positions: (frames x 33 x 2) array of landmarks
+
+        :return: The angle (°) between the moving limb and a line parallel to gravity in every frame
+        (see _PoseDetector.find_angle_gravity)
+        """
+        side = self.side_seen.lower()
+        if (side == "left") or (side == "right"):
+            p2 = positions[:, self.points[2]].astype(np.float64)
+            p1 = p2.copy()
+            p1[:, 1] += 60
+            p3 = positions[:, self.points[1]].astype(np.float64)
+        else:
+            p1, p2, p3 = _VectorAnalysis._front_points_(self, positions)
+        return _VectorAnalysis._angles_(p1, p2, p3)
+
+    def effective_lengths(self, positions: np.ndarray) -> np.ndarray:
+        """
+        :arg positions: (frames x 33 x 2) array of landmarks
+
+        :return: The length (in percentage of the full limb length) perpendicular to gravity in every frame
+        (see _PoseDetector.find_length)
+        """
+        positions = positions.astype(np.float64)
+        if (self.side_seen == "left") or (self.side_seen == "right"):
+            weight_pos = self.exercise.pose.weight_position()
+            if weight_pos is None:
+                weight_x = positions[:, self.points[2], 0]
+                weight_y = positions[:, self.points[2], 1]
+            else:
+                # Same center of mass as MathTools._center_of_mass, including its truncation to an integer
+                athlete = self.exercise.athlete
+                human_cm_x = positions[:, 23 if self.side_seen == "left" else 24, 0]
+                weight_x = np.trunc((human_cm_x * athlete.body_weight) +
+                                    (positions[:, weight_pos[self.side_seen], 0] * athlete.weight_used) /
+                                    (athlete.body_weight + athlete.weight_used))
+                weight_y = positions[:, weight_pos[self.side_seen], 1]
+            joint = positions[:, self.points[1]]
+        else:
+            joint, weight = (positions[:, 12], positions[:, 16]) if self.exercise.right_side is True \
+                else (positions[:, 11], positions[:, 15])
+            weight_x, weight_y = weight[:, 0], weight[:, 1]
+
+        total_length = np.hypot(weight_x - joint[:, 0], weight_y - joint[:, 1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.abs(weight_x - joint[:, 0]) / total_length
+
+    @staticmethod
+    def angular_velocity(angles: np.ndarray, times: np.ndarray) -> np.ndarray:
+        """
+        :arg angles: The angles (°) of the frames where a person was found
+        :arg times: The matching times
+
+        :return: The angular velocity (rad/s) of every frame, measured like _VideoAnalysis.speed.
+        The first frames, which don't have enough frames before them, are 0 (like the "velocity" feature of Measures)
+        """
+        lag = _VectorAnalysis.LAG
+        velocity = np.zeros(len(angles))
+        if len(angles) > lag:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                velocity[lag:] = ((angles[lag:] - angles[:-lag]) * _VectorAnalysis.DEG_TO_RAD) / \
+                                 (times[lag:] - times[:-lag])
+        return velocity
+
+    def torque(self, eff_lengths: np.ndarray) -> np.ndarray:
+        """
+        :arg eff_lengths: The effective length of every frame
+
+        :return: torque (Nm) of every frame (see _VideoAnalysis.torque)
+        """
+        return self.athlete.moving_limb * self.athlete.weight_used * eff_lengths * _VectorAnalysis.G
+
+    def power(self, velocity: np.ndarray, eff_lengths: np.ndarray) -> np.ndarray:
+        """
+        :arg velocity: The angular velocity (rad/s) of every frame
+        :arg eff_lengths: The effective length of every frame
+
+        :return: power (W) of every frame (see _VideoAnalysis.power)
+        """
+        return self.athlete.moving_limb * self.athlete.weight_used * velocity * eff_lengths * _VectorAnalysis.G
+
+    @staticmethod
+    def time_under_tension(eff_lengths: np.ndarray) -> np.ndarray:
+        """
+        :arg eff_lengths: The effective length of every frame
+
+        :return: 1 for the frames under significant tension, 0 for the others (see _VideoAnalysis.time_under_tension)
+        """
+        return np.where(eff_lengths < 0.05, 0, 1)
+
+    def series(self, positions: np.ndarray, detected: np.ndarray, frame_rate: float) -> dict:
+        """
+        Every measure that depends on a single frame (or on the few frames before it), for every frame
+
+        :arg positions: (frames x 33 x 2) array of landmarks
+        :arg detected: True for the frames where a person was found
+        :arg frame_rate: The same "FRAME_RATE" as in Exercise.play_video (times are frame number x frame_rate)
+
+        :return: A dict of arrays, with one value per frame (NaN where no person was found):
+        "times", "angle", "angle_gravity", "effective_length", "velocity", "torque" and "power"
+        """
+        frames = len(positions)
+        found = np.flatnonzero(detected)
+        valid = positions[found]
+        times = (np.arange(frames) + 1) * frame_rate
+
+        def spread(values: np.ndarray) -> np.ndarray:
+            full = np.full(frames, np.nan)
+            full[found] = values
+            return full
+
+        angles = _VectorAnalysis.joint_angles(self, valid)
+        eff_lengths = _VectorAnalysis.effective_lengths(self, valid)
+        velocity = _VectorAnalysis.angular_velocity(angles, times[found])
+        return {"times": times,
+                "angle": spread(angles),
+                "angle_gravity": spread(_VectorAnalysis.gravity_angles(self, valid)),
+                "effective_length": spread(eff_lengths),
+                "velocity": spread(velocity),
+                "torque": spread(_VectorAnalysis.torque(self, eff_lengths)),
+                "power": spread(_VectorAnalysis.power(self, velocity, eff_lengths))}
@@ -22,8 +22,8 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-import matplotlib.pyplot as plt
 from solvingrt import MathTools as mt
+from solvingrt import ResistanceProfile as rp
 import os
 
 
@@ -37,18 +37,19 @@ class _VideoAnalysis:
         self.athlete = athlete  # Class Athlete from SolvingRT file
         self.exercise = exercise  # Class Exercise from SolvingRT file
         self.measures = self.exercise.measures
+        self.points = self.exercise._get_pose_landmarks_()  # The three joints to follow
 
     def angle(self) -> float:
         """
         :return: The angle (°) of the moving joint
         """
-        return self.exercise.pose.find_angle(self.exercise._get_pose_landmarks_())
+        return self.exercise.pose.find_angle(self.points)
 
     def angle_gravity(self) -> float:
         """
         :return: The angle (°) between the moving limb and a parallel line to gravity
         """
-        return self.exercise.pose.find_angle_gravity(self.exercise._get_pose_landmarks_())
+        return self.exercise.pose.find_angle_gravity(self.points)
 
     def torque(self, eff_length: float) -> float:
         """
@@ -111,21 +112,14 @@ class _VideoAnalysis:
         """
         raise NotImplementedError
 
-    def resistance_profile(self, torque: list[float], angles: list[float]) -> None:
+    def resistance_profile(self, profile) -> None:
         """
         The resistance profile is defined as the torque for every angle of the exercise
 
-        :arg torque: List of every torque calculated
-        :arg angles: List of every matching angles
+        :arg profile: The torque binned by angle (ResistanceProfile)
 
         Saves the graph as a png file
         """
-        plt.plot(angles, torque, "b")
-        plt.xlabel("Angle (°)")
-        plt.ylabel("Torque (Nm)")
-        plt.title(f"Resistance profile of a {self.exercise.name.lower()}")
-        plt.savefig(os.getcwd() + f"/resistance_profile ({self.exercise.name}).png")
-        plt.cla()
-        plt.clf()
-        plt.close()
+        rp.render([profile], os.getcwd() + f"/resistance_profile ({self.exercise.name}).png",
+                  f"Resistance profile of a {self.exercise.name.lower()}")
 
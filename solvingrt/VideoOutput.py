@@ -0,0 +1,90 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+
+# Writes the annotated frames to a video file (see Exercise.save_video and Exercise.render_video)
+
+import queue
+import threading
+import cv2
+
+
+class _AnnotatedWriter:
+    """
+    Encodes the frames on its own thread, so that encoding a frame overlaps with the analysis of the next ones.
+    The frames wait in a bounded queue: when the encoder falls behind, write waits instead of keeping every frame
+    """
+
+    def __init__(self, path: str, fps: float, size: tuple, fourcc: str = "mp4v", queue_size: int = 32):
+        """
+        :arg path: The video file to write
+        :arg fps: Frames per second of the video written
+        :arg size: (width, height) of the frames
+        :arg fourcc: Codec (four characters, e.g. "mp4v", "MJPG", "avc1")
+        :arg queue_size: Frames that can wait to be encoded
+        """
+        self.path = path
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, size)
+        if not self.writer.isOpened():
+            raise Exception(f"Can't write {path} with the codec {fourcc}")
+        self.queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.frames = 0  # Frames written
+        self.error = None  # Raised by write or close if encoding failed
+        self.thread = threading.Thread(target=_AnnotatedWriter._run_, args=(self,), name="solvingrt-writer",
+                                       daemon=True)
+        self.thread.start()
+
+    def _run_(self) -> None:
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                return
+            if self.error is None:
+                try:
+                    self.writer.write(frame)
+                    self.frames += 1
+                except Exception as error:
+                    self.error = error  # The frames left are dropped, the error is raised in the analysis
+
+    def write(self, frame) -> None:
+        """
+        :arg frame: The annotated frame (it must not be changed afterwards)
+        """
+        if self.error is not None:
+            raise self.error
+        self.queue.put(frame)
+
+    def close(self) -> None:
+        """
+        Waits for every frame to be encoded and closes the file
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.writer.release()
+        if self.error is not None:
+            raise self.error
+
+    def __repr__(self) -> str:
+        return f"_AnnotatedWriter({self.path}, {self.frames} frames written)"
@@ -22,4 +22,13 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-from solvingrt.solve import Athlete, Exercise
+# Athlete and Exercise are only imported when they are used, so that importing solvingrt (e.g. to read results)
+# doesn't load OpenCV, MediaPipe and Matplotlib
+__all__ = ["Athlete", "Exercise"]
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        from solvingrt import solve
+        return getattr(solve, name)
+    raise AttributeError(f"module 'solvingrt' has no attribute '{name}'")
@@ -25,9 +25,25 @@ SOFTWARE.
 
 import os
 import cv2
+import numpy as np
 from solvingrt import PoseDetector as pd
 from solvingrt import VideoAnalysis as va
-from solvingrt import MathTools as mt
+from solvingrt import VectorAnalysis as vec
+from solvingrt import LandmarkCache as lc
+from solvingrt import Sampler as sp
+from solvingrt import Results as rs
+from solvingrt import Profiler as pf
+from solvingrt import PosePool as pp
+from solvingrt import Quality as qu
+from solvingrt import Buffers as bf
+from solvingrt import Segmenter as sg
+from solvingrt import Filters as fl
+from solvingrt import Accumulators as ac
+from solvingrt import VideoOutput as vo
+from solvingrt import LiftWindow as lw
+from solvingrt import Sessions as ss
+from solvingrt import Measures as ms
+from solvingrt import Keypoints as kp
 
 
 class Athlete:
@@ -64,6 +80,26 @@ class Athlete:
 
 class Exercise:
 
+    # The three points to follow, depending on the muscle and the side seen by the camera.
+    # Front and back are mostly used to draw the lines, not for measurements.
+    # They are (right side, left side), see switch_side
+    LANDMARKS = {"chest": {"right": [12, 14, 16], "left": [11, 13, 15],
+                           "front": ([14, 12, 24], [13, 11, 23]), "back": ([14, 12, 24], [13, 11, 23])},
+                 "biceps": {"right": [12, 14, 16], "left": [11, 13, 15],
+                            "front": ([14, 12, 24], [13, 11, 23]), "back": ([14, 12, 24], [13, 11, 23])},
+                 "triceps": {"right": [12, 14, 16], "left": [11, 13, 15],
+                             "front": ([14, 12, 24], [13, 11, 23]), "back": ([14, 12, 24], [13, 11, 23])},
+                 "deltoids": {"right": [14, 12, 24], "left": [13, 11, 23],
+                              "front": ([14, 12, 24], [13, 11, 23]), "back": ([14, 12, 24], [13, 11, 23])},
+                 "back": {"right": [14, 12, 24], "left": [13, 11, 23],
+                          "front": ([14, 12, 24], [13, 11, 23]), "back": ([14, 12, 24], [13, 11, 23])},
+                 "quadriceps": {"right": [24, 26, 28], "left": [23, 25, 27],
+                                "front": ([24, 26, 28], [23, 25, 27]), "back": ([24, 26, 28], [23, 25, 27])},
+                 "hamstrings": {"right": [24, 26, 28], "left": [23, 25, 27],
+                                "front": ([24, 26, 28], [23, 25, 27]), "back": ([24, 26, 28], [23, 25, 27])},
+                 "glutes": {"right": [12, 24, 26], "left": [11, 23, 25],
+                            "front": ([12, 24, 26], [11, 23, 25]), "back": ([12, 24, 26], [11, 23, 25])}}
+
     def __init__(self, exercise_name: str, muscle: str, path_to_video: str, athlete: Athlete, measures: list[str]):
         self.name = exercise_name
         self.muscle = muscle
@@ -71,11 +107,34 @@ class Exercise:
         self.athlete = athlete
         self.measures = measures
         self.draw = True
+        self.display = True
         self.show_joint_angle = False
         self.show_angle_with_gravity = False
         self.save_f = False
+        self.output = None  # (path, fourcc, queue_size) of the annotated video to write, see save_video
         self.right_side = False
         self.width, self.height = 0, 0
+        self.cache = None
+        self.keypoints = None  # Landmarks analysed instead of the video (Keypoints.KeypointStream), see use_keypoints
+        self.store = None  # (SessionStore, athlete) where every set analysed is added, see use_store
+        self.time_range = (None, None)  # Start and end (s) of the part of the video analysed, see analyse_range
+        self.first_frame = 0  # Frame of the video where the last analysis started (frames are counted from it)
+        self.sampling = None
+        self.keep_landmarks = True  # False to not keep the landmarks of every frame, see stream
+        self.statistics = {}  # Statistics of the angle and of each measure sampled in the last video (Summary)
+        self.smoothing = None  # Filter of the landmarks (see smooth_landmarks), None to measure them as found
+        self.segmentation = (30.0, 5)  # Smallest movement (°) counted and samples averaged, see rep_detection
+        self.profile_settings = (5.0, True)  # Width (°) of the bins and True to draw the graph, see resistance_profile
+        self.torque_profile = None  # Resistance profile of the last video (ResistanceProfile), if measured
+        self.segments = []  # Phases of every rep of the last video analysed (Segmenter.Rep)
+        self.quality_profile = None  # Name of the profile used, see quality
+        self.callbacks = []  # Called with the data of each rep (see on_rep)
+        self.stopped = False  # Set by stop, from another thread, to end the analysis at the next frame
+        self.results = None  # Data of the last set analysed (Results.SetResult)
+        self.landmarks = bf._LandmarkBuffer(0)  # Landmarks of every frame of the last video analysed
+        self.frame_rate = 0
+        self.frame_period = 1 / 30  # Time (s) between two frames of the last video analysed
+        self.stats = None  # Time spent in each stage of the last analysis (Profiler.FrameStats), see profile
         self.pose = pd._PoseDetector(self)
 
     def play_video(self):
@@ -85,302 +144,504 @@ class Exercise:
 
         Every other classes and methods are called from this function. It computes and stores basically every
         piece of data possible (in this library)
+
+        :return: The data calculated for each rep and the data calculated for the set
         """
-        VID = cv2.VideoCapture(self.video)
+        for _ in Exercise.iter_reps(self):
+            pass
+        rep_data = self.results.rep_text()  # Data that is calculated for each rep (eg power and velocity)
+        set_data = self.results.set_text()  # Data that is calculated for the full set (eg time under tension)
+
+        if self.save_f is True:
+            Exercise._save_data_(self, rep_data, set_data)
+        elif self.display is True:
+            Exercise._print_data_(self, rep_data, set_data)
+        return rep_data, set_data
+
+    def iter_reps(self):
+        """
+        Analyses the video like play_video, but gives the data of each rep as soon as the rep is completed,
+        instead of at the end of the video. Callbacks registered with on_rep are called with the same data
+
+        :return: A generator of Results.RepResult, one for each rep, with the rep number, the frame where
+        it was completed and the measures of that rep (e.g. "torque", "conc_velocity", "min_angle").
+        The last one is the Results.SetResult of the set (also kept in self.results), with the measures of every
+        rep as columns and the data of the set in its summary (e.g. "time_under_tension", "velocity_lost")
+        """
+        if self.keypoints is None:
+            VID = cv2.VideoCapture(self.video)
+            if not VID.isOpened():
+                raise Exception(f"Can't read {self.video}")
+        else:
+            VID = kp._KeypointCapture(self.keypoints)  # Nothing to decode
         POINTS = Exercise._get_pose_landmarks_(self)
         ANALYSIS = va._VideoAnalysis(self.athlete, self)
         frame_counts = 0
-        times = []
-        angles = []
-        rep_angles = []
-        concentric_time = 0
-        eccentric_time = 0
         # TODO: Measure the amount of time spent while in lengthened or shortened position (for tempo)
         # lengthened_time = 0
         # shortened_time = 0
-        tust = 0  # time under significant tension
-        concentric_speed = []  # To measure velocity lost
-        conc_velocity = []
-        ecc_velocity = []
-        conc_power = []
-        ecc_power = []
-        torque = []
-        res_pro_angles = []
-        res_pro_torque = []
-        is_parallel = False
-
-        time_under_tension = False
-        min_max_angles = False
-        velocity_lost = False
-        res_pro = False
-        parallel = False
-        work = False
-        for measure in self.measures:
-            measure = measure.lower()
-            if measure == "time under tension":
-                time_under_tension = True
-            elif measure == "angles":
-                min_max_angles = True
-            elif measure == "velocity lost":
-                velocity_lost = True
-            elif measure == "resistance profile":
-                res_pro = True
-            elif (measure == "parallel") and ("squat" in self.name.lower()):
-                parallel = True
-            elif measure == "work":
-                work = True
-            elif measure == "speed":
-                pass
-            elif measure == "torque":
-                pass
-            elif measure == "power":
-                pass
-            elif measure == "tempo":
-                pass
-            else:
-                print(f"{measure} is not a valid input.")
-                raise ValueError(measure)
+        statistics = {"angle": ac.Summary()}  # Every angle and every measure sampled, see Exercise.statistics
+
+        # The features each measure needs, calculated once per frame (see Measures)
+        conc_motion = Exercise._get_muscle_info_(self, "conc_motion")
+        pipeline = ms._Pipeline(self, ANALYSIS, POINTS, conc_motion)
+        parallel = "parallel" in pipeline
 
-        rep_data = []  # Data that is calculated for each rep (eg power and velocity)
-        set_data = []  # Data that is calculated for the full set (eg time under tension)
-        add_data = False
+        rep_results = []
 
         # Count reps
-        rep_count = 0
-        last_rep = 0
-        conc_motion = Exercise._get_muscle_info_(self, "conc_motion")
-        is_shortening = Exercise._get_muscle_info_(self, "conc_motion")
-        angle_decreasing = Exercise._get_muscle_info_(self, "decreasing")
+        segmenter = sg.RepSegmenter(Exercise._get_muscle_info_(self, "decreasing"), conc_motion, *self.segmentation,
+                                    accumulators=pipeline.accumulators)
+        segments = []
 
         if (self.width == 0) or (self.height == 0):
             self.height = int(VID.get(cv2.CAP_PROP_FRAME_HEIGHT) / 2)
             self.width = int(VID.get(cv2.CAP_PROP_FRAME_WIDTH) / 2)
 
-        TOTAL_FRAMES = int(VID.get(cv2.CAP_PROP_FRAME_COUNT))
+        # Only the frames in the time range are decoded
+        self.first_frame, TOTAL_FRAMES = Exercise._seek_(self, VID)
+        # The last frame of the video isn't read (see _landmark_stream_), the range can end before it
+        FRAMES_TO_READ = TOTAL_FRAMES
+        if self.first_frame + TOTAL_FRAMES >= int(VID.get(cv2.CAP_PROP_FRAME_COUNT)):
+            FRAMES_TO_READ -= 1
         FRAME_RATE = int(VID.get(cv2.CAP_PROP_FPS)) / 1000
+        FRAME_PERIOD = 1 / (VID.get(cv2.CAP_PROP_FPS) or 30)  # Time (s) between two frames, for the filters
+
+        # Landmarks already found in a previous analysis of the same video.
+        # If the video isn't displayed, it doesn't even need to be decoded
+        cache_key = None
+        cached = None
+        series = None
+        found = bf._LandmarkBuffer(TOTAL_FRAMES if self.keep_landmarks else 0)  # Landmarks of every frame
+        arrays = None
+        at_once = False  # Every frame measured at once, see Measures._Pipeline.measure_all
+        if self.keypoints is not None:
+            arrays = self.keypoints.arrays(self.first_frame, TOTAL_FRAMES, self.width, self.height)
+        elif self.cache is not None:
+            cache_key = Exercise._cache_key_(self)
+            arrays = self.cache.load(cache_key)
+        if arrays is not None:
+            positions, detected, visibility = arrays
+            # Every landmark is known in advance, so they are smoothed and measured for every frame at once
+            measured = Exercise._smooth_(self, positions, detected, FRAME_PERIOD)
+            series = vec._VectorAnalysis(self.athlete, self).series(measured, detected, FRAME_RATE)
+            # Nothing needs the frames one at a time, so the reps are found and measured at once too
+            at_once = (not self.display) and (self.output is None) and (self.stats is None) and pipeline.vectorized()
+            if not at_once:
+                cached = [frame if ok else [] for frame, ok in zip(measured.tolist(), detected.tolist())]
+                series = {name: values.tolist() for name, values in series.items()}
+        if self.smoothing is not None:
+            self.smoothing.reset()
+        self.torque_profile = None
+        pipeline.start(FRAME_RATE, series)
+        writer = None
+        if (self.output is not None) and (self.keypoints is not None):
+            raise Exception("There is no video to write, the landmarks were given without one (see use_keypoints)")
+        if self.output is not None:
+            path, fourcc, queue_size = self.output
+            writer = vo._AnnotatedWriter(path, VID.get(cv2.CAP_PROP_FPS) or 30, (self.width, self.height), fourcc,
+                                         queue_size)
+        completed = False
+        stats = self.stats
+        if stats is not None:
+            stats.reset()
+
+        try:
+            if at_once:
+                reps, statistics = pipeline.measure_all(segmenter, series, measured, detected)
+                frame_counts = len(detected)
+                for segment in reps:
+                    if self.stopped:
+                        break
+                    rep_event = Exercise._rep_result_(self, segment, pipeline)
+                    segments += [segment]
+                    rep_results += [rep_event]
+                    Exercise._emit_(self, rep_event)
+                    yield rep_event
+                else:
+                    completed = True
+            else:
+                for video, landmarks in Exercise._landmark_stream_(self, VID, cached, POINTS, FRAMES_TO_READ):
+                    if self.stopped:
+                        break
+                    if (cached is None) and self.keep_landmarks:
+                        found.append(landmarks, self.pose.visibility)
+                    frame_counts += 1
+                    if (self.smoothing is not None) and (cached is None) and (len(landmarks) > 0):
+                        # The landmarks found are kept (and cached) as they are, only the measures use the smoothed ones
+                        landmarks = self.smoothing.update(frame_counts * FRAME_PERIOD, landmarks).tolist()
+                        self.pose.positions = landmarks
+                    if len(landmarks) > 0:
+                        # The angle, and the values of the measures sampled on this frame
+                        angle, values = pipeline.step(frame_counts, landmarks)
+                        statistics["angle"].add(angle)
+                        for name, value in values.items():
+                            if name not in pipeline.no_statistics:
+                                statistics.setdefault(name, ac.Summary()).add(value)
+
+                        # Count reps
+                        completed_reps = segmenter.update(frame_counts, angle, values)
+
+                        rep_events = [Exercise._rep_result_(self, segment, pipeline) for segment in completed_reps]
+                        segments += completed_reps
+                        rep_results += rep_events
+                        if stats is not None:
+                            stats.tick("measures")
+                        for rep_event in rep_events:
+                            Exercise._emit_(self, rep_event)
+                            yield rep_event
+                        if (stats is not None) and (len(rep_events) > 0):
+                            stats.restart()  # The time spent by the caller isn't part of the analysis
+                        if self.display or (writer is not None):
+                            Exercise._draw_(self, video, landmarks, POINTS, angle, parallel, ANALYSIS)
+                            if stats is not None:
+                                stats.tick("draw")
+
+                    if writer is not None:
+                        writer.write(video)  # Waits only if the encoder is behind by a whole queue
+                        if stats is not None:
+                            stats.tick("write")
+                    if self.display:
+                        cv2.imshow(f"{str(self.name)} - Calculating {self.measures}", video)
+                        key = cv2.waitKey(1)
+                        if stats is not None:
+                            stats.tick("imshow")
+                        if key == 27:  # 27 is escape
+                            if stats is not None:
+                                stats.end_frame(len(landmarks) > 0)
+                            break
+                    if stats is not None:
+                        stats.end_frame(len(landmarks) > 0)
+                else:
+                    completed = True
+        finally:
+            # Also when the generator is closed before the end of the video
+            self.stopped = False
+            VID.release()
+            self.pose.release()
+            if writer is not None:
+                writer.close()
+            if self.display:
+                cv2.destroyAllWindows()
+            if stats is not None:
+                stats.end(TOTAL_FRAMES, completed, TOTAL_FRAMES - FRAMES_TO_READ)
+
+        if (arrays is not None) and self.keep_landmarks:
+            # Keypoints are kept with their decimals, like the measures used them
+            found = bf._LandmarkBuffer.from_arrays(positions, detected, visibility,
+                                                   np.int16 if self.keypoints is None else np.float64)
+        self.landmarks = found
+        self.frame_rate = FRAME_RATE
+        self.frame_period = FRAME_PERIOD
+        self.statistics = statistics
+        if (arrays is None) and (cache_key is not None) and completed and self.keep_landmarks:
+            self.cache.save(cache_key, found)
+
+        # The last rep ends with the video, there is no movement after it to tell that it's over
+        for segment in segmenter.flush():
+            rep_event = Exercise._rep_result_(self, segment, pipeline)
+            segments += [segment]
+            rep_results += [rep_event]
+            Exercise._emit_(self, rep_event)
+            yield rep_event
+        self.segments = segments
+
+        summary = {"reps": len(segments)}
+        pipeline.summary(summary)
+        self.results = rs.SetResult(rep_results, summary, Exercise.info(self))
+        if (self.store is not None) and completed:
+            self.store[0].add(self.results, self.store[1])
+        Exercise._emit_(self, self.results)
+        yield self.results
+
+    def _rep_result_(self, segment, pipeline):
+        """
+        Calculates the data of a rep from the measures sampled during it
+
+        :arg segment: The rep (Segmenter.Rep), with the statistics of the measures sampled during it
+        :arg pipeline: The measures of the analysis (Measures._Pipeline)
 
-        JUMP = 4
+        :return: The Results.RepResult of the rep
+        """
+        rep_event = rs.RepResult(segment.number, segment.end, segment=segment)
+        pipeline.rep(segment, rep_event)
+        return rep_event
+
+    def on_rep(self, callback) -> None:
+        """
+        Call a function with the data of each rep as soon as the rep is completed, then with the data of the set
+        (see iter_reps). Works with play_video and iter_reps
+
+        :arg callback: A function that takes a Results.RepResult or a Results.SetResult
+        """
+        self.callbacks += [callback]
+
+    def _emit_(self, result) -> None:
+        for callback in self.callbacks:
+            callback(result)
+
+    def info(self) -> dict:
+        """
+        :return: What is analysed: the exercise, the muscle, the video and the athlete
+        """
+        return {"exercise_name": self.name, "muscle": self.muscle, "path_to_video": self.video,
+                "height_meter": self.athlete.height, "body_weight_kg": self.athlete.body_weight,
+                "moving_limb_meter": self.athlete.moving_limb, "weight_used_kg": self.athlete.weight_used,
+                "side_seen": self.athlete.side_seen}
 
+    def _landmark_stream_(self, VID, cached: list, points: list, frames_to_read: int):
+        """
+        Gives the landmarks of every frame, in order. They come from the cache, from MediaPipe,
+        or are interpolated between two frames given to MediaPipe (see adaptive_sampling)
+
+        :arg VID: The opened video
+        :arg cached: The landmarks of every frame if they were cached, None if not
+        :arg points: The three joints to follow
+        :arg frames_to_read: The number of frames to read, every frame up to the end of the video if it isn't known
+
+        :return: A generator of (frame, landmarks). The frame is None when it isn't needed
+        (cached landmarks, no display and no video written)
+        """
+        stats = self.stats
+        if cached is not None:
+            for landmarks in cached:
+                video = None
+                if self.display or (self.output is not None):
+                    success, frame = VID.read()
+                    if stats is not None:
+                        stats.tick("read")
+                    if not success:
+                        return
+                    video = cv2.resize(frame, (self.width, self.height))
+                    if stats is not None:
+                        stats.tick("resize")
+                self.pose.positions = landmarks
+                yield video, landmarks
+            return
+
+        sampler = None if self.sampling is None else sp._AdaptiveSampler(points, *self.sampling)
+        # Frames waiting for the next keyframe to be interpolated, with the time spent on them so far
+        # (see FrameStats.hold)
+        skipped = []
+        decoded = 0
         while VID.isOpened():
             success, frame = VID.read()
+            if stats is not None:
+                stats.tick("read")
+            if not success:
+                break
             video = cv2.resize(frame, (self.width, self.height))
-            landmarks = self.pose.find_position(video)
-            frame_counts += 1
-            if len(landmarks) > 0:
-                x1, y1 = landmarks[POINTS[0]]
-                x2, y2 = landmarks[POINTS[1]]
-                x3, y3 = landmarks[POINTS[2]]
-
-                angle = ANALYSIS.angle()
-                effective_length = self.pose.find_length(POINTS)
-
-                times += [frame_counts * FRAME_RATE]
-                angles += [angle]
-                rep_angles += [angle]
-
-                # Count reps
-                if frame_counts % JUMP == 0:
-                    if is_shortening:
-                        if angle_decreasing:
-                            if (angle > last_angle) and (last_angle <= 100):
-                                rep_count += 0.5
-                                is_shortening = False
-                            else:
-                                concentric_time += JUMP
-                        else:
-                            if (angle < last_angle) and (last_angle >= 80):
-                                rep_count += 0.5
-                                is_shortening = False
-                            else:
-                                concentric_time += JUMP
-                    else:
-                        if angle_decreasing:
-                            if angle < last_angle and (last_angle >= 80):
-                                rep_count += 0.5
-                                is_shortening = True
-                            else:
-                                eccentric_time += JUMP
-                        else:
-                            if angle > last_angle and (last_angle <= 100):
-                                rep_count += 0.5
-                                is_shortening = True
-                            else:
-                                eccentric_time += JUMP
-                elif frame_counts % 2 == 0:
-                    last_angle = angle
-
-                if (rep_count % 1 == 0) and (rep_count > last_rep):
-                    rep_data += [[f"Rep #{int(rep_count)}"]]
-                    add_data = True
-                    last_rep = rep_count
-
-                # Loops on store data depending on if the user wants this measure or not
-                for measure in self.measures:
-                    measure = measure.lower()
-                    if measure == "torque":
-                        if frame_counts % JUMP == 0:
-                            torque += [ANALYSIS.torque(effective_length)]
-                        if add_data:
-                            rep_data[len(rep_data) - 1] += [f"Torque: {mt._average(torque)} Nm"]
-                            torque *= 0
-
-                    elif (measure == "power") or (work is True):
-                        if frame_counts % JUMP == 0:
-                            velocity = ANALYSIS.speed(angles, times)
-                            power = ANALYSIS.power(velocity, effective_length)
-                            if conc_motion:
-                                if power < 0:
-                                    conc_power += [power]
-                                else:
-                                    ecc_power += [power]
-                            else:
-                                if power > 0:
-                                    conc_power += [power]
-                                else:
-                                    ecc_power += [power]
-                        if add_data: 
-                            avg_conc_power = mt._average(conc_power)
-                            avg_ecc_power = mt._average(ecc_power)
-                            if measure == "power":
-                                rep_data[len(rep_data) - 1] += [f"Conc. power: {avg_conc_power} W",
-                                                                f"Ecc. power: {avg_ecc_power} W"]
-                            if work is True:
-                                total_work = avg_conc_power * (max(rep_angles) - min(rep_angles))
-                                rep_data[len(rep_data) - 1] += [f"Work (concentric): {total_work}J"]
-                            conc_power *= 0
-                            ecc_power *= 0
-
-                    elif (measure == "speed") or (velocity_lost is True):
-                        if frame_counts % JUMP == 0:
-                            velocity = ANALYSIS.speed(angles, times)
-                            if conc_motion:
-                                if velocity < 0:
-                                    conc_velocity += [velocity]
-                                else:
-                                    ecc_velocity += [velocity]
-                            else:
-                                if velocity > 0:
-                                    conc_velocity += [velocity]
-                                else:
-                                    ecc_velocity += [velocity]
-
-                        if add_data:
-                            avg_conc_vel = mt._average(conc_velocity)
-                            avg_ecc_vel = mt._average(ecc_velocity)
-                            rep_data[len(rep_data) - 1] += [f"Conc. velocity: {avg_conc_vel} rad/s",
-                                                            f"Ecc. velocity: {avg_ecc_vel} rad/s"]
-                            concentric_speed += [avg_conc_vel]
-                            conc_velocity *= 0
-                            ecc_velocity *= 0
-
-                    elif measure == "parallel":
-                        if (self.muscle.lower() == "quadriceps") or (self.muscle.lower() == "hamstrings"):
-                            if y1 >= y2:
-                                is_parallel = True
-                        elif self.muscle.lower() == "glutes":
-                            if y2 >= y3:
-                                is_parallel = True
-                        if add_data:
-                            rep_data[len(rep_data) - 1] += [f"Parallel: {is_parallel}"]
-                            is_parallel = False
-
-                    elif measure == "time under tension":
-                        tust += ANALYSIS.time_under_tension(effective_length)
-
-                    elif measure == "tempo":
-                        if add_data:
-                            conc_time = concentric_time * FRAME_RATE
-                            ecc_time = eccentric_time * FRAME_RATE
-                            rep_data[len(rep_data) - 1] += [f"Concentric time: {round(conc_time, 4)}s",
-                                                            f"Eccentric time: {round(ecc_time, 4)}s"]
-                            concentric_time *= 0
-                            eccentric_time *= 0
-                    
-                    elif measure == "angles":
-                        if add_data:
-                            rep_data[len(rep_data) - 1] += [f"Min angle: {min(rep_angles)}",
-                                                            f"Max angle: {max(rep_angles)}"]
-
-                    elif measure == "resistance profile":
-                        # The first rep is excluded for the graph because it is
-                        # often paired with a little bit of setting-up for the exercise
-                        if (frame_counts % JUMP == 0) and (1 < rep_count < 3):
-                            res_pro_angles += [angle]
-                            res_pro_torque += [ANALYSIS.torque(effective_length)]
-
-                if add_data is True:
-                    rep_angles *= 0  # Used at two places, that's why it's emptied here
-                    add_data = False
-
-                if self.draw:
-                    if parallel is True:
-                        if (self.muscle.lower() == "quadriceps") or (self.muscle.lower() == "hamstrings"):
-                            if y2 >= y1:
-                                cv2.line(video, (x2, y2), (x1, y2), (0, 0, 255), 3)
-                            else:
-                                cv2.line(video, (x2, y2), (x1, y2), (0, 255, 0), 3)
-                            cv2.circle(video, (x1, y1), 5, (255, 255, 255), cv2.FILLED)
-                            cv2.circle(video, (x2, y2), 5, (255, 255, 255), cv2.FILLED)
-                        elif self.muscle.lower() == "glutes":
-                            if y1 >= y3:
-                                cv2.line(video, (x3, y3), (x2, y3), (0, 0, 255), 3)
-                            else:
-                                cv2.line(video, (x3, y3), (x2, y3), (0, 255, 0), 3)
-                            cv2.circle(video, (x2, y2), 5, (255, 255, 255), cv2.FILLED)
-                            cv2.circle(video, (x3, y3), 5, (255, 255, 255), cv2.FILLED)
+            if stats is not None:
+                stats.tick("resize")
+            decoded += 1
+            if sampler is None:
+                yield video, self.pose.find_position(video)
+            elif sampler.needs_pose(video):
+                if stats is not None:
+                    stats.tick("sampling")
+                landmarks = self.pose.find_position(video)
+                visibility = self.pose.visibility
+                keyframe = None if stats is None else stats.hold()
+                filled = sampler.keyframe(landmarks, len(skipped))
+                if stats is not None:
+                    # The interpolation is part of the sampling of the frames it fills
+                    stats.share("sampling", [held for _, held in skipped] or [keyframe])
+                for (skipped_video, held), interpolated in zip(skipped, filled):
+                    if stats is not None:
+                        stats.resume(held)
+                    self.pose.positions = interpolated
+                    self.pose.visibility = None  # Only known for the frames given to MediaPipe
+                    yield skipped_video, interpolated
+                skipped *= 0
+                if stats is not None:
+                    stats.resume(keyframe)
+                self.pose.positions = landmarks
+                self.pose.visibility = visibility
+                yield video, landmarks
+            else:
+                if stats is not None:
+                    stats.tick("sampling")
+                skipped += [(video, None if stats is None else stats.hold())]
+            if 0 < frames_to_read <= decoded:
+                # End of the time range. The last frame of the video isn't read, to work around an OpenCV problem
+                # Error: (-215:Assertion failed) !ssize.empty() in function 'cv::resize'
+                break
+        if decoded == 0:
+            raise Exception(f"No frame of {self.video} could be decoded")
+
+        if sampler is not None:
+            if stats is not None:
+                stats.restart()
+            filled = sampler.flush(len(skipped))
+            if (stats is not None) and (len(skipped) > 0):
+                stats.share("sampling", [held for _, held in skipped])
+            for (skipped_video, held), last in zip(skipped, filled):
+                if stats is not None:
+                    stats.resume(held)
+                self.pose.positions = last
+                self.pose.visibility = None
+                yield skipped_video, last
+
+    def _draw_(self, video, landmarks: list, points: list, angle: float, parallel: bool, analysis) -> None:
+        """
+        Draws the lines, the joints and the angles over the frame.
+        Only called when the video is displayed, the analysis itself never depends on it
+
+        :arg video: The (resized) frame on which to draw
+        :arg landmarks: The landmarks found in that frame
+        :arg points: The three joints to follow
+        :arg angle: The angle (°) of the moving joint
+        :arg parallel: True if the parallel indicator must be drawn instead of the limb
+        :arg analysis: The _VideoAnalysis of the exercise
+        """
+        # The landmarks are floats when they are smoothed
+        x1, y1 = map(round, landmarks[points[0]])
+        x2, y2 = map(round, landmarks[points[1]])
+        x3, y3 = map(round, landmarks[points[2]])
+
+        if self.draw:
+            if parallel is True:
+                if (self.muscle.lower() == "quadriceps") or (self.muscle.lower() == "hamstrings"):
+                    if y2 >= y1:
+                        cv2.line(video, (x2, y2), (x1, y2), (0, 0, 255), 3)
                     else:
-                        cv2.line(video, (x1, y1), (x2, y2), (255, 255, 255), 3)
-                        cv2.line(video, (x3, y3), (x2, y2), (255, 255, 255), 3)
-                        cv2.circle(video, (x1, y1), 8, (255, 0, 0), cv2.FILLED)
-                        cv2.circle(video, (x1, y1), 15, (255, 255, 255), 2)
-                        cv2.circle(video, (x2, y2), 8, (255, 0, 0), cv2.FILLED)
-                        cv2.circle(video, (x2, y2), 15, (255, 255, 255), 2)
-                        cv2.circle(video, (x3, y3), 8, (255, 0, 0), cv2.FILLED)
-                        cv2.circle(video, (x3, y3), 15, (255, 255, 255), 2)
-                if self.show_joint_angle:
-                    cv2.putText(video, f"{round(angle)}", (x2 - 70, y2 + 50),
-                                cv2.FONT_HERSHEY_COMPLEX_SMALL, 2, (255, 0, 0), 2)
-                if self.show_angle_with_gravity:
-                    if ("deadlift" not in self.name.lower()) and ("squat" not in self.name.lower()):
-                        angle_gravity = ANALYSIS.angle_gravity()
-                        cv2.putText(video, f"{round(angle_gravity)}", (x3 - 90, y3 + 50),
-                                    cv2.FONT_HERSHEY_COMPLEX_SMALL, 2, (255, 0, 0), 2)
-                        cv2.line(video, (x3, (y3 + 8)), (x3, (y3+70)), (255, 255, 255), 3)
-                        cv2.putText(video, "V", ((x3-5), (y3+72)),
-                                    cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 3)
+                        cv2.line(video, (x2, y2), (x1, y2), (0, 255, 0), 3)
+                    cv2.circle(video, (x1, y1), 5, (255, 255, 255), cv2.FILLED)
+                    cv2.circle(video, (x2, y2), 5, (255, 255, 255), cv2.FILLED)
+                elif self.muscle.lower() == "glutes":
+                    if y1 >= y3:
+                        cv2.line(video, (x3, y3), (x2, y3), (0, 0, 255), 3)
                     else:
-                        raise Exception(f"Can't show the angle with gravity with a {self.name.lower()}")
+                        cv2.line(video, (x3, y3), (x2, y3), (0, 255, 0), 3)
+                    cv2.circle(video, (x2, y2), 5, (255, 255, 255), cv2.FILLED)
+                    cv2.circle(video, (x3, y3), 5, (255, 255, 255), cv2.FILLED)
+            else:
+                cv2.line(video, (x1, y1), (x2, y2), (255, 255, 255), 3)
+                cv2.line(video, (x3, y3), (x2, y2), (255, 255, 255), 3)
+                cv2.circle(video, (x1, y1), 8, (255, 0, 0), cv2.FILLED)
+                cv2.circle(video, (x1, y1), 15, (255, 255, 255), 2)
+                cv2.circle(video, (x2, y2), 8, (255, 0, 0), cv2.FILLED)
+                cv2.circle(video, (x2, y2), 15, (255, 255, 255), 2)
+                cv2.circle(video, (x3, y3), 8, (255, 0, 0), cv2.FILLED)
+                cv2.circle(video, (x3, y3), 15, (255, 255, 255), 2)
+        if self.show_joint_angle:
+            cv2.putText(video, f"{round(angle)}", (x2 - 70, y2 + 50),
+                        cv2.FONT_HERSHEY_COMPLEX_SMALL, 2, (255, 0, 0), 2)
+        if self.show_angle_with_gravity:
+            if ("deadlift" not in self.name.lower()) and ("squat" not in self.name.lower()):
+                angle_gravity = analysis.angle_gravity()
+                cv2.putText(video, f"{round(angle_gravity)}", (x3 - 90, y3 + 50),
+                            cv2.FONT_HERSHEY_COMPLEX_SMALL, 2, (255, 0, 0), 2)
+                cv2.line(video, (x3, (y3 + 8)), (x3, (y3+70)), (255, 255, 255), 3)
+                cv2.putText(video, "V", ((x3-5), (y3+72)),
+                            cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 3)
+            else:
+                raise Exception(f"Can't show the angle with gravity with a {self.name.lower()}")
 
-            cv2.imshow(f"{str(self.name)} - Calculating {self.measures}", video)
+    def _cache_key_(self) -> str:
+        """
+        :return: The key of the landmarks of the video in the cache, with the current size and settings
+        """
+        settings = self.pose.settings() if self.sampling is None else self.pose.settings() + self.sampling
+        if self.time_range != (None, None):
+            settings += self.time_range
+        return self.cache.key(self.video, self.width, self.height, settings)
 
-            if cv2.waitKey(1) == 27:  # 27 is escape
-                break
-            elif TOTAL_FRAMES - 1 == frame_counts:
-                # Work around an OpenCV problem
-                # Error: (-215:Assertion failed) !ssize.empty() in function 'cv::resize'
-                break
+    def _seek_(self, VID) -> tuple:
+        """
+        Moves to the start of the time range, without decoding the frames before it
 
-        VID.release()
-        cv2.destroyAllWindows()
-
-        if time_under_tension:
-            tust_in_sec = tust * FRAME_RATE
-            set_data += [f"Time under significant tension: {tust_in_sec} s"]
-        if min_max_angles:
-            set_data += [f"Min angle: {round(min(angles), 4)}", f"Max angle: {round(max(angles), 4)}"]
-        if velocity_lost:
-            max_vel = max(concentric_speed)
-            min_vel = min(concentric_speed)
-            vel_lost = round(((max_vel - min_vel) / max_vel) * 100, 2)
-            set_data += [f"Velocity lost: {vel_lost}%"]
-        if res_pro:
-            ANALYSIS.resistance_profile(res_pro_torque, res_pro_angles)
-
-        if self.save_f is False:
-            Exercise._print_data_(self, rep_data, set_data)
-        elif self.save_f is True:
-            Exercise._save_data_(self, rep_data, set_data)
-        return
+        :arg VID: The opened video
+
+        :return: The number of the first frame of the range, and the number of frames in the range
+        """
+        total_frames = int(VID.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = VID.get(cv2.CAP_PROP_FPS) or 30
+        start, end = self.time_range
+        first = 0
+        if start:
+            VID.set(cv2.CAP_PROP_POS_MSEC, start * 1000)
+            first = int(VID.get(cv2.CAP_PROP_POS_FRAMES)) or int(round(start * fps))
+        last = total_frames if end is None else min(total_frames, int(round(end * fps)))
+        return first, max(0, last - first)
+
+    def render_video(self, path: str, fourcc: str = "mp4v", queue_size: int = 32) -> int:
+        """
+        Writes the video with the lines, the joints and the angles drawn over it, from the landmarks of the last
+        analysis or from the cache (see use_cache). MediaPipe isn't run again. Only the time range analysed
+        is written (see analyse_range)
+
+        :arg path: The video file to write
+        :arg fourcc: Codec (four characters, e.g. "mp4v", "MJPG", "avc1")
+        :arg queue_size: Frames that can wait to be encoded (see VideoOutput)
+
+        :return: The number of frames written
+        """
+        VID = cv2.VideoCapture(self.video)
+        if (self.width == 0) or (self.height == 0):
+            self.height = int(VID.get(cv2.CAP_PROP_FRAME_HEIGHT) / 2)
+            self.width = int(VID.get(cv2.CAP_PROP_FRAME_WIDTH) / 2)
+        FPS = VID.get(cv2.CAP_PROP_FPS) or 30
+        Exercise._seek_(self, VID)
+        positions, detected = self.landmarks.arrays()
+        if (len(positions) == 0) and (self.cache is not None):
+            arrays = self.cache.load(Exercise._cache_key_(self))
+            if arrays is not None:
+                positions, detected, _ = arrays
+        if len(positions) == 0:
+            VID.release()
+            raise Exception("No landmarks to draw: analyse the video first, or use the cache of a previous analysis")
+
+        POINTS = Exercise._get_pose_landmarks_(self)
+        ANALYSIS = va._VideoAnalysis(self.athlete, self)
+        parallel = ("parallel" in [measure.lower() for measure in self.measures]) and ("squat" in self.name.lower())
+        positions = Exercise._smooth_(self, positions, detected, 1 / FPS)
+        angles = vec._VectorAnalysis(self.athlete, self).series(positions, detected, int(FPS) / 1000)["angle"]
+        writer = vo._AnnotatedWriter(path, FPS, (self.width, self.height), fourcc, queue_size)
+        try:
+            for frame_landmarks, found, angle in zip(positions.tolist(), detected.tolist(), angles.tolist()):
+                success, frame = VID.read()
+                if not success:
+                    break
+                video = cv2.resize(frame, (self.width, self.height))
+                if found:
+                    self.pose.positions = frame_landmarks
+                    Exercise._draw_(self, video, frame_landmarks, POINTS, angle, parallel, ANALYSIS)
+                writer.write(video)
+        finally:
+            VID.release()
+            writer.close()
+        return writer.frames
+
+    def kinematics(self) -> dict:
+        """
+        The measures of every frame of the last video analysed (play_video samples them every few frames).
+        A Savitzky-Golay filter (see smooth_landmarks) is fitted on the frames around each frame, not only on the
+        frames before it like during the analysis
+
+        :return: A dict of NumPy arrays with one value per frame (NaN where no person was found):
+        "times", "angle", "angle_gravity", "effective_length", "velocity", "torque" and "power"
+        """
+        positions, detected = self.landmarks.arrays()
+        positions = Exercise._smooth_(self, positions, detected, self.frame_period, centered=True)
+        return vec._VectorAnalysis(self.athlete, self).series(positions, detected, self.frame_rate)
+
+    def _smooth_(self, positions: np.ndarray, detected: np.ndarray, frame_period: float,
+                 centered: bool = False) -> np.ndarray:
+        """
+        :arg positions: (frames x 33 x 2) array of landmarks
+        :arg detected: True for the frames where a person was found
+        :arg frame_period: Time (s) between two frames
+        :arg centered: See Filters.SavitzkyGolayFilter.apply, False to smooth them like the analysis does
+
+        :return: The landmarks smoothed by the filter of the exercise (the same array if there is none)
+        """
+        if self.smoothing is None:
+            return positions
+        smoothed = positions.astype(np.float64)
+        found = np.flatnonzero(detected)
+        smoothed[found] = self.smoothing.apply((found + 1) * frame_period, positions[found], centered)
+        return smoothed
 
     def change_muscle(self, new_muscle: str) -> None:
         """
@@ -406,6 +667,235 @@ class Exercise:
         """
         self.draw = False
 
+    def use_cache(self, directory: str = None, max_size_mb: float = 500) -> None:
+        """
+        Keep the landmarks found in the video on disk. Analysing the same video again (e.g. with other measures
+        or another weight) then skips MediaPipe completely
+
+        :arg directory: Where to store the landmarks (default: ~/.cache/solvingrt)
+        :arg max_size_mb: Maximum size of the cache, the least recently used videos are removed first
+        """
+        self.cache = lc._LandmarkCache(directory, max_size_mb)
+
+    def use_keypoints(self, keypoints, fps: float = None, **settings) -> None:
+        """
+        Analyse landmarks found elsewhere (e.g. by MediaPipe on a phone) instead of the video: nothing is decoded
+        and MediaPipe isn't used. The video isn't displayed, and can't be written (see save_video)
+
+        :arg keypoints: A Keypoints.KeypointStream, the path to a CSV, JSON lines or NumPy file (see Keypoints.load),
+        or a (frames x 33 x 2) array in MediaPipe's layout
+        :arg fps: Frames per second, if the keypoints don't tell
+        :arg settings: The other arguments of Keypoints.KeypointStream (times, width, height, normalized).
+        The positions aren't rounded to whole pixels: self.landmarks and kinematics use the same values as the measures
+        """
+        if isinstance(keypoints, str):
+            keypoints = kp.load(keypoints, fps, **settings)
+        elif not isinstance(keypoints, kp.KeypointStream):
+            keypoints = kp.KeypointStream(keypoints, fps=fps, **settings)
+        self.keypoints = keypoints
+        if not self.video:
+            self.video = keypoints.source
+        Exercise.headless(self)
+
+    def use_store(self, store=None, athlete: str = "") -> None:
+        """
+        Add every set analysed to a database, to follow the measures of the athlete over time (see Sessions).
+        Sets stopped before the end of the video aren't added
+
+        :arg store: A Sessions.SessionStore, or the path to its file (default: ~/.local/share/solvingrt)
+        :arg athlete: Name of the athlete
+        """
+        if not isinstance(store, ss.SessionStore):
+            store = ss.SessionStore(store)
+        self.store = (store, athlete)
+
+    def analyse_range(self, start: float = None, end: float = None) -> None:
+        """
+        Only analyse part of the video. The video is opened directly at start (the frames before it aren't decoded)
+        and the analysis stops at end. Frames (e.g. Results.RepResult.frame) are counted from start
+        (see self.first_frame)
+
+        :arg start: Time (s) where the analysis starts. None for the start of the video
+        :arg end: Time (s) where the analysis ends. None for the end of the video
+        """
+        self.time_range = (None if start is None else float(start), None if end is None else float(end))
+
+    def find_lift(self, method: str = "motion", padding: float = 1.0, step: int = None) -> tuple:
+        """
+        Finds where the lift is in the video with a quick first pass, and only analyses that part (see analyse_range),
+        so a video with setting-up or rest around the lift doesn't need to be trimmed
+
+        :arg method: "motion" (where the small grayscale frames change the most, very fast) or "pose" (from the first
+        to the last rep, with MediaPipe on one frame every step frames)
+        :arg padding: Time (s) kept before and after the lift
+        :arg step: Only one frame every step frames is looked at (default: 2 for "motion", 6 for "pose")
+
+        :return: (start, end) in seconds, None if no lift is found (then the whole video is analysed)
+        """
+        if method == "motion":
+            window = lw.by_motion(self, step or 2, padding)
+        elif method == "pose":
+            window = lw.by_pose(self, step or 6, padding)
+        else:
+            print(f"{method} is not a valid input. Options are 'motion' and 'pose'.")
+            raise ValueError(method)
+        Exercise.analyse_range(self, *(window if window is not None else (None, None)))
+        return window
+
+    def adaptive_sampling(self, max_stride: int = 4, motion_threshold: float = 3.0,
+                          velocity_threshold: float = 0.03) -> None:
+        """
+        Only give some frames to MediaPipe and interpolate the landmarks of the others.
+        Every frame is still given to MediaPipe while the joints move fast or the image changes a lot,
+        so slow parts of the lift (pauses, lockouts, rest) are the ones that are skipped
+
+        :arg max_stride: MediaPipe runs at least every max_stride frames. Higher is faster, 1 is every frame
+        :arg motion_threshold: Mean pixel difference (0 to 255) with the last frame given to MediaPipe above which
+        the current frame is given to MediaPipe. Lower is more accurate. None to not compare frames
+        :arg velocity_threshold: Speed of the joints (fraction of the height of the video per frame)
+        above which every frame is given to MediaPipe. Lower is more accurate
+        """
+        self.sampling = (int(max_stride), motion_threshold, velocity_threshold)
+
+    def stream(self, keep_landmarks: bool = False) -> None:
+        """
+        For long videos (e.g. a whole training session): only the last frames and running statistics are kept while
+        the video is analysed, so the memory used doesn't grow with the length of the video.
+        The landmarks of every frame are still kept unless keep_landmarks is False (then kinematics() and the cache
+        can't be used, and self.landmarks stays empty)
+
+        :arg keep_landmarks: True to keep the landmarks of every frame (about 140 bytes per frame)
+        """
+        self.keep_landmarks = keep_landmarks
+
+    def smooth_landmarks(self, method: str = "one euro", **settings) -> None:
+        """
+        Smooth the landmarks before measuring them. MediaPipe gives whole pixels that jitter a little from one frame
+        to the next, which the angular velocity (and so the power and the velocity lost) amplifies.
+        The landmarks are smoothed one frame at a time while the video is analysed, or all at once when they come
+        from the cache (see Filters)
+
+        :arg method: "one euro" (adapts to the speed of the movement, lags very little) or "savitzky-golay"
+        (fits a polynomial to the last frames). None to not smooth the landmarks
+        :arg settings: Given to the filter: min_cutoff, beta and d_cutoff ("one euro"), window and order
+        ("savitzky-golay")
+        """
+        self.smoothing = None if method is None else fl.create(method, **settings)
+
+    def resistance_profile(self, bin_width: float = 5.0, render: bool = True) -> None:
+        """
+        Change how the resistance profile (measure "resistance profile") is calculated. The torque of every frame
+        of every rep is averaged in bins of the joint angle (see ResistanceProfile), kept in self.torque_profile
+
+        :arg bin_width: Width (°) of each bin
+        :arg render: True to draw the graph (resistance_profile (exercise).png in the current directory)
+        """
+        self.profile_settings = (float(bin_width), render)
+
+    def rep_detection(self, min_range: float = 30.0, window: int = 5) -> None:
+        """
+        Change how reps are found. The angle of the moving joint is smoothed, then the movement changes direction
+        each time the angle goes back by at least min_range degrees (see Segmenter.RepSegmenter)
+
+        :arg min_range: Smallest movement (°) that counts as a concentric or eccentric portion. Lower counts partial
+        reps, higher ignores more noise
+        :arg window: Number of frames averaged to smooth the angle (odd)
+        """
+        self.segmentation = (float(min_range), int(window))
+
+    def segment_reps(self) -> list:
+        """
+        Finds the reps of the last video analysed again, all at once, from its landmarks (e.g. after changing
+        rep_detection, without analysing the video again)
+
+        :return: The phases of every rep (Segmenter.Rep)
+        """
+        angle = Exercise.kinematics(self)["angle"]
+        frames = np.flatnonzero(~np.isnan(angle)) + 1
+        segmenter = sg.RepSegmenter(Exercise._get_muscle_info_(self, "decreasing"),
+                                    Exercise._get_muscle_info_(self, "conc_motion"), *self.segmentation)
+        return segmenter.segment(frames, angle[frames - 1])
+
+    def quality(self, profile: str = "balanced", target_fps: float = None, probe_seconds: float = 2.0) -> dict:
+        """
+        Choose between speed and accuracy. A profile picks the MediaPipe model, the size of the frames given to
+        MediaPipe and how often MediaPipe runs (see Quality.PROFILES):
+        "realtime" (fastest), "balanced" or "accurate" (MediaPipe's heaviest model on every frame).
+        "auto" measures the speed of each profile on the first seconds of the video and picks the most accurate
+        one that analyses at least target_fps frames per second
+
+        :arg profile: "realtime", "balanced", "accurate" or "auto"
+        :arg target_fps: Frames per second that must be analysed (only for "auto")
+        :arg probe_seconds: Length (s) of the start of the video used to measure the speed (only for "auto")
+
+        :return: The frames per second measured for each profile tried ({} if the profile isn't "auto")
+        """
+        if profile == "auto":
+            if target_fps is None:
+                raise ValueError("The 'auto' profile needs a target_fps")
+            return qu.auto(self, target_fps, probe_seconds)
+        qu.apply(self, profile)
+        return {}
+
+    def track_person(self, padding: float = 0.25) -> None:
+        """
+        Only give MediaPipe the region around the lifter (found in the previous frame) instead of the full frame.
+        Faster, and more precise when the lifter fills a small part of the video
+
+        :arg padding: Space added around the lifter, as a fraction of the size of the lifter on each side
+        """
+        self.pose.track(padding)
+
+    def use_pool(self, pool=None, warmup: bool = False) -> None:
+        """
+        Take the MediaPipe graph from a pool while the video is analysed, and give it back afterwards, instead of
+        building a new graph. Exercises with the same settings then share graphs that are already loaded
+
+        :arg pool: A PosePool.PosePool, None for the pool shared by the whole process
+        :arg warmup: Build and run a graph right away, so that the analysis doesn't wait for it
+        """
+        self.pose.release()
+        self.pose.pool = pp.PosePool.shared() if pool is None else pool
+        if warmup:
+            self.pose.pool.warmup(self.pose.graph_settings())
+
+    def profile(self, callback=None) -> None:
+        """
+        Measure the time spent in each stage of the analysis (reading, resizing, MediaPipe, measures, drawing, ...).
+        After the analysis, self.stats (Profiler.FrameStats) has the time of each stage for the whole video and
+        for the last frame, the frames dropped and the frames without landmarks
+
+        :arg callback: A function called after each frame with a dict of the time (s) spent in each stage
+        for that frame (see Profiler.FrameStats)
+        """
+        self.stats = pf.FrameStats(callback)
+
+    def save_video(self, path: str, fourcc: str = "mp4v", queue_size: int = 32) -> None:
+        """
+        Write the annotated video (lines, joints, angles, parallel indicator) to a file while it is analysed,
+        with or without displaying it. The frames are encoded on another thread (see VideoOutput).
+        To draw a video already analysed without running MediaPipe again, see render_video
+
+        :arg path: The video file to write. None to not write any
+        :arg fourcc: Codec (four characters, e.g. "mp4v", "MJPG", "avc1")
+        :arg queue_size: Frames that can wait to be encoded. Higher uses more memory, but the analysis waits less
+        """
+        self.output = None if path is None else (path, fourcc, int(queue_size))
+
+    def stop(self) -> None:
+        """
+        Ends the analysis at the next frame, like the escape key, e.g. from another thread.
+        The reps completed so far are kept in the results. If the analysis hasn't started, it stops right away
+        """
+        self.stopped = True
+
+    def headless(self) -> None:
+        """
+        Analyse the video without displaying it (no window, no drawing, no key polling).
+        The data is returned by play_video instead of being printed
+        """
+        self.display = False
+
     def joint_angle(self) -> None:
         """
         Show the angle of the moving joint
@@ -440,32 +930,11 @@ class Exercise:
         :return: A list of the three points to follow
         """
 
-        # Front and back are mostly used to draw the lines, not for measurements
-        LANDMARKS = {"chest": {"right": [12, 14, 16], "left": [11, 13, 15],
-                               "front": [14, 12, 24] if self.right_side else [13, 11, 23],
-                               "back": [14, 12, 24] if self.right_side else [13, 11, 23]},
-                     "biceps": {"right": [12, 14, 16], "left": [11, 13, 15],
-                                "front": [14, 12, 24] if self.right_side else [13, 11, 23],
-                                "back": [14, 12, 24] if self.right_side else [13, 11, 23]},
-                     "triceps": {"right": [12, 14, 16], "left": [11, 13, 15],
-                                 "front": [14, 12, 24] if self.right_side else [13, 11, 23],
-                                 "back": [14, 12, 24] if self.right_side else [13, 11, 23]},
-                     "deltoids": {"right": [14, 12, 24], "left": [13, 11, 23],
-                                  "front": [14, 12, 24] if self.right_side else [13, 11, 23],
-                                  "back": [14, 12, 24] if self.right_side else [13, 11, 23]},
-                     "back": {"right": [14, 12, 24], "left": [13, 11, 23],
-                              "front": [14, 12, 24] if self.right_side else [13, 11, 23],
-                              "back": [14, 12, 24] if self.right_side else [13, 11, 23]},
-                     "quadriceps": {"right": [24, 26, 28], "left": [23, 25, 27],
-                                    "front": [24, 26, 28] if self.right_side else [23, 25, 27],
-                                    "back": [24, 26, 28] if self.right_side else [23, 25, 27]},
-                     "hamstrings": {"right": [24, 26, 28], "left": [23, 25, 27],
-                                    "front": [24, 26, 28] if self.right_side else [23, 25, 27],
-                                    "back": [24, 26, 28] if self.right_side else [23, 25, 27]},
-                     "glutes": {"right": [12, 24, 26], "left": [11, 23, 25],
-                                "front": [12, 24, 26] if self.right_side else [11, 23, 25],
-                                "back": [12, 24, 26] if self.right_side else [11, 23, 25]}}
-        return LANDMARKS[self.muscle.lower()][self.athlete.side_seen.lower()]
+        landmarks = Exercise.LANDMARKS[self.muscle.lower()][self.athlete.side_seen.lower()]
+        if isinstance(landmarks, tuple):
+            # Front and back: (right side, left side)
+            return landmarks[0] if self.right_side else landmarks[1]
+        return landmarks
 
     def _get_muscle_info_(self, info_needed: str) -> bool:
         """
@@ -0,0 +1,84 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+import numpy as np
+import pytest
+from benchmarks import synthetic
+from solvingrt import Accumulators as ac
+from solvingrt import Measures as ms
+from solvingrt import solve as srt
+
+MEASURES = ["torque", "power", "speed", "velocity lost", "tempo", "angles", "time under tension"]
+
+
+def test_values_that_are_not_finite_are_skipped():
+    summary = ac.Summary()
+    moments = ac.Welford()
+    for value in [math.nan, 1.0, 2.0, math.inf, 3.0, math.nan, 4.0, 5.0, 6.0, -math.inf, 7.0]:
+        summary.add(value)
+        moments.add(value)
+    stats = summary.to_dict()
+    assert stats["count"] == 7
+    assert (stats["min"], stats["max"]) == (1.0, 7.0)
+    assert stats["mean"] == moments.mean == 4.0
+    assert math.isfinite(stats["p50"]) and math.isfinite(stats["p90"])
+
+
+def test_only_nan():
+    summary = ac.Summary()
+    for _ in range(10):
+        summary.add(math.nan)
+    assert summary.to_dict() == {"count": 0}
+    assert math.isnan(ac.P2Quantile(0.5).value())
+
+
+def test_many_values_at_once():
+    values = np.random.default_rng(0).normal(10, 3, 500)
+    one, many = ac.Summary(), ac.Summary()
+    for value in values.tolist() + [math.nan]:
+        one.add(value)
+    many.add_many(np.append(values, math.nan))
+    one, many = one.to_dict(), many.to_dict()
+    assert many["count"] == one["count"] == 500
+    for key in ("mean", "std", "min", "max"):
+        assert many[key] == pytest.approx(one[key])
+    assert many["p50"] == pytest.approx(np.quantile(values, 0.5), abs=0.05)
+    assert many["p90"] == pytest.approx(np.quantile(values, 0.9), abs=0.05)
+
+
+@pytest.mark.parametrize("at_once", [True, False])
+def test_nobody_on_the_first_frames(monkeypatch, at_once):
+    # The first frames where a person is found don't have enough frames before them for the velocity
+    positions = synthetic.lift_landmarks("curl", 5).astype(np.float64)
+    positions[:2] = np.nan  # Frame 4, where the velocity is sampled, is the second one with a person
+    athlete = srt.Athlete(1.8, 80, 0.35, 15, "left")
+    exercise = srt.Exercise("Preacher curl", "biceps", "", athlete, MEASURES)
+    exercise.use_keypoints(positions, fps=30)
+    if not at_once:
+        monkeypatch.setattr(ms._Pipeline, "vectorized", lambda self: False)  # One frame at a time
+    results = list(exercise.iter_reps())[-1]
+    assert len(results) == 5
+    assert all(math.isfinite(stats["mean"]) for stats in
+               (summary.to_dict() for summary in exercise.statistics.values()))
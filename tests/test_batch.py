@@ -0,0 +1,60 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import os
+import time
+from solvingrt import Batch as bt
+
+
+def _row_(path: str) -> dict:
+    return {"path_to_video": path, "exercise_name": "Preacher curl", "muscle": "biceps", "height_meter": 1.8,
+            "body_weight_kg": 80, "moving_limb_meter": 0.35, "weight_used_kg": 15, "side_seen": "left",
+            "measures": ["torque"]}
+
+
+def test_unreadable_video_fails(tmp_path):
+    corrupt = tmp_path / "corrupt.mp4"
+    corrupt.write_bytes(b"not a video" * 100)
+    result = bt._run_job_(bt._to_job_(_row_(str(corrupt))))
+    assert result["ok"] is False
+    assert "Can't read" in result["error"]
+    assert bt._run_job_(bt._to_job_(_row_(str(tmp_path / "missing.mp4"))))["ok"] is False
+
+
+def _crash_(i: int, job: dict, cache_directory: str = None) -> dict:
+    # Runs in a worker: the job of "crash.mp4" kills it, the others take a moment so that some are only queued
+    bt._started_[i] = 1
+    if job["path_to_video"] == "crash.mp4":
+        os._exit(1)
+    time.sleep(0.2)
+    return {"path_to_video": job["path_to_video"], "ok": True}
+
+
+def test_crash_is_charged_to_the_job_that_crashes(monkeypatch):
+    monkeypatch.setattr(bt, "_run_numbered_", _crash_)
+    paths = ["a.mp4", "crash.mp4", "b.mp4", "c.mp4", "d.mp4", "e.mp4", "f.mp4"]
+    results = bt.analyse_batch([_row_(path) for path in paths], processes=2)
+    assert [result["path_to_video"] for result in results] == paths
+    assert [result["ok"] for result in results] == [path != "crash.mp4" for path in paths]
+    assert results[1]["error"] == "The worker process crashed"
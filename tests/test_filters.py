@@ -0,0 +1,50 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import numpy as np
+from solvingrt import Filters as fl
+
+
+def _noisy_(frames: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    path = np.linspace(0, 200, frames)[:, None, None] + np.zeros((frames, 33, 2))
+    return path + rng.normal(0, 2, path.shape)
+
+
+def test_apply_is_update_on_every_frame():
+    for method in fl.FILTERS:
+        for frames in (2, 5, 9, 60):
+            values = _noisy_(frames)
+            times = np.arange(frames) / 30
+            one_at_a_time = fl.create(method)
+            updated = np.stack([one_at_a_time.update(time, frame) for time, frame in zip(times, values)])
+            assert np.allclose(fl.create(method).apply(times, values), updated), (method, frames)
+
+
+def test_centered_savitzky_golay():
+    values = _noisy_(60)
+    centered = fl.SavitzkyGolayFilter(window=9, order=2).apply(np.arange(60) / 30, values, centered=True)
+    # A straight line is kept by the fit, so only the noise is left, reduced
+    line = np.linspace(0, 200, 60)[:, None, None]
+    assert np.std(centered - line) < np.std(values - line)
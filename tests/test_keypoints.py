@@ -0,0 +1,42 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import numpy as np
+from benchmarks import synthetic
+from solvingrt import VectorAnalysis as vec
+from solvingrt import solve as srt
+
+
+def test_keypoints_keep_their_decimals():
+    positions = synthetic.lift_landmarks("curl", 3, width=320, height=180).astype(np.float64)
+    positions += np.random.default_rng(0).uniform(-0.5, 0.5, positions.shape)
+    exercise = srt.Exercise("Preacher curl", "biceps", "", srt.Athlete(1.8, 80, 0.35, 15, "left"), ["torque"])
+    exercise.video_resize(320, 180)
+    exercise.use_keypoints(positions, fps=30, width=320, height=180)
+    for _ in exercise.iter_reps():
+        pass
+    kept, detected = exercise.landmarks.arrays()
+    assert np.array_equal(kept, positions)
+    expected = vec._VectorAnalysis(exercise.athlete, exercise).series(positions, detected, exercise.frame_rate)
+    assert np.allclose(exercise.kinematics()["angle"], expected["angle"], equal_nan=True)
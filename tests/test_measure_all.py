@@ -0,0 +1,91 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import numpy as np
+import pytest
+from benchmarks import synthetic
+from solvingrt import Measures as ms
+from solvingrt import solve as srt
+
+EXERCISES = [("Preacher curl", "biceps", "curl", ["torque", "power", "work", "speed", "velocity lost", "tempo",
+                                                  "angles", "time under tension", "resistance profile"]),
+             ("Squat", "quadriceps", "squat", ["parallel", "torque", "speed", "angles", "time under tension"])]
+
+
+def _analyse_(monkeypatch, exercise: tuple, positions, at_once: bool, smoothing: str = None):
+    name, muscle, _, measures = exercise
+    ex = srt.Exercise(name, muscle, "", srt.Athlete(1.8, 80, 0.35, 15, "left"), measures)
+    ex.resistance_profile(5.0, False)
+    ex.smooth_landmarks(smoothing)
+    ex.use_keypoints(positions, fps=30)
+    with monkeypatch.context() as patch:
+        if not at_once:
+            patch.setattr(ms._Pipeline, "vectorized", lambda self: False)  # One frame at a time
+        results = list(ex.iter_reps())
+    return ex, results
+
+
+@pytest.mark.parametrize("exercise", EXERCISES)
+@pytest.mark.parametrize("smoothing", [None, "one euro"])
+def test_every_frame_at_once_is_the_same_as_one_at_a_time(monkeypatch, exercise, smoothing):
+    positions = synthetic.lift_landmarks(exercise[2], 5).astype(np.float64)
+    positions += np.random.default_rng(0).normal(0, 2, positions.shape)
+    positions[100:130] = np.nan  # Nobody seen
+
+    streamed, streamed_results = _analyse_(monkeypatch, exercise, positions, False, smoothing)
+    measured, measured_results = _analyse_(monkeypatch, exercise, positions, True, smoothing)
+    assert len(measured_results) == len(streamed_results) == 6
+    for one, other in zip(streamed_results[:-1], measured_results[:-1]):
+        assert one.values == pytest.approx(other.values, rel=1e-9)
+    assert streamed_results[-1].summary == pytest.approx(measured_results[-1].summary, rel=1e-9)
+    assert [(rep.start, rep.end) for rep in measured.segments] == [(rep.start, rep.end) for rep in streamed.segments]
+    assert list(measured.statistics) == list(streamed.statistics)
+    for name, summary in streamed.statistics.items():
+        one, other = summary.to_dict(), measured.statistics[name].to_dict()
+        for key in ("count", "mean", "std", "min", "max"):
+            assert one[key] == pytest.approx(other[key], rel=1e-9)
+    if streamed.torque_profile is not None:
+        assert np.allclose(measured.torque_profile.mean(), streamed.torque_profile.mean(), equal_nan=True)
+
+
+def test_measure_sampled_one_frame_at_a_time(monkeypatch):
+    # A measure that only knows how to sample one frame is still sampled, the frames are then measured one by one
+    class Extension(ms.Measure):
+        name = "extension"
+        features = ("angle",)
+        values = ("extension",)
+
+        def sample(self, features: dict, values: dict) -> None:
+            values["extension"] = 180 - features["angle"]
+
+        def rep(self, segment, result) -> None:
+            result["extension"] = ms.rep_average(segment, "extension")
+
+    monkeypatch.setitem(ms.MEASURES, "extension", Extension)
+    ex = srt.Exercise("Preacher curl", "biceps", "", srt.Athlete(1.8, 80, 0.35, 15, "left"), ["extension", "torque"])
+    ex.use_keypoints(synthetic.lift_landmarks("curl", 3), fps=30)
+    results = list(ex.iter_reps())[-1]
+    assert len(results) == 3
+    assert np.all(np.isfinite(results["extension"]) & (results["extension"] > 0))
+    assert "extension" in ex.statistics
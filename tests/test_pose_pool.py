@@ -0,0 +1,52 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from solvingrt import PosePool as pp
+
+
+class _Graph:
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.frames = 0
+
+    def process(self, frame):
+        self.frames += 1
+
+    def reset(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_warmup_builds_and_runs_every_graph(monkeypatch):
+    monkeypatch.setattr(pp.pd, "build_graph", _Graph)
+    pool = pp.PosePool(max_size=3)
+    pool.release(pool.checkout(("full",)))  # One graph already idle
+    pool.warmup(("full",), count=2)
+    assert (len(pool), pool.created) == (2, 2)
+    assert all(graph.frames == 1 for _, graph, _ in pool.idle)
+    pool.warmup(("full",), count=5)
+    assert (len(pool), pool.created) == (3, 3)
@@ -0,0 +1,57 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import pytest
+from benchmarks import synthetic
+from solvingrt import solve as srt
+
+
+def test_no_frame_dropped(blank_video):
+    athlete = srt.Athlete(1.8, 80, 0.35, 15, "left")
+    exercise = srt.Exercise("Preacher curl", "biceps", blank_video(40, 64, 48), athlete, ["torque"])
+    exercise.headless()
+    exercise.pose.find_position = lambda frame: []  # Nobody in the video, MediaPipe isn't needed
+    frames = []
+    exercise.profile(frames.append)
+    list(exercise.iter_reps())
+    assert exercise.stats.total_frames == 40
+    assert exercise.stats.frames == len(frames) == exercise.stats.no_landmarks == 39  # The last one isn't read
+    assert exercise.stats.dropped == 0
+
+
+def test_frames_skipped_by_the_sampling_keep_their_own_times(blank_video):
+    athlete = srt.Athlete(1.8, 80, 0.35, 15, "left")
+    exercise = srt.Exercise("Preacher curl", "biceps", blank_video(40, 64, 48), athlete, ["torque"])
+    exercise.headless()
+    exercise.adaptive_sampling(4)
+    still = synthetic.lift_landmarks("curl", 1, width=32, height=24)[0].tolist()  # Nobody moves
+    given = []
+    exercise.pose.find_position = lambda frame: given.append(frame) or still
+    frames = []
+    exercise.profile(frames.append)
+    list(exercise.iter_reps())
+    assert len(given) < len(frames) == 39
+    # Each frame has the time spent reading, resizing and sampling it, not the frame after the skipped ones
+    assert all(frame["read"] > 0 and frame["resize"] > 0 and frame["sampling"] > 0 for frame in frames)
+    assert sum(frame["read"] for frame in frames) == pytest.approx(exercise.stats.total["read"])
@@ -0,0 +1,63 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+from solvingrt import PoseDetector as pd
+from solvingrt import PosePool as pp
+from solvingrt import solve as srt
+
+
+class _Graph:
+
+    def __init__(self, settings=None):
+        self.calls = []
+
+    def process(self, image):
+        self.calls += ["process"]
+        return type("Results", (), {"pose_landmarks": None})()
+
+    def reset(self):
+        self.calls += ["reset"]
+
+    def close(self):
+        pass
+
+
+def _exercise_(video: str):
+    exercise = srt.Exercise("Preacher curl", "biceps", video, srt.Athlete(1.8, 80, 0.35, 15, "left"), ["torque"])
+    exercise.headless()
+    return exercise
+
+
+def test_the_probe_is_forgotten_before_the_analysis(blank_video, monkeypatch):
+    graphs = []
+    monkeypatch.setattr(pd, "build_graph", lambda settings: graphs.append(_Graph()) or graphs[-1])
+    exercise = _exercise_(blank_video(20, 128, 96))
+    exercise.quality("auto", target_fps=1)
+    assert graphs[-1].calls[-1] == "reset"
+
+    pooled = _exercise_(blank_video(20, 128, 96))
+    pooled.use_pool(pp.PosePool())
+    pooled.quality("auto", target_fps=1)
+    assert pooled.pose.pose is None  # Given back, reset on the next checkout
+    assert len(pooled.pose.pool.idle) == 1
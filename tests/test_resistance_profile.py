@@ -0,0 +1,40 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import math
+import numpy as np
+from solvingrt import ResistanceProfile as rp
+
+
+def test_values_that_are_not_finite_are_ignored():
+    samples = [(10.0, 2.0), (math.nan, 3.0), (12.0, math.nan), (14.0, math.inf), (-math.inf, 1.0), (11.0, 4.0)]
+    one = rp.ResistanceProfile(5.0)
+    for angle, torque in samples:
+        one.add(angle, torque)
+    many = rp.ResistanceProfile(5.0)
+    many.add_many(*zip(*samples))
+    for profile in (one, many):
+        assert len(profile) == 2
+        assert np.all(np.isfinite(profile.total)) and np.all(np.isfinite(profile.squares))
+        assert profile.mean()[2] == 3.0
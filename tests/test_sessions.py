@@ -0,0 +1,51 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import pytest
+from solvingrt import Results as rs
+from solvingrt import Sessions as ss
+
+
+def _set_(torque: float) -> rs.SetResult:
+    reps = [rs.RepResult(number, 30 * number, {"torque": torque + number}) for number in (1, 2, 3)]
+    return rs.SetResult(reps, {"reps": 3, "time_under_tension": 9.0},
+                        {"exercise_name": "Preacher curl", "muscle": "biceps"})
+
+
+def test_failed_add_leaves_nothing_behind():
+    with ss.SessionStore(":memory:") as store:
+        with pytest.raises(ValueError):
+            store.add(_set_(10.0), "alice", performed_at="not a date")
+        assert store.names("athletes") == []
+        set_id = store.add(_set_(10.0), "alice", performed_at="2024-03-01")[0]
+        assert [found["id"] for found in store.sets(athlete="alice")] == [set_id]
+        assert store.rep_values("alice", "Preacher curl", "torque")["value"].tolist() == [11.0, 12.0, 13.0]
+
+
+def test_delete():
+    with ss.SessionStore(":memory:") as store:
+        first, second = store.add([_set_(10.0), _set_(20.0)], "bob", performed_at=["2024-03-01", "2024-03-02"])
+        store.delete(first)
+        assert [found["id"] for found in store.sets(athlete="bob")] == [second]
+        assert store.set_values("bob", "Preacher curl", "time_under_tension")["set"].tolist() == [second]
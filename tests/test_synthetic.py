@@ -0,0 +1,36 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import pytest
+from benchmarks import synthetic
+from solvingrt import solve as srt
+
+
+@pytest.mark.parametrize("lift, name, muscle", [("curl", "Preacher curl", "biceps"), ("squat", "Squat", "quadriceps")])
+@pytest.mark.parametrize("reps", [1, 3, 5])
+def test_every_rep_is_counted(lift, name, muscle, reps):
+    athlete = srt.Athlete(1.8, 80, 0.35, 15, "left")
+    exercise = srt.Exercise(name, muscle, "", athlete, ["tempo"])
+    exercise.use_keypoints(synthetic.lift_landmarks(lift, reps), fps=30)
+    assert len(list(exercise.iter_reps())[-1]) == reps
@@ -0,0 +1,43 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import pytest
+from solvingrt import solve as srt
+
+
+def _frames_read_(video: str, start: float, end: float) -> int:
+    athlete = srt.Athlete(1.8, 80, 0.35, 15, "left")
+    exercise = srt.Exercise("Preacher curl", "biceps", video, athlete, ["torque"])
+    exercise.headless()
+    exercise.pose.find_position = lambda frame: []  # Nobody in the video, MediaPipe isn't needed
+    exercise.analyse_range(start, end)
+    exercise.profile()
+    list(exercise.iter_reps())
+    return exercise.stats.frames
+
+
+@pytest.mark.parametrize("start, end, frames", [(10 / 30, 11 / 30, 1), (10 / 30, 20 / 30, 10), (None, 20 / 30, 20),
+                                                (10 / 30, None, 29)])  # The last frame of the video isn't read
+def test_only_the_range_is_read(blank_video, start, end, frames):
+    assert _frames_read_(blank_video(40, 64, 48), start, end) == frames
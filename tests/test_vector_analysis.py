@@ -0,0 +1,75 @@
+"""
+MIT License
+
+Copyright (c) [2022] [Samuel Leblanc]
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+
+import numpy as np
+import pytest
+from benchmarks import synthetic
+from solvingrt import solve as srt
+
+MEASURES = ["torque", "power", "speed", "velocity lost", "tempo", "angles", "time under tension"]
+WIDTH, HEIGHT = 320, 180  # Size of the analysis, the video is twice as large
+
+
+def _exercise_(smoothing: str):
+    athlete = srt.Athlete(1.8, 80, 0.35, 15, "left")
+    exercise = srt.Exercise("Preacher curl", "biceps", "", athlete, MEASURES)
+    exercise.smooth_landmarks(smoothing)
+    return exercise
+
+
+@pytest.mark.parametrize("smoothing", [None, "one euro", "savitzky-golay"])
+def test_streaming_and_vectorized_measures_are_the_same(blank_video, smoothing):
+    positions = synthetic.lift_landmarks("curl", 3, width=WIDTH, height=HEIGHT)
+    positions += np.random.default_rng(0).integers(-2, 3, positions.shape, dtype=positions.dtype)  # Jitter
+    detected = np.ones(len(positions), dtype=bool)
+    detected[:2] = False  # The velocity can't look back on the first frames with a person
+    video = blank_video(len(positions), 2 * WIDTH, 2 * HEIGHT)
+
+    # One frame at a time, MediaPipe replaced by the landmarks of the frame
+    streamed = _exercise_(smoothing)
+    streamed.video = video
+    streamed.headless()
+    frames = iter(zip(positions.tolist(), detected.tolist()))
+
+    def find_position(frame):
+        landmarks, found = next(frames)
+        streamed.pose.positions = landmarks if found else []
+        return streamed.pose.positions
+
+    streamed.pose.find_position = find_position
+    streamed = list(streamed.iter_reps())[-1]
+
+    # Every frame at once. The video isn't read to its last frame (see Exercise._landmark_stream_)
+    keypoints = positions[:len(positions) - 1].astype(np.float64)
+    keypoints[~detected[:len(keypoints)]] = np.nan
+    vectorized = _exercise_(smoothing)
+    vectorized.video_resize(WIDTH, HEIGHT)  # The keypoints are in the pixels of the analysis, like find_position
+    vectorized.use_keypoints(keypoints, fps=30, width=WIDTH, height=HEIGHT)
+    vectorized = list(vectorized.iter_reps())[-1]
+
+    assert len(streamed) == len(vectorized) == 3
+    assert list(streamed.columns) == list(vectorized.columns)
+    for name in streamed.columns:
+        assert np.allclose(streamed.columns[name], vectorized.columns[name], equal_nan=True), name
+    assert streamed.summary == pytest.approx(vectorized.summary)